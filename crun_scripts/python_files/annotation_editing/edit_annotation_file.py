@@ -19,8 +19,13 @@ from the user:
 args[0]    :   edit_annotation_file.py   (This argument always happens, no matter what)
 args[1]    :   path/to/annotation_bedfiles (path to folder containing annotation files in bed format)
 
+and takes one optional argument:
 
-There are a few organism identifiers that have been manually set in this file:
+--workers <n>  :   number of annotation files to rewrite at the same time (default 1)
+
+
+The identifiers are cleaned up with the checkers in shared_tools/annotation_ids.py, which are
+also used by make_annotation_files.py. A few organism identifiers have been manually set there:
 
 Drosophila melanogaster    :    dmel
 Escherichia coli           :    ecol
@@ -29,18 +34,20 @@ Mus musculus               :    mmus
 Caenorhabditis elegans     :    cele
 
 If your organism is not represented, or if the organism identifier used in your annotation file
-is different, then simply edit the organism_identifiers list below (and let me know!!)
+is different, then simply edit the organism_identifiers list in annotation_ids.py (and let me know!!)
 
 If you need to change the column that contains the annotation identifier information, go to the
 main function below, and look for the line
 
-edit_lines = get_lines(file, '\t', 4)
+rewrite_all_files(directory, '\t', 4, workers = workers)
 
 and change the integer 4 to the integer for the column you desire.
 
 If this file is run, given a directory containing annotation files in bed format (I would filter them
 based on annotation type first, see the cutandrun program for more details), then those files will
 be REWRITTEN after formatting of the annotation identifier line. (for bed files, column 4).
+Each file is written to a hidden temporary file one line at a time, and the temporary file
+then replaces the original, so an interrupted run never leaves a partly written file.
 
 """
 
@@ -49,7 +56,16 @@ be REWRITTEN after formatting of the annotation identifier line. (for bed files,
 #           Importables
 
 import sys         # For getting the system argument inputs
+import os          # For getting the file names and finding the shared_tools folder
+import re          # For finding the identifier column in the lines
 import glob        # For iterating over files in a directory
+from concurrent.futures import ProcessPoolExecutor, as_completed   # For rewriting files in parallel
+
+# The shared_tools folder holds the identifier checkers used by several python files
+sys.path.append(f"{os.path.dirname(os.path.abspath(__file__))}/../shared_tools")
+import annotation_ids
+import script_options
+import file_tools
 
 #
 #
@@ -64,281 +80,6 @@ extensions = ["bed",
               "bed6",
               "bed12"]
 
-# These are the "organism identifiers", which are just the first letter of the genus and
-# the first three letters of the species. This program was designed around Drosophila
-# melanogaster, and there are annotations that have format 'gene-Dmel-CG43201'. The
-# organism identifier just lets the program know which portion of the string to take.
-organism_identifiers = ["dmel",
-                        "ecol",
-                        "hsap",
-                        "mmus",
-                        "cele"]
-
-#
-#
-##############################################################################################################
-#
-#        Functions: Checking lines of certain identifiers
-
-def check_rna_line(line,
-                   delimiter,
-                   column):
-    """
-    Given a line, a delimiter, and a column number (which has the
-    annotation identifier), return a string that is formatted
-    based on the qualities below.
-
-    For RNA, possible string types seen:
-
-    rna-|FlyBase|<identifier>-<sub_id>      ->   <identifier>-<sub_id>             (NCBI or Flybase)
-    rna-<some_id>_<some_number>.<integer>   ->   <some_id>_<some_number>.<integer> (NCBI identifiers)
-    rna-<organism_id>_<identifier>          ->   <identifier>                      (Flybase)
-    """
-    # Use the global organism_identifiers list
-    global organism_identifiers
-    # Computer scientists start counting at zero, so subtract 1 from the column number
-    # to get the placement in the split line.
-    col = column - 1
-    # Split the line on the delimiter. Line will be a list.
-    line = line.split(delimiter)
-    # Check line[col] for the relevant ID types
-    #
-    # Type 1 as shown in docstring
-    if "|" in line[col]:
-        # If | is in the ID, then split on | and take the last element
-        line[col] = line[col].split('|')[-1]
-    # Type 2 as shown in docstring
-    # If rna- and N in column
-    elif "rna-" in line[col] and "N" in line[col]:
-        # Then simply remove the first four characters of the column
-        line[col] = line[col][4:]
-    # Otherwise, we consult the organism identifiers list
-    else:
-        # Loop over ids in organism_identifiers
-        for id in organism_identifiers:
-            # If the id is a substring of the column
-            if id in line[col].lower():
-                # Then lower the line, split on the id, and take the last element
-                # of the split column starting from character 1, uppercase.
-                line[col] = line[col].lower().split(id)[-1][1:].upper()
-                # and break the loop
-                break
-    # Initialize the newline
-    newline = f"{line[0]}"
-    # Delete the 0th element of the split line, as it is in the newline
-    del line[0]
-    # Loop over the elements of the line
-    for colmn in line:
-        # Use string formatting to populate the newline string
-        newline = f"{newline}{delimiter}{colmn}"
-    # Return the newline string
-    return newline
-
-def check_cds_line(line,
-                   delimiter,
-                   column):
-    """
-    Given a line, a delimiter, and a column number (where the annotation
-    identifier lives), return a new string with the identifier cleaned up.
-
-    Possible identifier strings for coding sequences:
-
-    cds-<some_id>_<some_number>.<integer>   ->   <some_id>_<some_number>.<integer> (NCBI identifiers)
-    id-<organism_id>_<identifier>          ->    <identifier>                      (Flybase)
-    """
-    # Computer scientists start counting at zero, so subtract 1 from the column number
-    # to get the placement in the split line.
-    col = column - 1
-    # Split the line on the delimiter, reassigns variable line as a list of strings.
-    line = line.split(delimiter)
-    # Check line[col] for relevant ID type
-    #
-    # Type 1: string has substring cds- and N in it
-    if "cds-" in line[col] and "N" in line[col]:
-        # In which case, just use the string without the first four characters
-        line[col] = line[col][4:]
-    # If the substring id_N is in the string
-    elif "id_N" in line[col]:
-        # Then just use the string without the first three characters
-        line[col] = line[col][3:]
-    # Initialize the newline string
-    newline = f"{line[0]}"
-    # Delete the 0th element of th eline, as it is in the newline
-    del line[0]
-    # Loop over the remaining elements of line
-    for colmn in line:
-        # Use string formatting to populate the newline
-        newline = f"{newline}{delimiter}{colmn}"
-    # Return the newline
-    return newline
-
-def check_exon_line(line,
-                    delimiter,
-                    column):
-    """
-    Given a line, a delimiter, and a column (which denotes the column
-    containing the identifier string), return a newline with the identifier
-    string cleaned up.
-
-    Possible annotation types for exon:
-
-    exon-|FlyBase|<identifier>-<sub_id>      ->   <identifier>-<sub_id>             (NCBI or Flybase)
-    exon-<some_id>_<some_number>.<integer>   ->   <some_id>_<some_number>.<integer> (NCBI identifiers)
-    exon-<organism_id>_<identifier>          ->   <identifier>                      (Flybase)
-    """
-    # Use the global organism identifiers list
-    # Computer scientists start counting at zero, so subtract 1 from the column number
-    # to get the placement in the split line.
-    col = column - 1
-    # Split the line on the delimiter, reassigns variable line as a list of strings.
-    line = line.split(delimiter)
-    # Check line[col] for the relevant ID types
-    #
-    # Type 1 as shown in docstring
-    if "|" in line[col]:
-        # If | is in the ID, then split on | and take the last element
-        line[col] = line[col].split('|')[-1]
-    # Or if the substrings exon- and N are in the ID
-    elif "exon-" in line[col] and "N" in line[col]:
-        # Then take the string without the first five characters
-        line[col] = line[col][5:]
-    # Or if the substring id-N is in the string
-    elif "id-N" in line[col]:
-        # Then take the string without the first three characters
-        line[col] = line[col][3:]
-    # If these fail, then consult the organism identifiers list
-    else:
-        # loop over IDs in the organism_identifiers list
-        for id in organism_identifiers:
-            # If the id is in the identfier string
-            if id in line[col].lower():
-                # Then lower the line, split on the id, and take the last element
-                # of the split column starting from character 1, uppercase.
-                line[col] = line[col].lower().split(id)[-1][1:].upper()
-                # and break the loop
-                break
-    # Initialize the newline string
-    newline = f"{line[0]}"
-    # Delete the 0th element of the line, as it is already used
-    del line[0]
-    # Loop over the remaining elements of the line
-    for colmn in line:
-        # Populate the newline string using string formatting
-        newline = f"{newline}{delimiter}{colmn}"
-    # Return the newline
-    return newline
-
-def check_gene_line(line,
-                    delimiter,
-                    column):
-    """
-    Given a line, a delimiter, and a column (which denotes the column
-    containing the identifier string), return a newline with the identifier
-    string cleaned up.
-
-    Possible annotation types for gene:
-
-    gene-<some_id>_<some_number>.<integer>   ->   <some_id>_<some_number>.<integer> (NCBI identifiers)
-    id-<some_id>_<some_number>.<integer>   ->   <some_id>_<some_number>.<integer> (NCBI identifiers)
-    gene-<organism_id>_<identifier>          ->   <identifier>                      (Flybase)
-    """
-    # Use the global organism identifiers list
-    global organism_identifiers
-    # Computer scientists start counting at zero, so subtract 1 from the column number
-    # to get the placement in the split line.
-    col = column - 1
-    # Split the line on the delimiter, reassigns variable line as a list of strings.
-    line = line.split(delimiter)
-    # Check line[col] for the relevant ID types
-    #
-    # Type 1 as shown in docstring
-    # If the substrings gene- and N are in the identifier string
-    if "gene-" in line[col] and "N" in line[col]:
-        # Then take the string without the first five characters
-        line[col] = line[col][5:]
-    # Or if the substring id-N is in the string
-    elif "id-N" in line[col]:
-        # Then take the string without the first three characters
-        line[col] = line[col][3:]
-    # If these fail, then consult the organism identifiers list
-    else:
-        # loop over IDs in the organism_identifiers list
-        for id in organism_identifiers:
-            # If the id is in the identfier string
-            if id in line[col].lower():
-                # Then lower the line, split on the id, and take the last element
-                # of the split column starting from character 1, uppercase.
-                line[col] = line[col].lower().split(id)[-1][1:].upper()
-                # and break the loop
-    # Initialize the newline string
-    newline = f"{line[0]}"
-    # Delete the 0th element of the line, as it is already in the newline
-    del line[0]
-    # Loop over the remaining elements of the line list
-    for colmn in line:
-        # Use string formatting to populate the newline
-        newline = f"{newline}{delimiter}{colmn}"
-    # Return the newline
-    return newline
-
-def check_other_line(line,
-                     delimiter,
-                     column):
-    """
-    Given a line, a delimiter, and a column (which denotes the column
-    containing the identifier string), return a newline with the identifier
-    string cleaned up. This function makes no assumption about the type
-    of annotation in the line
-    """
-    # Computer scientists start counting at zero, so subtract 1 from the column number
-    # to get the placement in the split line.
-    col = column - 1
-    # Split the line on the delimiter, assigns variable splitter as a list of strings
-    splitter = line.split(delimiter)
-    # Try the RNA line checker.
-    newline = check_rna_line(line, delimiter, column)
-    # If the newline and line are not equal, then the RNA checker did something
-    if line != newline:
-        # So return that something
-        return newline
-    # Try the CDS line checker
-    newline = check_cds_line(line, delimiter, column)
-    # If the newline and the line are not equal, then the CDS checker did something
-    if line != newline:
-        # So return that something
-        return newline
-    # Try the EXON line checker
-    newline = check_exon_line(line, delimiter, column)
-    # If the newline and the line are not equal, then the EXON checker did something
-    if line != newline:
-        # So return that something
-        return newline
-    # Try the GENE line checker
-    newline = check_gene_line(line, delimiter, column)
-    # If the newline and the line are not equal, then the GENE checker did something
-    if line != newline:
-        # So return that something
-        return newline
-    # If none of these worked, the attempt the most basic annotation type: id-N
-    else:
-        # If id-N is in the identifier column
-        if "id-N" in splitter[col]:
-            # Then take the string without the first three characters
-            splitter[col] = splitter[col][3:]
-            # Initialize the newline
-            newline = f"{splitter[0]}"
-            # Delete the 0th element of splitter, as it is already in the line
-            del splitter[0]
-            # Loop over the elements of the split line
-            for colmn in splitter:
-                # Use string formatting to populate the newline
-                newline = f"{newline}{delimiter}{colmn}"
-            # And returnthe newline
-            return newline
-        # If all of this fails, then just return the line and give up.
-        else:
-            return line
-
 #
 #
 ##############################################################################################################
@@ -354,6 +95,8 @@ def check_sysargs(args):
     args[0]   :   edit_annotation_file.py
     args[1]   :   annotation directory (full of bed files)
     ================================================================
+
+    The optional --workers argument should be removed with script_options.get_option() first.
     """
     # Check the number of arguments given. Fail if there are more than two
     assert len(args) == 2, "Only two system arguments should be given"
@@ -386,66 +129,119 @@ def check_sysargs(args):
 #
 #          Functions: Parsing the file, formatting lines, writing them back to file
 
+def get_file_checker(file):
+    """
+    Given an annotation file, return the identifier checker for the annotation type
+    in the name of the file (from annotation_ids.id_checkers), or None if the file
+    should not be edited. This is done once per file, instead of once per line.
+    """
+    # Use annotation_ids.get_type_checker() on the name of the file
+    return annotation_ids.get_type_checker(os.path.basename(file))
+
+def get_column_pattern(delimiter,
+                       column):
+    """
+    Given a delimiter and a column number (counting from 1), return a compiled
+    regular expression that matches the start of a line up to the end of that
+    column. Group 1 is everything before the column, and group 2 is the column.
+    """
+    # Escape the delimiter, in case it means something in a regular expression
+    delim = re.escape(delimiter)
+    # Skip column - 1 columns (and their delimiters), then take the next column
+    return re.compile(f"((?:[^{delim}\n]*{delim}){{{column - 1}}})([^{delim}\n]*)")
+
 def get_lines(file, delimiter, column):
     """
     Given a file, a delimiter, and a column (which contains the identifier of interst),
-    return a list of lines with those identifiers reformatted.
+    yield the lines of the file with those identifiers reformatted, one at a time, so
+    the whole file is never held in memory.
+
+    The identifier checker is found once for the file, and the identifier column
+    is found with one compiled regular expression, so the lines are never split
+    and joined back together.
     """
-    # Initailze the lines list
-    lines = []
+    # Get the identifier checker from the name of the file
+    checker = get_file_checker(file)
+    # Get the regular expression that finds the identifier column
+    pattern = get_column_pattern(delimiter, column)
     # Open the file and read it
     with open(file, 'r') as f:
         # Loop over the lines in the file
         for line in f:
-            # If rna is in the line
-            if "rna" in str(f).lower():
-                # Then check using the RNA checker
-                newline = check_rna_line(line, delimiter, column)
-            # Or if cds is in the line
-            elif "cds" in str(f).lower():
-                # Then check using the CDS checker
-                newline = check_cds_line(line, delimiter, column)
-            # Or if exon is in the line
-            elif "exon" in str(f).lower():
-                # Then check using the EXON checker
-                newline = check_exon_line(line, delimiter, column)
-            # Or if gene is in the line
-            elif "gene" in str(f).lower():
-                # Then check using the GENE checker
-                newline = check_gene_line(line, delimiter, column)
-            # Or if region is in the line
-            elif "region" in str(f).lower():
-                # Then this file is a region file, which we do not need.
-                # Append the line and continue on
-                lines.append(line)
+            # If there is no checker, then this file is a region file, which we do not need.
+            # So keep the line as it is
+            if checker == None:
+                yield line
+                continue
+            # Find the identifier column in the line
+            match = pattern.match(line)
+            # If the line does not have that column, then keep the line as it is
+            if match == None:
+                yield line
                 continue
-            # If none of these were found, then use the check_other_line function
-            # to just brute force the formatting
-            else:
-                newline = check_other_line(line, delimiter, column)
-            # Add the newline to the lines.
-            lines.append(newline)
+            # Use the checker on the identifier
+            identifier = checker(match.group(2))
+            # Yield the line with the new identifier
+            yield f"{match.group(1)}{identifier}{line[match.end():]}"
         # Once you've finished all lines in the file, then close the file
         f.close()
-    # and return the lines
-    return lines
 
 def write_new_file(file,
                    lines):
     """
-    Given a filename and a list of strings (lines),
-    Write a file!
-    Return a string
+    Given a filename and an iterable of strings (lines, which may be read from
+    the file itself, like get_lines()), write the lines to the file and return a string.
+
+    The lines are written with file_tools.atomic_write() (keeping the permissions of
+    the file), so the file is either the old version or the new version, even if the
+    program is stopped partway through.
     """
-    # Open the file signifying write ('w')
-    with open(file, 'w') as f:
-        # Use the writelines method to write all lines to the file
+    # Open the file with file_tools.atomic_write(), and use the writelines method to
+    # write the lines as they come
+    with file_tools.atomic_write(file, keep_mode = True) as f:
         f.writelines(lines)
-        # And close the file
-        f.close()
     # Return the done statement
     return f"{file} has been rewritten!"
 
+def rewrite_file(file,
+                 delimiter,
+                 column):
+    """
+    Given an annotation file, a delimiter, and a column (which contains the identifier
+    of interest), reformat the identifiers and rewrite the file. Return a string.
+    """
+    # Get the reformatted lines as a generator, and write them back to the file
+    return write_new_file(file, get_lines(file, delimiter, column))
+
+def rewrite_all_files(directory,
+                      delimiter,
+                      column,
+                      workers = 1):
+    """
+    Given the annotation directory, a delimiter, a column (which contains the identifier
+    of interest), and (optional) the number of worker processes, rewrite all of the
+    annotation files in the directory, telling the user as each one is done.
+
+    Each file is rewritten on its own, so if workers is more than 1 the files are
+    rewritten at the same time in a process pool.
+    """
+    # Get the annotation files (all files that are not text files, like fields.txt).
+    # The list is made before any files are written.
+    files = [file for file in glob.glob(f"{directory}/*") if ".txt" not in file]
+    # If only one worker is requested
+    if workers <= 1:
+        # Then rewrite the files one at a time
+        for file in files:
+            print(rewrite_file(file, delimiter, column))
+        return
+    # Otherwise, make a process pool with the requested number of workers
+    with ProcessPoolExecutor(max_workers = workers) as pool:
+        # Submit each file to the pool
+        futures = [pool.submit(rewrite_file, file, delimiter, column) for file in files]
+        # As each file finishes, tell the user. The result also raises any error from the worker
+        for future in as_completed(futures):
+            print(future.result())
+
 #
 #
 ##############################################################################################################
@@ -462,18 +258,15 @@ def main():
         3b) If it is not a text file, then reformat the lines and rewrite the file
     """
     args = sys.argv
+    # Get the number of worker processes from the optional --workers argument
+    workers = int(script_options.get_option(args, "--workers", "1"))
     directory = check_sysargs(args)
-    for file in glob.iglob(f"{directory}/*"):
-        if ".txt" in file:
-            pass
-        else:
-            edited_lines = get_lines(file, '\t', 4)
-            statement = write_new_file(file, edited_lines)
-            print(statement)
+    rewrite_all_files(directory, '\t', 4, workers = workers)
     print(f"All annotation files have been rewritten :) ")
 
 
-main()
+if __name__ == "__main__":
+    main()
 
 #
 #
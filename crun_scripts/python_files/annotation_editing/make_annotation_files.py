@@ -0,0 +1,276 @@
+"""
+==============================================================================================================
+Python 3.8.5
+
+make_annotation_files.py
+==============================================================================================================
+
+** It is assumed here that the annotation file was downloaded from NCBI as a GFF file. This program
+was designed using the annotation file for Drosophila melanogaster, so edits may be required for other
+organisms (depending on their identifier format, see shared_tools/annotation_ids.py)**
+
+This file splits a GFF annotation file into one bed file per annotation type (gene, exon, mRNA, ...).
+It requires one system argument from the user:
+
+args[0]    :   make_annotation_files.py   (This argument always happens, no matter what)
+args[1]    :   path/to/annotations (path to the folder containing the GFF file, which may be gzipped)
+
+The GFF file is read once, as a stream (gzipped files are never decompressed to the disk), and each
+line is written straight to the bed file of its annotation type:
+
+    <folder>/annotation_types/annotation_<type>.bed     :   chrom, start, end, ID, 0, strand, type
+    <folder>/annotation_types/fields.txt                :   the annotation types, in the order they
+                                                            first appear in the GFF file
+
+The start is moved to bed coordinates (counting from zero), and the ID (from the ID= attribute of
+the GFF line) is cleaned up with the checkers in shared_tools/annotation_ids.py, like
+edit_annotation_file.py does, so the bed files do not need to be edited afterwards.
+
+Once the bed files are written, a binary copy of them (see shared_tools/annotation_store.py) is
+saved in annotation_types/.annotation_store, which peak_enrich_annotations.py memory maps
+instead of reading the bed files.
+
+This does the work of bps_make_filter_annotations.sh (gunzip, gff2bed, then one awk per annotation
+type) followed by edit_annotation_file.py. Like gff2bed (which uses sort-bed), the lines of each bed
+file are sorted by chromosome (as text), then by start and end (as numbers), then by the rest of the
+line, so the bed files can be given to other programs (bedops, pyGenomeTracks) that need sorted input.
+
+"""
+
+##############################################################################################################
+#
+#           Importables
+
+import sys         # For getting the system argument inputs
+import os          # For making the annotation_types folder
+import re          # For finding the ID in the GFF attributes
+import glob        # For finding the GFF file in the folder
+import gzip        # For reading gzipped GFF files
+
+# The shared_tools folder holds the identifier checkers and the annotation store used by several python files
+sys.path.append(f"{os.path.dirname(os.path.abspath(__file__))}/../shared_tools")
+import annotation_ids
+import annotation_store
+import file_tools
+
+#
+#
+##############################################################################################################
+#
+#          Pre defined variables and things
+
+# The GFF file should have one of these extensions, and may also end in .gz
+gff_extensions = ["gff",
+                  "gff3"]
+
+# The name of the folder (inside of the annotation folder) that the bed files are written to
+annotation_folder = "annotation_types"
+
+# Regular expression for the ID attribute of a GFF line. The attributes are separated
+# by semicolons, so the ID starts the attributes or comes after a semicolon.
+id_pattern = re.compile(r"(?:^|;)\s*ID=([^;]*)")
+
+#
+#
+##############################################################################################################
+#
+#         Function: Checking the system argument inputs
+
+def get_gff_file(directory):
+    """
+    Given a folder, return the GFF file in the folder (gzipped or not). If both
+    the gzipped and the unzipped versions of the file are there, the unzipped
+    file is used. Fail if there is not exactly one GFF file.
+    """
+    # Initialize the dictionary of GFF files. The keys are the files without .gz
+    gff_files = {}
+    # Loop over the GFF extensions
+    for extension in gff_extensions:
+        # Loop over the gzipped and unzipped files with that extension
+        for file in glob.glob(f"{directory}/*.{extension}.gz") + glob.glob(f"{directory}/*.{extension}"):
+            # Keep the file under its name without .gz. Unzipped files come second, so they are kept
+            gff_files[file[:-3] if file.endswith(".gz") else file] = file
+    # Make sure that there is one GFF file in the folder
+    assert len(gff_files) == 1, f"The folder should contain one GFF file (.gff, .gff3, or .gz of either), {len(gff_files)} were found."
+    # and return it
+    return list(gff_files.values())[0]
+
+def check_sysargs(args):
+    """
+    Given the args list (gotten from sys.argv), check that they are in the proper format/valid.
+
+    The arguments should be as follows:
+    ================================================================
+    args[0]   :   make_annotation_files.py
+    args[1]   :   annotation folder (containing one GFF file)
+    ================================================================
+
+    Return a 2-tuple of the folder and the GFF file in the folder.
+    """
+    # Check the number of arguments given. Fail if there are more than two
+    assert len(args) == 2, "Only two system arguments should be given"
+    # Make sure that the folder exists
+    assert os.path.isdir(args[1]), f"{args[1]} is not a folder"
+    # Return the folder and the GFF file in it
+    return args[1], get_gff_file(args[1])
+
+#
+#
+##############################################################################################################
+#
+#          Functions: Reading the GFF file and writing the bed files
+
+def open_gff_file(file):
+    """
+    Given a GFF file, return the file opened for reading text. Gzipped files
+    (ending in .gz) are decompressed as they are read.
+    """
+    # If the file is gzipped, then open it with the gzip module
+    if file.endswith(".gz"):
+        return gzip.open(file, 'rt')
+    # Otherwise, just open the file
+    return open(file, 'r')
+
+def get_gff_id(attributes):
+    """
+    Given the attributes column of a GFF line, return the value of the ID
+    attribute, or '.' if the line has no ID (like gff2bed).
+    """
+    # Use id_pattern to find the ID
+    match = id_pattern.search(attributes)
+    # If there is no ID, then use a period
+    if match == None:
+        return "."
+    # Otherwise, return the ID
+    return match.group(1)
+
+def split_gff_file(gff_file,
+                   annot_dir,
+                   clean_ids = True):
+    """
+    Given a GFF file, the folder to write the bed files to, and (optional) whether
+    to clean up the IDs with annotation_ids (default True), write one bed file for
+    each annotation type and the fields.txt file. Return a dictionary with
+    key = annotation type, value = the number of lines of that type, in the order
+    the annotation types first appear.
+
+    The GFF file is read one line at a time and each line is written to the bed file
+    of its type as it is read, so the GFF file is only read once and is never held
+    in memory. The bed file of each type is opened the first time the type is seen,
+    and is sorted with sort_bed_file() once all of the lines are written.
+    """
+    # Make the folder for the bed files, if it does not exist
+    os.makedirs(annot_dir, exist_ok = True)
+    # Initialize the dictionaries of open bed files, identifier checkers, and line counts
+    bed_files = {}
+    checkers = {}
+    counts = {}
+    # Try to split the file, making sure the bed files are closed at the end
+    try:
+        # Open the GFF file, call it f
+        with open_gff_file(gff_file) as f:
+            # Loop over the lines in the file
+            for line in f:
+                # The sequences at the end of a GFF file are not annotations, so stop there
+                if line.startswith("##FASTA"):
+                    break
+                # Skip comment lines and blank lines
+                if line[0] == "#" or line.strip() == "":
+                    continue
+                # Strip the newline character and split the line on tabs
+                split_line = line.rstrip("\r\n").split("\t")
+                # Skip lines that do not have all nine GFF columns
+                if len(split_line) < 9:
+                    continue
+                # The annotation type is in the third column
+                annotation_type = split_line[2]
+                # If this is the first line of this type
+                if annotation_type not in bed_files:
+                    # Then open the bed file for the type
+                    bed_files[annotation_type] = open(f"{annot_dir}/annotation_{annotation_type}.bed", 'w')
+                    # get the identifier checker for the type (None if the IDs are not cleaned)
+                    checkers[annotation_type] = annotation_ids.get_type_checker(annotation_type) if clean_ids else None
+                    # and start counting the lines of the type
+                    counts[annotation_type] = 0
+                # Get the ID of the line
+                identifier = get_gff_id(split_line[8])
+                # If there is a checker for the type, then clean up the ID
+                if checkers[annotation_type] != None:
+                    identifier = checkers[annotation_type](identifier)
+                # Write the line in bed format (GFF starts count from one, bed starts from zero)
+                bed_files[annotation_type].write(f"{split_line[0]}\t{int(split_line[3]) - 1}\t{split_line[4]}\t"
+                                                 f"{identifier}\t0\t{split_line[6]}\t{annotation_type}\n")
+                # and count the line
+                counts[annotation_type] += 1
+            # Close the GFF file
+            f.close()
+    # Whether or not that worked
+    finally:
+        # Close all of the bed files
+        for bed_file in bed_files.values():
+            bed_file.close()
+    # Sort each of the bed files, like gff2bed does
+    for bed_file in bed_files.values():
+        sort_bed_file(bed_file.name)
+    # Write the annotation types to fields.txt, one per line
+    with open(f"{annot_dir}/fields.txt", 'w') as f:
+        f.writelines([f"{annotation_type}\n" for annotation_type in counts])
+        # and close the file
+        f.close()
+    # Return the line counts
+    return counts
+
+def sort_bed_file(bed_file):
+    """
+    Given a bed file, sort the lines of the file in place, like sort-bed: by
+    chromosome (as text), then by start and end (as numbers), then by the rest
+    of the line. The sorted lines are written with file_tools.atomic_write(), so
+    the bed file is never left partly written.
+    """
+    # Open the bed file and read the lines, call it f
+    with open(bed_file, 'r') as f:
+        lines = f.readlines()
+        # and close the file
+        f.close()
+    # Split each line into the chromosome, start, end and the rest of the line, once
+    split_lines = [line.split("\t", 3) for line in lines]
+    # Sort the lines on the chromosome, the start and end as integers, and the rest of the line
+    order = sorted(range(len(lines)), key = lambda i: (split_lines[i][0],
+                                                       int(split_lines[i][1]),
+                                                       int(split_lines[i][2]),
+                                                       split_lines[i][3]))
+    # Write the sorted lines back to the bed file
+    with file_tools.atomic_write(bed_file) as f:
+        f.writelines([lines[i] for i in order])
+
+#
+#
+##############################################################################################################
+#
+#           main() function
+
+def main():
+    """
+    Main function wraps all of the stuff above together.
+    1) Get the system arguments
+    2) Check the system arguments and find the GFF file
+    3) Split the GFF file into bed files in the annotation_types folder
+    4) Save the binary annotation store for the bed files
+    5) Tell the user which annotation types were found
+    """
+    args = sys.argv
+    directory, gff_file = check_sysargs(args)
+    annot_dir = f"{directory}/{annotation_folder}"
+    counts = split_gff_file(gff_file, annot_dir)
+    annotation_store.load_annotation_store(annot_dir)
+    for annotation_type, count in counts.items():
+        print(f" New field found!     {annotation_type} ({count} lines)")
+    print(f"All annotation files have been written to {annot_dir} :) ")
+
+
+if __name__ == "__main__":
+    main()
+
+#
+#
+##############################################################################################################
@@ -19,6 +19,12 @@ combine all of the annotations/peaks found, and write those to a file. The syste
     OPTIONAL
     args[3]   :   delimiter  default \t
     args[4]   :   file type, default xls
+    --mode    :   index (default) or sweep. index looks up every peak in the
+                  sorted annotations, sweep walks the peaks of each chromosome
+                  alongside each annotation file in a single pass.
+    --workers :   number of processes used to compare the peak files, default 1
+    --verbosity : 0 (final message only), 1 (progress summaries, default) or
+                  2 (progress summaries and every overlapping annotation)
 
 This program assumes that the filter_macs3out_files.py program was run prior to this program running. Please
 check out the main function and helper functions for more details about this program.
@@ -32,8 +38,18 @@ check out the main function and helper functions for more details about this pro
 
 import sys          # Used for getting the system argument inputs
 import os           #
-import subprocess   # Used for invoking shell commands in python
 import glob         # Used for iterating over files in a directory
+import numpy as np  # Used for binary searching the sorted annotation starts
+import operator     # Used for projecting the kept columns out of split lines
+import time         # Used for timing the progress summaries
+import multiprocessing                          # Used for getting the fork context for process pools
+from concurrent.futures import ProcessPoolExecutor  # Used for comparing peak files in parallel
+
+# The shared_tools folder holds the peak file loader and the binary annotation store made by make_annotation_files.py
+sys.path.append(f"{os.path.dirname(os.path.abspath(__file__))}/../shared_tools")
+import load_peak_files
+import annotation_store
+import script_options
 
 #
 #
@@ -81,6 +97,22 @@ title_folder_formats = ["_exp_",            # experiment
                         "_enrich_",         # enrichment (experiment)
                         "_enrichment_"]     # enrichment (experiment)
 
+# How much the program prints while comparing peaks to annotations. This
+# is set using the --verbosity system argument.
+#
+#   0   :   Only the final message
+#   1   :   A progress summary for each peak file (default)
+#   2   :   The progress summaries and every overlapping annotation
+verbosity = 1
+
+# The number of seconds between progress summaries while a peak file
+# is being compared to the annotations.
+progress_interval = 10
+
+# The annotation index shared with worker processes. This is set by
+# make_annotation_pool() right before the workers are forked.
+shared_annot_index = None
+
 #
 #
 ##############################################################################################################
@@ -136,126 +168,327 @@ def get_bound_keys(formatting_dictionary,
     # Once the loop completes, return the keys found
     return chrom_key, start_key, end_key
 
-def compare_regions(peak_chrom,     #Chromosome associated with peak
-                    peak_start,     #Start associated with peak
-                    peak_end,       #End associated with peak
-                    region_chrom,   #Chromosome associated with region
-                    region_start,   #Start associated with region
-                    region_end):    #End associated with region
-    """
-    Given information regarding a peak region and an annotation region,
-    return one of the following values
-
-    True:
-        peak_end and region_start overlap
-        peak_start and region_end overlap
-        peak_start and peak_end between region start and region end
-        region_start and region_end between peak_start and peak_end
-
-    'continue'
-        peak_chrom and region_chrom are not the same
-
-    'break'
-        peak_start and peak_end are less than region_start and region_end
-
-    False
-        If none of the other conditions are met
-
-    This function is used inside of a loop, so the break string and continue
-    string correspond to leaving the loop and continueing to the next iteration
-    """
-    # If the peak chromosome and region chromosome are different
-    if peak_chrom != region_chrom:
-        # Then continue, these annotation are on different chromosomes
-        return 'continue'
-    # Or if the peak end is between the region start and region end
-    elif peak_start <= region_end and peak_end >= region_end:
-        # Then return True, as the peak and annotation overlap
-        return True
-    # Or if the peak start is between the region start and end
-    elif peak_start <= region_start and peak_end >= region_start:
-        # Then return True, the peak and annotation overlap
-        return True
-    # Or if the region consumes the entire peak
-    elif peak_start >= region_start and peak_end <= region_end:
-        # Then return True
-        return True
-    # Or if the peak consumes the entire region
-    elif peak_start <= region_start and peak_end >= region_end:
-        # Then return True
-        return True
-    # Or if the chromosome is the same (checked in the first if) and the
-    # region is further along the chromosome than the peak
-    elif peak_start <= region_start and peak_end <= region_end:
-        # Then return 'break', all subsequent annotations are beyond the peak
-        return 'break'
-    # If none of these conditions are met, then return False
-    else:
-        # This means that we are on the right chromosome, but the peak and annotations
-        # do not overlap, but the peak is still upstream of the annotation
-        return False
-
-
-def check_line_annotes(annot_file,
-                       annot_extension,
-                       peak_chrom,
-                       peak_start,
-                       peak_end,
-                       delimiter,
-                       formatting_dictionary,
-                       region_wiggle = 1000):
+def load_annotation_file(annot_file,
+                         annot_extension,
+                         delimiter,
+                         formatting_dictionary,
+                         region_wiggle = 1000):
     """
     Given an annotation file, the file extension of the annotation file, the
-    peak region chromosome, the peak region start, the peak region end, the
-    delimiter for the files, the formatting dictionary, and an integer that
-    defines the "wiggle room" on either end of a peak region (number of nucleotides
-    that will be included in the annotation region), return a list of strings
-    formatted to include the annotation region and the peak associated with that
-    region.
+    delimiter for the file, the formatting dictionary, and an integer that
+    defines the "wiggle room" on either end of an annotation region, return
+    a dictionary where each key is a chromosome and each value is a list
+
+        [sorted region starts, region ends, formatted lines, longest region, region_wiggle]
+
+    The starts and ends are numpy arrays, and do not include the wiggle room. Adding the
+    wiggle room to both ends of every annotation is the same as adding it to both ends
+    of the peak, so check_line_annotes() and sweep_line_annotes() do that instead.
+
+    The annotation file is read exactly once, and the starts are sorted so that
+    peaks can be compared to the annotations using a binary search.
     """
-    # Initialize the list that holds regions/peaks whose comparison was True
-    true_compared = []
     # Use the get_bound_keys() function to get the chrom, start, and end
     # keys for the region
     reg_chrom_key, reg_start_key, reg_end_key = get_bound_keys(formatting_dictionary,
                                                                annot_extension)
+    # Use get_projection() to get the columns kept for the annotation file
+    projection = get_projection(formatting_dictionary, annot_extension)
+    # Initialize the dictionary holding the (start, end, line) tuples for each chromosome
+    regions = {}
     # Open and read the annotation file, call it a
     with open(annot_file, 'r') as a:
         # Loop over the lines in a
         for line in a:
+            # If the line is empty, then continue to the next line
+            if line.strip() == "":
+                continue
             # strip the newline character and split the line on the delimiter
             split_line = line.strip().split(delimiter)
             # Assign the region_chrom as the reg_chrom_key(th) element of the split line
             region_chrom = split_line[reg_chrom_key]
-            # Assign the region_start as the reg_start_key(th) element minus region_wiggle
-            region_start = int(split_line[reg_start_key]) - region_wiggle
-            # Assign the region_start as the reg_end_key(th) element plus region_wiggle
-            region_end = int(split_line[reg_end_key]) + region_wiggle
-            # Use the compare_regions() function to compare the peak to the region
-            compare = compare_regions(peak_chrom, peak_start, peak_end,
-                                      region_chrom, region_start, region_end)
-            # If the comparison returns True
-            if compare == True:
-                # Then create a formatted line for the comparison using format_line()
-                newline = format_line(formatting_dictionary, annot_extension,
-                                      split_line, delimiter)
-                # Print the newline so the user can see where the program is at
-                print(newline)
-                # And add the newline to the true_compare list
-                true_compared.append(newline)
-            # If the comparison returns continue
-            elif compare == 'continue':
-                # Then continue
-                continue
-            # If the comparison returns 'break'
-            elif compare == 'break':
-                # then break the loop
-                break
+            # Assign the region_start as the reg_start_key(th) element
+            region_start = int(split_line[reg_start_key])
+            # Assign the region_end as the reg_end_key(th) element
+            region_end = int(split_line[reg_end_key])
+            # Create the formatted line for the region now, so it is only made once
+            newline = project_line(projection, split_line, delimiter)
+            # and add the region to the list for its chromosome
+            regions.setdefault(region_chrom, []).append((region_start, region_end, newline))
         # Close the file after the loop is completed
         a.close()
+    # Initialize the index dictionary
+    index = {}
+    # Loop over the chromosomes and their regions
+    for chrom, regs in regions.items():
+        # Sort the regions on their start. The sort is stable, so regions
+        # with the same start keep the order they had in the file
+        regs.sort(key = lambda r: r[0])
+        # Get the starts and ends as arrays
+        starts = np.array([r[0] for r in regs], dtype = np.int64)
+        ends = np.array([r[1] for r in regs], dtype = np.int64)
+        # and save the starts, ends, lines, the longest region and the wiggle room for the chromosome
+        index[chrom] = [starts,
+                        ends,
+                        [r[2] for r in regs],
+                        int((ends - starts).max()),
+                        region_wiggle]
+    # Return the index dictionary
+    return index
+
+def load_stored_annotations(store,
+                            annot_file,
+                            annot_extension,
+                            delimiter,
+                            formatting_dictionary,
+                            region_wiggle = 1000):
+    """
+    Given an annotation store (from annotation_store.load_annotation_store()), an
+    annotation file, the file extension of the annotation file, the delimiter for
+    the file, the formatting dictionary, and the "wiggle room" for the annotation
+    regions, return the same dictionary as load_annotation_file(), or None if the
+    file is not in the store.
+
+    The starts and ends are slices of the memory mapped arrays of the store, and the
+    formatted lines are only made when an annotation overlaps a peak, so the
+    annotation file is never read and none of the lines are read until they are used.
+    """
+    # Get the code of the file in the store
+    code = store["file_codes"].get(os.path.basename(annot_file))
+    # If the file is not in the store, or its lines could not be stored, then use the file
+    if code == None or not store["file_stored"][code]:
+        return None
+    # If the formatting keeps a column that is not in the store, then use the file
+    if max(get_sorted_columns(formatting_dictionary, annot_extension)) >= annotation_store.bed_columns:
+        return None
+    # Use get_projection() to get the columns kept for the annotation file
+    projection = get_projection(formatting_dictionary, annot_extension)
+    # Make the function that formats a split line from the store
+    format_row = lambda split_line: project_line(projection, split_line, delimiter)
+    # Initialize the index dictionary
+    index = {}
+    # Get the offsets and the longest regions of the file
+    offsets = store["offsets"][code]
+    longest = store["longest"][code]
+    # Loop over the chromosomes in the store
+    for chrom_code, chrom in enumerate(store["chrom_names"].tolist()):
+        # Get the first and last lines of the chromosome in the file
+        lo, hi = int(offsets[chrom_code]), int(offsets[chrom_code + 1])
+        # If the file has no lines on the chromosome, then continue to the next one
+        if lo == hi:
+            continue
+        # Save the starts, ends, lines, the longest region and the wiggle room for the chromosome
+        index[chrom] = [store["starts"][lo:hi],
+                        store["ends"][lo:hi],
+                        annotation_store.StoredLines(store, chrom, lo, hi, format_row),
+                        int(longest[chrom_code]),
+                        region_wiggle]
+    # Return the index dictionary
+    return index
+
+def load_annotation_index(annot_dir,
+                          delimiter,
+                          formatting_dictionary,
+                          region_wiggle = 1000):
+    """
+    Given the directory to annotation files, the delimiter for the files, the
+    formatting dictionary, and the "wiggle room" for the annotation regions,
+    return a list of tuples
+
+        (annotation file, annotation extension, annotation file index)
+
+    with one tuple for each annotation file in the directory. This is done once
+    per run, so the annotation files are not reread for every peak.
+
+    If the delimiter is a tab, the annotations are loaded from the binary store
+    (see shared_tools/annotation_store.py), which is made from the annotation
+    files the first time and again whenever they change.
+    """
+    # Initialize the annotation index list
+    annot_index = []
+    # The store is made from tab separated bed files, so only use it for tabs
+    store = annotation_store.load_annotation_store(annot_dir) if delimiter == '\t' else None
+    # Loop over the annotation files in the annotation directory
+    for annot_file in glob.iglob(f"{annot_dir}/*"):
+        # Get the annotation file extension
+        annot_extension = annot_file.split('.')[-1]
+        # Or if the annotation extension is txt or if region is in the file
+        # then simply continue, those files are not of interest
+        if annot_extension == 'txt' or "region" in annot_file:
+            continue
+        # Initialize the file index
+        file_index = None
+        # If there is a store
+        if store != None:
+            # Then use load_stored_annotations() to index the annotation file from the store
+            file_index = load_stored_annotations(store,
+                                                 annot_file,
+                                                 annot_extension,
+                                                 delimiter,
+                                                 formatting_dictionary,
+                                                 region_wiggle = region_wiggle)
+        # If the file is not in the store
+        if file_index == None:
+            # Then use load_annotation_file() to index the annotation file
+            file_index = load_annotation_file(annot_file,
+                                              annot_extension,
+                                              delimiter,
+                                              formatting_dictionary,
+                                              region_wiggle = region_wiggle)
+        # And add the file, extension and index to the annotation index list
+        annot_index.append((annot_file, annot_extension, file_index))
+    # Return the annotation index list
+    return annot_index
+
+def check_line_annotes(file_index,
+                       peak_chrom,
+                       peak_start,
+                       peak_end):
+    """
+    Given an annotation file index (from load_annotation_file()), the peak region
+    chromosome, the peak region start, and the peak region end, return a list of
+    strings formatted to include the annotation regions that overlap the peak.
+
+    The starts in the index are sorted, so np.searchsorted is used to find the
+    annotations that start before the peak ends and no earlier than the longest
+    annotation on the chromosome allows. Only those annotations are compared to the peak.
+    """
+    # Initialize the list that holds regions/peaks whose comparison was True
+    true_compared = []
+    # If the peak chromosome has no annotations
+    if peak_chrom not in file_index:
+        # Then return the empty list
+        return true_compared
+    # Get the starts, ends, lines, the longest region and the wiggle room for the chromosome
+    starts, ends, lines, longest, wiggle = file_index[peak_chrom]
+    # Add the wiggle room to the peak, which is the same as adding it to the regions
+    peak_start, peak_end = peak_start - wiggle, peak_end + wiggle
+    # Find the first region that could reach the peak start
+    low = int(np.searchsorted(starts, peak_start - longest, side = "left"))
+    # and the first region that starts after the peak end
+    high = int(np.searchsorted(starts, peak_end, side = "right"))
+    # Loop over the regions between the two positions that end after the peak starts
+    for i in np.flatnonzero(ends[low:high] >= peak_start).tolist():
+        # The region and the peak overlap, so add the newline to the true_compare list
+        true_compared.append(lines[low + i])
     # and return the comparison list
     return true_compared
 
+def sweep_line_annotes(annot_index,
+                       peak_chrom,
+                       peak_rows,
+                       peak_starts,
+                       peak_ends):
+    """
+    Given an annotation index (from load_annotation_index()), a chromosome, and lists of
+    the rows, starts and ends of the peaks on that chromosome (sorted by start), yield a
+    2-tuple for each peak as soon as its overlaps are found:
+
+        (row of the peak, list of the formatted annotation lines that overlap the peak, one list per annotation file)
+
+    Each annotation file is walked alongside the peaks, so every peak and annotation on
+    the chromosome is visited once. Only the annotations that can still overlap a peak
+    (the active annotations) are kept, and the starts and ends are only taken from the
+    index as the walk reaches them.
+    """
+    # Initialize the walks, one for each annotation file. Each walk holds the starts, ends,
+    # lines and wiggle room for the chromosome, the number of annotations added to the walk
+    # so far, and the active annotations as (start, end, annotation number) tuples
+    walks = []
+    # Loop over the indexed annotation files
+    for annot_file, annot_extension, file_index in annot_index:
+        # If the annotation file has no annotations on the chromosome, then there is nothing to walk
+        if peak_chrom not in file_index:
+            walks.append(None)
+            continue
+        # Get the starts, ends, lines and wiggle room for the chromosome
+        starts, ends, lines, _, wiggle = file_index[peak_chrom]
+        # and start the walk at the first annotation, with no active annotations
+        walks.append([starts, ends, lines, wiggle, 0, []])
+    # Loop over the peaks, in order of their start
+    for row, peak_start, peak_end in zip(peak_rows, peak_starts, peak_ends):
+        # Initialize the list of overlaps for the peak, one list for each annotation file
+        overlaps = []
+        # Loop over the walks
+        for walk in walks:
+            # If the annotation file has no annotations on the chromosome, then none overlap
+            if walk == None:
+                overlaps.append([])
+                continue
+            # Get the walk of the annotation file
+            starts, ends, lines, wiggle, pointer, active = walk
+            # Add the wiggle room to the peak, which is the same as adding it to the annotations
+            start, end = peak_start - wiggle, peak_end + wiggle
+            # Find the annotations that start before the peak ends. The ends of the peaks are not
+            # sorted, so an earlier peak may have already added them
+            new_pointer = max(pointer, int(np.searchsorted(starts, end, side = "right")))
+            # and add them to the active annotations
+            active += zip(starts[pointer:new_pointer].tolist(),
+                          ends[pointer:new_pointer].tolist(),
+                          range(pointer, new_pointer))
+            # Remove the annotations that end before the peak starts. Peaks are sorted by
+            # start, so these annotations cannot overlap any of the remaining peaks.
+            active = [annote for annote in active if annote[1] >= start]
+            # Save the walk for the next peak
+            walk[4], walk[5] = new_pointer, active
+            # The active annotations that start before the peak ends overlap the peak
+            overlaps.append([lines[j] for a_start, a_end, j in active if a_start <= end])
+        # Yield the row of the peak and its overlaps
+        yield row, overlaps
+
+def sweep_peak_file(annot_index,
+                    columns):
+    """
+    Given an annotation index (from load_annotation_index()) and the columns of a peak
+    file (from load_peak_files.load_peak_file()), yield the overlaps of every peak from
+    sweep_line_annotes(), one chromosome at a time.
+
+    The peaks are sorted by chromosome and start once, and each chromosome is walked on
+    its own, so only the walk of one chromosome is held at a time. Peak files are usually
+    sorted, so the peaks of each chromosome come out in the order of the file. If they are
+    not, the overlaps of that chromosome are put back in the order of the file, so the
+    first peak found for each annotation is the same as in the index mode.
+    """
+    # Sort the rows by chromosome code, then by start
+    order = np.lexsort((columns["chromStart"], columns["chrom"]))
+    # Find where the rows of each chromosome begin and end in the sorted rows
+    bounds = np.searchsorted(columns["chrom"][order], np.arange(len(columns["chrom_names"]) + 1)).tolist()
+    # Loop over the chromosome codes and names
+    for code, chrom in enumerate(columns["chrom_names"]):
+        # Get the rows of the peaks on the chromosome, sorted by start
+        rows = order[bounds[code]:bounds[code + 1]]
+        # Walk the peaks on the chromosome alongside the annotations using sweep_line_annotes()
+        found = sweep_line_annotes(annot_index,
+                                   chrom,
+                                   rows.tolist(),
+                                   columns["chromStart"][rows].tolist(),
+                                   columns["chromEnd"][rows].tolist())
+        # If the peaks on the chromosome are not in the order of the file
+        if np.any(rows[1:] < rows[:-1]):
+            # Then put the overlaps back in the order of the file
+            found = sorted(found, key = lambda peak: peak[0])
+        # Yield the overlaps of the peaks on the chromosome
+        yield from found
+
+def index_peak_file(annot_index,
+                    columns):
+    """
+    Given an annotation index (from load_annotation_index()) and the columns of a peak
+    file (from load_peak_files.load_peak_file()), yield a 2-tuple for each peak, in the
+    order of the file:
+
+        (row of the peak, list of the formatted annotation lines that overlap the peak, one list per annotation file)
+
+    Each peak is looked up in each annotation file using check_line_annotes().
+    """
+    # Loop over the rows, chromosome codes, starts and ends of the peaks
+    for row, (code, peak_start, peak_end) in enumerate(zip(columns["chrom"].tolist(),
+                                                           columns["chromStart"].tolist(),
+                                                           columns["chromEnd"].tolist())):
+        # Use check_line_annotes() to get the overlaps of the peak in each annotation file
+        yield row, [check_line_annotes(file_index, columns["chrom_names"][code], peak_start, peak_end)
+                    for annot_file, annot_extension, file_index in annot_index]
+
 def make_compared_lines(true_compared_lines,
                         title,
                         peak_file_line):
@@ -266,41 +499,45 @@ def make_compared_lines(true_compared_lines,
     """
     return [(line, title, peak_file_line) for line in true_compared_lines]
 
-def format_line(formatting_dictionary,
-                file_extension,
-                a_split_line,
-                delimiter):
+def get_sorted_columns(formatting_dictionary,
+                       file_type):
     """
-    Given the formatting dictioanry, the file extension for a file, a split
-    line (list), and the delimiter to separate line elements, return a
-    line in the form
-
-    <split_line[0]><delimiter><split_line[1]><delimiter>...<split_line[n-1]>\n
-
-    for a split line with n elements.
-    """
-    # Use list comprehension to create a list of formatting keys
-    # This will help us get only the elements of the lines we want
-    # for the new line
-    indice = [int(key) for key in formatting_dictionary[file_extension].keys() ]
-    # Sort the index list (smallest to largest, default)
-    indice = sorted(indice)
-    # Initialize the newline variable as the 0th element of the index list.
-    newline = f"{a_split_line[indice[0]]}"
-    # Loop over the indices in the index list
-    for index in indice:
-        # If the index is the already used index
-        if index == indice[0]:
-            # then continue to the next iteration
-            continue
-        # Otherwise
-        else:
-            # build the newline string using the split line, delimiter, and newline
-            newline = f"{newline}{delimiter}{a_split_line[index]}"
-    # At the end, add a newline character (\n) to the end of the line
-    newline = f"{newline}\n"
-    # and return the new line
-    return newline
+    Given a formatting dictionary and a file type, return the sorted
+    list of columns (integers) that are kept for that file type.
+    """
+    # Use list comprehension to get the integer keys, and sort them
+    # (smallest to largest, default)
+    return sorted([int(key) for key in formatting_dictionary[file_type].keys()])
+
+def get_projection(formatting_dictionary,
+                   file_type):
+    """
+    Given a formatting dictionary and a file type, return a function that
+    takes a split line (list) and returns a tuple with only the columns kept
+    for that file type, in order.
+
+    This should be made once per file, and used with project_line() for
+    every line in the file.
+    """
+    # Use get_sorted_columns() to get the columns that are kept
+    indice = get_sorted_columns(formatting_dictionary, file_type)
+    # If only one column is kept, itemgetter would not return a tuple
+    if len(indice) == 1:
+        # So return the column inside of a tuple
+        return lambda split_line: (split_line[indice[0]],)
+    # Otherwise, return the itemgetter for all of the columns
+    return operator.itemgetter(*indice)
+
+def project_line(projection,
+                 a_split_line,
+                 delimiter):
+    """
+    Given a projection (from get_projection()), a split line (list), and the
+    delimiter to separate line elements, return a line with only the projected
+    columns, separated by the delimiter and ending with a newline character.
+    """
+    # Join the projected columns on the delimiter and add a newline character
+    return f"{delimiter.join(projection(a_split_line))}\n"
 
 def make_header(formatting_dictionary,
                 file_type,
@@ -309,104 +546,235 @@ def make_header(formatting_dictionary,
     Given a formatting dictionary, the desired file type and the desired
     delimiter, return a line containing the header information
     """
-    # Use list comprehension to get the positions of the desired headers
-    positions = [int(key) for key in formatting_dictionary[file_type].keys()]
-    # And sort the list (smallest to largest, default)
-    positions = sorted(positions)
-    # Initialize the newline variable with the zeroth element of positions
-    newline = f"{formatting_dictionary[file_type][str(positions[0])]}"
-    # Delete the zeroeth element of positions, as it is already used
-    del positions[0]
-    # Loop over the remaining keys in positions
-    for position in positions:
-        # and build the newline variable
-        newline = f"{newline}{delimiter}{formatting_dictionary[file_type][str(position)]}"
-    # Add a newline character the variable newline
-    newline = f"{newline}\n"
-    # and return the new line
-    return newline
+    # Use get_sorted_columns() to get the positions of the desired headers
+    positions = get_sorted_columns(formatting_dictionary, file_type)
+    # Get the header for each position
+    headers = [formatting_dictionary[file_type][str(position)] for position in positions]
+    # Join the headers on the delimiter, and add a newline character
+    return f"{delimiter.join(headers)}\n"
+
+def report_progress(file,
+                    peaks_done,
+                    peaks_total,
+                    overlaps_found,
+                    start_time):
+    """
+    Given a peak file, the number of peaks compared so far, the total number
+    of peaks, the number of overlaps found so far, and the time the comparison
+    started, print a summary of the progress (if the verbosity is at least 1).
+    """
+    # If the verbosity is zero
+    if verbosity < 1:
+        # Then do not print anything
+        return None
+    # Get the number of seconds since the comparisons started
+    elapsed = time.time() - start_time
+    # Get the number of peaks per second, avoiding division by zero
+    rate = peaks_done / elapsed if elapsed > 0 else 0
+    # And print the summary
+    print(f"{file}: {peaks_done}/{peaks_total} peaks processed ({rate:.0f} peaks/sec), {overlaps_found} overlaps found", flush = True)
+
+def compare_peak_file(file,
+                      title,
+                      formatting_dictionary,
+                      delimiter,
+                      file_type = "xls",
+                      annot_index = None,
+                      mode = "index"):
+    """
+    Given a peak file, the title associated with the peaks, a formatting dictionary,
+    a delimiter, a file type, an annotation index from load_annotation_index(), and
+    a mode (see get_enrich_annote_lines()), return the comparison list between the
+    peaks in the file and the annotations in the index.
+
+    If no annotation index is given, then the shared annotation index is used. This
+    is how worker processes get the index without it being copied for every file.
+    """
+    # If no annotation index was given
+    if annot_index == None:
+        # Then use the annotation index shared with the worker processes
+        annot_index = shared_annot_index
+    # Use get_projection() to get the columns kept for the peak file
+    projection = get_projection(formatting_dictionary, file_type)
+    # Initialize the file comparisons list
+    file_comparisons = []
+    # Use load_peak_files.load_peak_file() to read the chromosomes, starts and ends of the peaks
+    columns = load_peak_files.load_peak_file(file,
+                                             delimiter = delimiter,
+                                             file_format = load_peak_files.peak_extensions[file_type],
+                                             column_names = ["chromStart", "chromEnd"])
+    # Use the project_line() function to reformat the data lines of the file
+    reformed_lines = [project_line(projection, line.split(delimiter), delimiter) for line in columns["lines"]]
+    # Get the number of peaks in the file
+    peak_total = len(reformed_lines)
+    # If the mode is sweep
+    if mode == "sweep":
+        # Then use sweep_peak_file() to walk the peaks alongside each annotation file
+        peak_overlaps = sweep_peak_file(annot_index, columns)
+    # Otherwise
+    else:
+        # Use index_peak_file() to look up each peak in the annotation files
+        peak_overlaps = index_peak_file(annot_index, columns)
+    # Get the time the comparisons started, for the progress summaries
+    start_time = time.time()
+    # Initialize the time of the last progress summary
+    last_report = start_time
+    # Loop over the peaks as their overlaps are found
+    for peaks_done, (i, overlaps) in enumerate(peak_overlaps, start = 1):
+        # Loop over the overlaps with each annotation file
+        for new_comparisons in overlaps:
+            # If the verbosity is 2 or more
+            if verbosity >= 2:
+                # Then print the overlapping annotations
+                for newline in new_comparisons:
+                    print(newline)
+            # Make these comparisons into strings (lines)
+            new_comparisons = make_compared_lines(new_comparisons,
+                                                  title,
+                                                  reformed_lines[i])
+            # and add those lines to the files_comparisons list
+            file_comparisons += new_comparisons
+        # If it has been long enough since the last progress summary
+        if time.time() - last_report >= progress_interval:
+            # Then report the progress using report_progress()
+            report_progress(file, peaks_done, peak_total, len(file_comparisons), start_time)
+            # and update the time of the last progress summary
+            last_report = time.time()
+    # Report the final progress for the file using report_progress()
+    report_progress(file, peak_total, peak_total, len(file_comparisons), start_time)
+    # Return the file comparisons list
+    return file_comparisons
+
+def make_annotation_pool(annot_index,
+                         workers):
+    """
+    Given an annotation index from load_annotation_index() and the number of
+    workers, return a ProcessPoolExecutor whose worker processes share the
+    annotation index.
+
+    The workers are forked, so they see the shared_annot_index set here without
+    it being pickled (the memory is copy-on-write).
+    """
+    # Use the global shared annotation index
+    global shared_annot_index
+    # Set the shared annotation index before any workers are forked
+    shared_annot_index = annot_index
+    # and return the process pool
+    return ProcessPoolExecutor(max_workers = workers,
+                               mp_context = multiprocessing.get_context("fork"))
+
+def collect_comparisons(comparisons):
+    """
+    Given a comparisons dictionary from get_enrich_annote_lines() whose comparison
+    lists were submitted to a process pool, wait for the pool to finish and return
+    the comparisons dictionary with the finished comparison lists.
+    """
+    # Return the comparisons dictionary with the results of each future
+    return {file : (headers, future.result()) for file, (headers, future) in comparisons.items()}
 
 def get_enrich_annote_lines(filtered_file_dir,
                             annot_dir,
                             formatting_dictionary,
                             title_format_list,
                             delimiter,
-                            file_type = "xls"):
+                            file_type = "xls",
+                            annot_index = None,
+                            mode = "index",
+                            workers = 1,
+                            executor = None):
     """
     Given the directory to filtered data files (xls or narrowPeak from MACS3),
     the directory path to the annotation files, a formatting dictionary which
     has all of the desired values from the files, a delimiter that the files
-    use (tab is the most common I see), and a file type (auto set to xls, as
-    these files include the enrichment value from MACS3), return a dictionary of lists,
-    where each key is a file and each value is a comparison list between
-    the peaks in that file and the annotations from annot_dir.
+    use (tab is the most common I see), a file type (auto set to xls, as
+    these files include the enrichment value from MACS3), (optional) an
+    annotation index from load_annotation_index(), and (optional) a mode,
+    return a dictionary of lists, where each key is a file and each value is
+    a comparison list between the peaks in that file and the annotations
+    from annot_dir.
+
+    If no annotation index is given, then one is made from annot_dir.
+
+    The mode can be:
+
+    'index'
+        Each peak is looked up in the annotation index (check_line_annotes())
+    'sweep'
+        The peaks of each chromosome are walked alongside each annotation
+        file in one pass (sweep_peak_file())
+
+    If workers is more than 1, then the peak files are compared in a process pool.
+    If an executor (from make_annotation_pool()) is given, then the peak files are
+    submitted to it and the comparison lists in the dictionary are futures, which
+    can be finished using collect_comparisons().
     """
+    # Make sure that the mode is one of the available modes
+    assert mode in ["index", "sweep"], f"{mode} is not a valid mode, use 'index' or 'sweep'"
     # Use the get_exper_title() function to extract the titlefrom the folder path
     title = get_exper_title(filtered_file_dir, title_format_list)
     # If no title folder was found
     if title == "No title folder found":
         # Then raise a value error and exit.
         raise ValueError(f"Unable to extract a title from the folderpath.")
+    # If no annotation index was given
+    if annot_index == None:
+        # Then use load_annotation_index() to read the annotation files once
+        annot_index = load_annotation_index(annot_dir,
+                                            delimiter,
+                                            formatting_dictionary)
+    # If more than one worker is requested and there is no executor yet
+    if workers > 1 and executor == None:
+        # Then make a process pool that shares the annotation index
+        with make_annotation_pool(annot_index, workers) as pool:
+            # Submit the peak files to the pool using get_enrich_annote_lines()
+            comparisons = get_enrich_annote_lines(filtered_file_dir,
+                                                  annot_dir,
+                                                  formatting_dictionary,
+                                                  title_format_list,
+                                                  delimiter,
+                                                  file_type = file_type,
+                                                  annot_index = annot_index,
+                                                  mode = mode,
+                                                  executor = pool)
+            # and return the finished comparisons
+            return collect_comparisons(comparisons)
     # If no value error is raised, then make the header for the file type
     header = make_header(formatting_dictionary, file_type, delimiter)
     # Initialize the annotation header string
     annot_header = ""
-    # Initialize the comparison holder list
-    comp_holder = []
+    # If there are annotation files in the index
+    if annot_index != []:
+        # Then use make_header() with the first annotation extension to make the annotation header
+        annot_header = make_header(formatting_dictionary, annot_index[0][1], delimiter)
     # Initialize the comparisons dictionary
     comparisons = {}
     # Loop over the files in the filtered file directory of the specified type
     for file in glob.iglob(f"{filtered_file_dir}/*.{file_type}"):
-        # Tell the user that the program is finding annotated regions that overlap
-        # With the given peak file
-        print(f"Finding annotated regions that overlap with peaks from {file}\n")
-        # Get the peak chromosome, start, and end key using get_bound_keys()
-        peak_chrom_key, peak_start_key, peak_end_key = get_bound_keys(formatting_dictionary, file_type)
-        # Initialize the file comparisons list
-        file_comparisons = []
-        # Open the file and read, call it f
-        with open(file, 'r') as f:
-            # Loop over the (l)ines in the file
-            for l in f:
-                # Strip the line and split on the delimiter
-                splitted = l.strip().split(delimiter)
-                # Use the format_line() function to reformat the line
-                reformed_line = format_line(formatting_dictionary, file_type,
-                                            splitted, delimiter)
-                # Get the chromosome, peak start and peak end information
-                peak_chrom = splitted[peak_chrom_key]
-                peak_start = int(splitted[peak_start_key])
-                peak_end = int(splitted[peak_end_key])
-                # Loop over the annotation files in the annotation directory
-                for annot_file in glob.iglob(f"{annot_dir}/*"):
-                    # Get the annotation file extension
-                    annot_extension = annot_file.split('.')[-1]
-                    # Or if the annotation extension is txt or if region is in the file
-                    # then simply continue, those files are not of interest
-                    if annot_extension == 'txt' or "region" in annot_file:
-                        continue
-                    # If the annotation header has not yet been updated
-                    if annot_header == "":
-                        # Then use make_header() to update the annotation header
-                        annot_header = make_header(formatting_dictionary, annot_extension, delimiter)
-                    # Use the check_line_annotes() function to get a list of comparisons
-                    # for the given annotation file and peak region combination
-                    new_comparisons = check_line_annotes(annot_file,
-                                                         annot_extension,
-                                                         peak_chrom,
-                                                         peak_start,
-                                                         peak_end,
-                                                         delimiter,
-                                                         formatting_dictionary)
-                    # Make these comparisons into strings (lines)
-                    new_comparisons = make_compared_lines(new_comparisons,
-                                                          title,
-                                                          reformed_line)
-                    # and add those lines to the files_comparisons list
-                    file_comparisons += new_comparisons
-            # After looping over every line in the file and every annoatation file, close
-            # the file
-            f.close()
+        # If the verbosity is at least 1
+        if verbosity >= 1:
+            # Tell the user that the program is finding annotated regions that overlap
+            # With the given peak file
+            print(f"Finding annotated regions that overlap with peaks from {file}\n")
+        # If there is no executor
+        if executor == None:
+            # Then use compare_peak_file() to get the comparisons for the file
+            file_comparisons = compare_peak_file(file,
+                                                 title,
+                                                 formatting_dictionary,
+                                                 delimiter,
+                                                 file_type = file_type,
+                                                 annot_index = annot_index,
+                                                 mode = mode)
+        # Otherwise
+        else:
+            # Submit the file to the executor. The workers use the shared annotation index
+            file_comparisons = executor.submit(compare_peak_file,
+                                               file,
+                                               title,
+                                               formatting_dictionary,
+                                               delimiter,
+                                               file_type = file_type,
+                                               mode = mode)
         # Make the headers tuple using annot_header, exp_title, file_comparisons
         headers = (annot_header, "exp_title", header)
         # Update the comparisons dictionary with the headers and the
@@ -428,19 +796,11 @@ def make_empty(formatting_dictionary,
     Given a formatting dictionary, a file type, and a delimiter,
     return a string of '-' characters separated by the delimiter.
     """
-    # Get the number of delimiters required. This is the number of keys in
-    # the formatting dictionary [file_type] subdictionary minus 1
-    delim_num = len(list(formatting_dictionary[file_type].keys())) - 1
-    # Initialize the new line
-    newline = f"-"
-    # Loop over the number of delimiters needed
-    for _ in range(delim_num):
-        # Update the new line with the current line, delim, and -
-        newline = f"{newline}{delimiter}-"
-    # Add a newline character to the end
-    newline = f"{newline}\n"
-    # and return the newline
-    return newline
+    # Get the number of columns required. This is the number of keys in
+    # the formatting dictionary [file_type] subdictionary
+    column_num = len(formatting_dictionary[file_type])
+    # Join one '-' for each column on the delimiter, and add a newline character
+    return f"{delimiter.join(['-'] * column_num)}\n"
 
 def merge_comparison_lists(comparisons_list,
                            extensions_list,
@@ -452,8 +812,11 @@ def merge_comparison_lists(comparisons_list,
     delimiter, return a list of output strings that merge all lists in the
     comparisons list.
 
-    This works by looping over the comparisons list twice, and comparing
-    the sublists in the comparisons list to  the other sublists.
+    This works by making a dictionary for each list in the comparisons list,
+    where the keys are the annotation regions and the values are the first
+    peak information found for that annotation. Each annotation region is
+    then looked up in the other dictionaries, instead of looping over the
+    other lists.
 
     The outstrs list will look like:
     ["annotation_region_information", ["All", "peaks", "associated"],
@@ -465,69 +828,58 @@ def merge_comparison_lists(comparisons_list,
     """
     # Initialize the outstrings list. This list will be returned
     outstrs = []
-    # Initialize the list of regions that we have already seen
-    seen = []
-    # Initailize the counter variable for list 1
-    listcount_1 = 0
+    # Initialize the set of regions that we have already seen
+    seen = set()
+    # Initialize the list of dictionaries, one for each list in the comparisons list
+    first_found = []
+    # Loop over the lists in the comparisons list
+    for a_list in comparisons_list:
+        # Initialize the dictionary for this list
+        found = {}
+        # Loop over the sublists in the list
+        for sublist in a_list:
+            # If the annotation region is not in the dictionary yet
+            if sublist[0] not in found:
+                # Then add the peak information under the annotation region
+                found[sublist[0]] = list(sublist)[1:]
+        # Add the dictionary to the list of dictionaries
+        first_found.append(found)
     # Loop over the lists in the comparisons list. Call it list_1
-    for list_1 in comparisons_list:
+    for listcount_1 in range(len(comparisons_list)):
         # Loop over the sublists in list_1
-        for sublist_1 in list_1:
-            # Initialize the list_1 outstring list
-            l1_outstr = []
-            # If the 0th element of sublist_1 is not in the seen list
-            if sublist_1[0] not in seen:
-                # Then add it (This is the annotation region)
-                seen.append(sublist_1[0])
-                # Add thos region to the l1_outstr list
-                l1_outstr.append(sublist_1[0])
-                # And add the remaining elemtns of the sublist to the l1_outstr list.
-                l1_outstr.append([list(sublist_1)[1:]])
-            # Or if the sublist is in the seen list,
-            elif sublist_1[0] in seen:
+        for sublist_1 in comparisons_list[listcount_1]:
+            # If the 0th element of sublist_1 is in the seen set
+            if sublist_1[0] in seen:
                 # Then just continue
                 continue
-            # Initialize list count 2
-            listcount_2 = 0
-            # Loop over the lists in comparisons_list again, call it list_2
-            for list_2 in comparisons_list:
+            # Otherwise, add it (This is the annotation region)
+            seen.add(sublist_1[0])
+            # Initialize the list_1 outstring list with the region and the
+            # remaining elements of the sublist
+            l1_outstr = [sublist_1[0], [list(sublist_1)[1:]]]
+            # Loop over the lists in comparisons_list again
+            for listcount_2 in range(len(comparisons_list)):
                 # If list_1 and list_2 are the same
-                if list_1 == list_2:
+                if listcount_1 == listcount_2:
                     # Then continue, there's no need to compare them
                     continue
-                #Otherwise
+                # If the annotation region in sublist_1 is in the dictionary for list_2
+                if sublist_1[0] in first_found[listcount_2]:
+                    # Then add the peak information from list_2 to the l1_outstr sublist
+                    l1_outstr[1].append(first_found[listcount_2][sublist_1[0]])
+                # If we didn't find the same annotation in list_2
                 else:
-                    # Initialize the found variable as false
-                    found = False
-                    # And loop over the sublists in list 2
-                    for sublist_2 in list_2:
-                        # If the annotation region in sublist_1 is the same as in sublist 2
-                        if sublist_1[0] == sublist_2[0]:
-                            # Then we found it!
-                            found = True
-                            # Add the peak information from sublist_2 to the l1_outstr sublist
-                            l1_outstr[1].append(list(sublist_2)[1:])
-                            # and break the subloop
-                            break
-                    # After the loop ends, if we didn't find the same annotation in list_2
-                    if found == False:
-                        # Then get the title information from list_2
-                        title = list_2[0][1]
-                        # And create an empty line to add to the outstrings list
-                        newline = make_empty(formatting_dictionary,
-                                             extensions_list[listcount_2],
-                                             delimiter)
-                        # and append this outstring to the l1_outstr sublist
-                        l1_outstr[1].append([title, newline])
-                # At the end of this iteration over lsit_2, increase the listcount_2 by one
-                listcount_2 += 1
+                    # Then get the title information from list_2
+                    title = comparisons_list[listcount_2][0][1]
+                    # And create an empty line to add to the outstrings list
+                    newline = make_empty(formatting_dictionary,
+                                         extensions_list[listcount_2],
+                                         delimiter)
+                    # and append this outstring to the l1_outstr sublist
+                    l1_outstr[1].append([title, newline])
             # At the end of the sublist_1 loop, add all of the l1_outstr elements to the
             # formal outstrs list
             outstrs += l1_outstr
-        # At the end of the list_1 loop, increase the listcount_1 loop by 1
-        listcount_1 += 1
-    # At the very end, delete the seen list
-    del seen
     # and return the outstrs list.
     return outstrs
 
@@ -657,43 +1009,73 @@ def get_all_dictionaries(directory,
                          formatting_dictionary,
                          title_format_list,
                          delimiter,
-                         file_type = 'xls'):
+                         file_type = 'xls',
+                         mode = 'index',
+                         workers = 1):
     """
     Given a test directory, an annotation directory, a formatting dictionary, a list
-    of acceptable title file formats, a delimiter, and a file_type (set to xls),
+    of acceptable title file formats, a delimiter, a file_type (set to xls), a mode
+    (set to index, see get_enrich_annote_lines()), and a number of workers (set to 1),
     return a list of dictionaries, where each dictionary compares the lines from
     a peak file to the annotation files.
+
+    If workers is more than 1, then the peak files from every folder are compared
+    in one process pool.
     """
     # Initialize the dictionary list
     dict_list = []
-    # Loop over the folders in the directory.
-    for folder in glob.iglob(f"{directory}/*"):
-        # Use glob to make alist of the subdirectories in the folder.
-        subdirs = glob.glob(f"{folder}/*")
-        # If there is no subsubfolder named macs3_out, then continue to the next iteration
-        if f"{folder}/macs3_out" not in subdirs:
-            continue
-        # Otherwise
-        else:
-            # Use glob to get a list of folders in the macs3_out folder
-            subsubdirs = glob.glob(f"{folder}/macs3_out/*")
-            # If there is not a folder named "modified_peakfiles" in the macs3_out folder
-            if f"{folder}/macs3_out/modified_peakfiles" not in subsubdirs:
-                # Then continue, although I should probably value error or run the
-                # filtering program here.
+    # Use load_annotation_index() to read the annotation files once for all folders
+    annot_index = load_annotation_index(annot_dir,
+                                        delimiter,
+                                        formatting_dictionary)
+    # If more than one worker is requested
+    if workers > 1:
+        # Then make a process pool that shares the annotation index
+        executor = make_annotation_pool(annot_index, workers)
+    # Otherwise, compare the files in this process
+    else:
+        executor = None
+    # Make sure the pool is shut down, even if a folder cannot be compared
+    try:
+        # Loop over the folders in the directory.
+        for folder in glob.iglob(f"{directory}/*"):
+            # Use glob to make alist of the subdirectories in the folder.
+            subdirs = glob.glob(f"{folder}/*")
+            # If there is no subsubfolder named macs3_out, then continue to the next iteration
+            if f"{folder}/macs3_out" not in subdirs:
                 continue
-            # If there is a modified peaksfile folder
+            # Otherwise
             else:
-                # Then use the get_enrich_annote_lines() function to get a dictionary of
-                # line comparisons for the file in the folder
-                new_dict = get_enrich_annote_lines(f"{folder}/macs3_out/modified_peakfiles",
-                                                   annot_dir,
-                                                   formatting_dictionary,
-                                                   title_format_list,
-                                                   delimiter,
-                                                   file_type = file_type)
-                # And add the dictionary to the dict_list
-                dict_list.append(new_dict)
+                # Use glob to get a list of folders in the macs3_out folder
+                subsubdirs = glob.glob(f"{folder}/macs3_out/*")
+                # If there is not a folder named "modified_peakfiles" in the macs3_out folder
+                if f"{folder}/macs3_out/modified_peakfiles" not in subsubdirs:
+                    # Then continue, although I should probably value error or run the
+                    # filtering program here.
+                    continue
+                # If there is a modified peaksfile folder
+                else:
+                    # Then use the get_enrich_annote_lines() function to get a dictionary of
+                    # line comparisons for the file in the folder
+                    new_dict = get_enrich_annote_lines(f"{folder}/macs3_out/modified_peakfiles",
+                                                       annot_dir,
+                                                       formatting_dictionary,
+                                                       title_format_list,
+                                                       delimiter,
+                                                       file_type = file_type,
+                                                       annot_index = annot_index,
+                                                       mode = mode,
+                                                       executor = executor)
+                    # And add the dictionary to the dict_list
+                    dict_list.append(new_dict)
+        # If a process pool was used
+        if executor != None:
+            # Then wait for the comparisons from every folder to finish
+            dict_list = [collect_comparisons(new_dict) for new_dict in dict_list]
+    finally:
+        # If a process pool was used, then shut it down
+        if executor != None:
+            executor.shutdown()
     # If the dictioanry list is empty at the end
     if dict_list == []:
         # Then raise a value error
@@ -805,55 +1187,81 @@ def get_fields_list(annot_dir):
     # And return the fields list.
     return field_list
 
+def sort_annotated_lines(lines,
+                         delimiter):
+    """
+    Given a list of lines (without the header) and a delimiter, return the
+    lines sorted on the chromosome (column 1) and then numerically on the
+    start (column 2), like sort -k 1,1 -k 2,2n. Lines that tie on both are
+    ordered by the whole line, as sort does.
+    """
+    # Initialize the list of (chromosome, start, line) tuples
+    keyed = []
+    # Loop over the lines
+    for line in lines:
+        # Split the line on the delimiter, only the first two columns are needed
+        split_line = line.split(delimiter, 2)
+        # Add the chromosome, integer start and line to the keyed list
+        keyed.append((split_line[0], int(split_line[1]), line))
+    # Sort the keyed list, and return only the lines
+    return [k[2] for k in sorted(keyed)]
+
 def filter_by_annot(annot_dir,
                     peak_dir,
-                    lines_to_write):
+                    lines_to_write,
+                    delimiter = '\t'):
     """
-    Given the annotation diredctorym the peak file directory name, and the
-    lines to write to the file, create the all_annotes_by_peak file and
-    filter them by annotation (if fields.txt exists)
+    Given the annotation diredctorym the peak file directory name, the
+    lines to write to the file, and the delimiter of the lines, create the
+    all_annotes_by_peak file and filter them by annotation (if fields.txt exists)
 
-
-    NOTE: See the readme file for a discussion of the bash syntax used in these commands
+    The lines are sorted once in memory and then written in a single pass. Each
+    line goes to the all_annotes_by_peak file and to the field file for its
+    annotation type (column 6), so the sorted lines are never reread.
     """
     # Make the peak file directory
     os.mkdir(f"{peak_dir}")
-    # Open and write to a temporary file in that directory
-    with open(f"{peak_dir}/temp.txt", 'w') as f:
-        # Write all of the lines except the header to that file
-        f.writelines(lines_to_write[1:])
-        # and close the file
-        f.close()
     # Assign the 0th element of the lines to write as the header.
     header = lines_to_write[0]
-    # Sort the temporary file on columns 1 and 2 using bash syntax
-    subprocess.call(f"sort -k 1,1 -k 2,2n {peak_dir}/temp.txt > {peak_dir}/temp_sorted.txt", shell=True)
-    # Use echo to write the header to the all_annotes_by_peak file
-    subprocess.call(f'echo "{header}" > {peak_dir}/all_annotes_by_peak.txt', shell = True)
-    # Use cat to concatenate the temp file and the all annotes by peak file
-    subprocess.call(f"cat {peak_dir}/all_annotes_by_peak.txt {peak_dir}/temp_sorted.txt > {peak_dir}/all_annotes_by_peak_sorted.xls", shell = True)
-    # Remove the temporary text file
-    subprocess.call(f"rm {peak_dir}/temp.txt",shell = True)
+    # Sort the remaining lines on columns 1 and 2 using sort_annotated_lines()
+    sorted_lines = sort_annotated_lines(lines_to_write[1:], delimiter)
     # Use the get_fields_list() function to get the fields list
     field_list = get_fields_list(annot_dir)
+    # Initialize the dictionary of open field files
+    field_files = {}
+    # If the fields list is not False, then fields.txt was found
+    if field_list != False:
+        # Loop over the fields in the fields list
+        for field in field_list:
+            # Open the field file, and write the header to it
+            field_files[field] = open(f"{peak_dir}/field_{field}_by_peak_sorted.xls", 'w')
+            field_files[field].write(header)
+    # Open the all_annotes_by_peak file, call it a
+    with open(f"{peak_dir}/all_annotes_by_peak_sorted.xls", 'w') as a:
+        # Write the header to the file
+        a.write(header)
+        # Loop over the sorted lines
+        for line in sorted_lines:
+            # Write the line to the all annotations file
+            a.write(line)
+            # Get the annotation type (column 6) of the line
+            field = line.split(delimiter, 6)[5]
+            # If there is a field file for the annotation type
+            if field in field_files:
+                # Then write the line to that file as well
+                field_files[field].write(line)
+        # Close the file
+        a.close()
+    # Loop over the open field files
+    for field_file in field_files.values():
+        # And close them
+        field_file.close()
     # If the fields list is False
     if field_list == False:
-        # Then fields.txt couldn't be found, so remove the text files and return a nice message
-        subprocess.call(f"rm {peak_dir}/temp_sorted.txt",shell = True)
-        subprocess.call(f"rm {peak_dir}/all_annotes_by_peak.txt",shell = True)
+        # Then fields.txt couldn't be found, so return a nice message
         return f"Filtered peak regions and their annotations are written in {peak_dir}/all_annotes_by_peak_sorted.xls"
-    # Otherwise, loop over the fields in the fields list
+    # Otherwise, tell the user that everything is done
     else:
-        for field in field_list:
-            # Use awk to filter the files based on the field
-            subprocess.call(f"""awk 'BEGIN{{OFS="\t"}}{{if ($6 == "{field}") {{ print }} }}' {peak_dir}/temp_sorted.txt > {peak_dir}/temp_{field}_sorted.txt""", shell = True)
-            # Concatenate the header and the filtered file
-            subprocess.call(f"cat {peak_dir}/all_annotes_by_peak.txt {peak_dir}/temp_{field}_sorted.txt > {peak_dir}/field_{field}_by_peak_sorted.xls", shell = True)
-            # remove the temporary field file
-            subprocess.call(f"rm {peak_dir}/temp_{field}_sorted.txt", shell = True)
-        # Remove the temporary text files and tell the user that everything is done
-        subprocess.call(f"rm {peak_dir}/temp_sorted.txt",shell = True)
-        subprocess.call(f"rm {peak_dir}/all_annotes_by_peak.txt",shell = True)
         return f"Filtered peak regions and their annotations are written in {peak_dir} as .xls files"
 
 #
@@ -869,8 +1277,16 @@ def main():
     Write those annotations to a file, and filter that file based on the fields.txt
     file in the anntoation directory.
     """
+    # Use the global verbosity variable
+    global verbosity
     # Get the system arguments
     args = sys.argv
+    # Get the verbosity (0, 1 or 2) from the optional --verbosity argument
+    verbosity = int(script_options.get_option(args, "--verbosity", "1"))
+    # Get the overlap mode (index or sweep) from the optional --mode argument
+    mode = script_options.get_option(args, "--mode", "index")
+    # Get the number of worker processes from the optional --workers argument
+    workers = int(script_options.get_option(args, "--workers", "1"))
     # If three or four system arguments were given
     if len(args) == 4 or len(args) == 3:
         # Then check the system arguments and assign them accordingly
@@ -880,7 +1296,9 @@ def main():
                                          annot_dir,
                                          filetype_formatting,
                                          title_folder_formats,
-                                         delim)
+                                         delim,
+                                         mode = mode,
+                                         workers = workers)
         # Use merge_comparison_dicts() to create list of lines to write to file
         newlines = merge_comparison_dicts(filetype_formatting,
                                           delim, *dict_list)
@@ -894,19 +1312,22 @@ def main():
                                          filetype_formatting,
                                          title_folder_formats,
                                          delim,
-                                         file_type = f_type)
+                                         file_type = f_type,
+                                         mode = mode,
+                                         workers = workers)
         # Use merge_comparison_dicts() to create list of lines to write to file
         newlines = merge_comparison_dicts(filetype_formatting,
                                           delim,
                                           *dict_list)
 
-    # Run filter_by_annot() to write the file and filter it using bash commands
-    printer = filter_by_annot(annot_dir, f"{exp_dir}/peak_annotations", newlines)
+    # Run filter_by_annot() to write the file and filter it by annotation type
+    printer = filter_by_annot(annot_dir, f"{exp_dir}/peak_annotations", newlines, delimiter = delim)
     # Print the resulting statement
     print(printer)
 
 # Run the main function when the file is called.
-main()
+if __name__ == "__main__":
+    main()
 
 #
 #
@@ -0,0 +1,151 @@
+"""
+Tests for split_gff_file() in annotation_editing/make_annotation_files.py. The bed files are compared
+to what the old steps made: gff2bed (bed coordinates, the ID or '.', sorted), the awk that kept
+columns 1, 2, 3, 4, 0, 6 and 8 for each annotation type, and edit_annotation_file.py, which cleaned
+the IDs with the checker for the file name.
+"""
+
+import os
+import gzip
+import random
+
+import annotation_ids
+
+
+def make_gff_text(seed, n = 400):
+    """
+    Given a seed and a number of lines, return the text of a GFF file with comments, lines
+    with and without IDs, and a ##FASTA section at the end.
+    """
+    random.seed(seed)
+    lines = ["##gff-version 3\n", "#!processor NCBI annotwriter\n"]
+    for i in range(n):
+        annotation_type = random.choice(["gene", "mRNA", "exon", "CDS", "region", "ncRNA", "pseudogene"])
+        start = random.randint(1, 20000)
+        # Most lines have an ID, somewhere in the attributes
+        attributes = random.choice([f"ID={annotation_type.lower()}-Dmel_CG{i};Name=CG{i}",
+                                    f"Parent=gene-{i};ID={annotation_type.lower()}-NM_{i}.1",
+                                    f"ID=id-NC_{i}.4;gbkey=Src",
+                                    f"ID=rna-|FlyBase|FBtr{i}-RA",
+                                    f"Name=CG{i};gbkey={annotation_type}"])
+        lines.append(f"{random.choice(['NT_033779.5', 'NT_033778.4', 'NC_004354.4'])}\tRefSeq\t{annotation_type}\t"
+                     f"{start}\t{start + random.randint(0, 5000)}\t.\t{random.choice('+-.')}\t.\t{attributes}\n")
+        if random.random() < 0.02:
+            lines.append("# a comment in the middle\n")
+    lines.append("##FASTA\n>NT_033779.5\nACGTACGT\n")
+    return "".join(lines)
+
+
+def old_bed_files(gff_text):
+    """
+    Given the text of a GFF file, return a dictionary with key = annotation type,
+    value = the lines of the bed file the old steps made for that type.
+    """
+    bed_lines = {}
+    for line in gff_text.split("##FASTA")[0].split("\n"):
+        if line == "" or line.startswith("#"):
+            continue
+        line = line.split("\t")
+        # gff2bed uses the ID attribute, or '.' if there is none
+        ids = [attribute.strip()[3:] for attribute in line[8].split(";") if attribute.strip().startswith("ID=")]
+        identifier = ids[0] if ids != [] else "."
+        # edit_annotation_file.py cleaned the IDs with the checker for the file name
+        checker = annotation_ids.get_type_checker(f"annotation_{line[2]}.bed")
+        if checker != None:
+            identifier = checker(identifier)
+        bed_lines.setdefault(line[2], []).append(f"{line[0]}\t{int(line[3]) - 1}\t{line[4]}\t{identifier}\t0\t{line[6]}\t{line[2]}\n")
+    # gff2bed sorted the lines by chromosome, start, end and the rest of the line
+    for annotation_type, lines in bed_lines.items():
+        lines.sort(key = lambda line: (line.split("\t")[0], int(line.split("\t")[1]),
+                                       int(line.split("\t")[2]), line.split("\t", 3)[3]))
+    return bed_lines
+
+
+def read_folder(annot_dir):
+    """
+    Given the folder of bed files, return a dictionary with key = annotation type,
+    value = the lines of its bed file, and the lines of fields.txt.
+    """
+    with open(f"{annot_dir}/fields.txt", 'r') as f:
+        fields = f.read().split()
+        f.close()
+    bed_lines = {}
+    for annotation_type in fields:
+        with open(f"{annot_dir}/annotation_{annotation_type}.bed", 'r') as f:
+            bed_lines[annotation_type] = f.readlines()
+            f.close()
+    return bed_lines, fields
+
+
+def test_split_gff_file_matches_old_steps(tmp_path, load_script):
+    make_annotation_files = load_script("annotation_editing/make_annotation_files.py")
+    gff_text = make_gff_text(1)
+    gff_file = str(tmp_path / "genomic.gff")
+    with open(gff_file, 'w') as f:
+        f.write(gff_text)
+        f.close()
+    annot_dir = str(tmp_path / "annotation_types")
+    counts = make_annotation_files.split_gff_file(gff_file, annot_dir)
+    expected = old_bed_files(gff_text)
+    bed_lines, fields = read_folder(annot_dir)
+    assert bed_lines == expected
+    # fields.txt has the types in the order they first appear in the GFF file
+    assert fields == list(expected)
+    assert counts == {annotation_type : len(lines) for annotation_type, lines in expected.items()}
+    # Lines without an ID get a period
+    assert any(line.split("\t")[3] == "." for lines in bed_lines.values() for line in lines)
+    # No temporary files are left from sorting
+    assert sorted(os.listdir(annot_dir)) == sorted(["fields.txt"] + [f"annotation_{t}.bed" for t in fields])
+
+
+def test_gzipped_gff_file_matches_unzipped(tmp_path, load_script):
+    make_annotation_files = load_script("annotation_editing/make_annotation_files.py")
+    gff_text = make_gff_text(2)
+    with open(str(tmp_path / "genomic.gff"), 'w') as f:
+        f.write(gff_text)
+        f.close()
+    with gzip.open(str(tmp_path / "genomic.gff.gz"), 'wt') as f:
+        f.write(gff_text)
+        f.close()
+    make_annotation_files.split_gff_file(str(tmp_path / "genomic.gff"), str(tmp_path / "plain"))
+    make_annotation_files.split_gff_file(str(tmp_path / "genomic.gff.gz"), str(tmp_path / "gzipped"))
+    assert read_folder(str(tmp_path / "gzipped")) == read_folder(str(tmp_path / "plain"))
+
+
+def test_ids_are_not_cleaned_when_asked(tmp_path, load_script):
+    make_annotation_files = load_script("annotation_editing/make_annotation_files.py")
+    gff_file = str(tmp_path / "genomic.gff")
+    with open(gff_file, 'w') as f:
+        f.write("##gff-version 3\nNT_1\tRefSeq\tgene\t11\t20\t.\t+\t.\tID=gene-Dmel_CG1;Name=CG1\n")
+        f.close()
+    make_annotation_files.split_gff_file(gff_file, str(tmp_path / "raw"), clean_ids = False)
+    make_annotation_files.split_gff_file(gff_file, str(tmp_path / "clean"))
+    assert read_folder(str(tmp_path / "raw"))[0] == {"gene" : ["NT_1\t10\t20\tgene-Dmel_CG1\t0\t+\tgene\n"]}
+    assert read_folder(str(tmp_path / "clean"))[0] == {"gene" : ["NT_1\t10\t20\tCG1\t0\t+\tgene\n"]}
+
+
+def test_hand_written_gff_lines(tmp_path, load_script):
+    make_annotation_files = load_script("annotation_editing/make_annotation_files.py")
+    gff_file = str(tmp_path / "genomic.gff")
+    # Windows line endings, the ID after other attributes, a comment and a blank line between
+    # annotations, a line without all nine columns, and a ##FASTA section
+    with open(gff_file, 'w', newline = "") as f:
+        f.write("##gff-version 3\r\n"
+                "NT_1\tRefSeq\tgene\t11\t20\t.\t+\t.\tName=CG1;ID=gene-1\r\n"
+                "# a comment\r\n"
+                "\r\n"
+                "NT_1\tRefSeq\tgene\t5\t30\t.\t-\t.\tParent=region-1;gbkey=Gene;ID=gene-2\r\n"
+                "NT_1\tRefSeq\texon\t12\t15\t.\t+\r\n"
+                "NT_2\tRefSeq\texon\t1\t1\t.\t.\t.\tgbkey=exon\r\n"
+                "##FASTA\r\n"
+                ">NT_1\r\n"
+                "ACGT\r\n")
+        f.close()
+    counts = make_annotation_files.split_gff_file(gff_file, str(tmp_path / "raw"), clean_ids = False)
+    assert counts == {"gene" : 2, "exon" : 1}
+    bed_lines, fields = read_folder(str(tmp_path / "raw"))
+    assert fields == ["gene", "exon"]
+    # The lines are sorted, the \r characters are gone, and lines without an ID get a period
+    assert bed_lines == {"gene" : ["NT_1\t4\t30\tgene-2\t0\t-\tgene\n",
+                                   "NT_1\t10\t20\tgene-1\t0\t+\tgene\n"],
+                         "exon" : ["NT_2\t0\t1\t.\t0\t.\texon\n"]}
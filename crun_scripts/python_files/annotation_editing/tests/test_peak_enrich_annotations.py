@@ -0,0 +1,105 @@
+"""
+Tests for the overlaps of annotation_editing/peak_enrich_annotations.py. The sweep mode walks the peaks
+of each chromosome alongside the annotations, and should give the same comparison lines as looking up
+every peak in the index mode, in the order of the peak file on each chromosome.
+"""
+
+import random
+
+import pytest
+
+
+def write_lines(path, lines):
+    """
+    Given a path and a list of lines, write the lines to the path.
+    """
+    with open(path, 'w') as f:
+        f.writelines(lines)
+        f.close()
+
+
+@pytest.fixture
+def peak_enrich(tmp_path, load_script):
+    """
+    Return peak_enrich_annotations.py as a module, and an annotation index made from two
+    annotation files with nested annotations, one long annotation, and a chromosome with
+    no peaks.
+    """
+    peak_enrich_annotations = load_script("annotation_editing/peak_enrich_annotations.py")
+    peak_enrich_annotations.verbosity = 0
+    annot_dir = tmp_path / "annot"
+    annot_dir.mkdir()
+    random.seed(3)
+    for annotation_type in ["gene", "exon"]:
+        lines = [f"chr2L\t0\t60000\t{annotation_type.upper()}_long\t0\t+\t{annotation_type}\n",
+                 f"chr2L\t5000\t9000\t{annotation_type.upper()}_outer\t0\t-\t{annotation_type}\n",
+                 f"chr2L\t6000\t6500\t{annotation_type.upper()}_inner\t0\t-\t{annotation_type}\n",
+                 f"chrM\t1\t50\t{annotation_type.upper()}_mito\t0\t+\t{annotation_type}\n"]
+        for i in range(150):
+            start = random.randint(0, 50000)
+            lines.append(f"{random.choice(['chr2L', 'chrX'])}\t{start}\t{start + random.randint(1, 3000)}\t"
+                         f"{annotation_type.upper()}{i}\t0\t{random.choice('+-')}\t{annotation_type}\n")
+        write_lines(str(annot_dir / f"annotation_{annotation_type}.bed"), lines)
+    write_lines(str(annot_dir / "fields.txt"), ["gene\n", "exon\n"])
+    annot_index = peak_enrich_annotations.load_annotation_index(str(annot_dir),
+                                                                '\t',
+                                                                peak_enrich_annotations.filetype_formatting)
+    return peak_enrich_annotations, annot_index
+
+
+def make_peak_lines(seed, n = 120):
+    """
+    Given a seed and a number of peaks, return the lines of a peak xls file sorted by
+    chromosome and start, with a peak inside of another peak.
+    """
+    random.seed(seed)
+    peaks = [("chr2L", 6100, 6200), ("chr2L", 6000, 8000), ("chrY", 10, 20)]
+    for i in range(n):
+        start = random.randint(0, 52000)
+        peaks.append((random.choice(["chr2L", "chrX"]), start, start + random.randint(50, 6000)))
+    return [f"{chrom}\t{start}\t{end}\t{end - start}\t{start + 20}\t5.0\t6.0\t2.0\t3.0\tpeak_{j}\n"
+            for j, (chrom, start, end) in enumerate(sorted(peaks))]
+
+
+def compare(peak_enrich_annotations, annot_index, file, mode):
+    """
+    Given the module, an annotation index, a peak file and a mode, return the comparison list.
+    """
+    return peak_enrich_annotations.compare_peak_file(file,
+                                                     "tf_exp_1",
+                                                     peak_enrich_annotations.filetype_formatting,
+                                                     '\t',
+                                                     annot_index = annot_index,
+                                                     mode = mode)
+
+
+def test_sweep_matches_index_for_sorted_peaks(tmp_path, peak_enrich):
+    peak_enrich_annotations, annot_index = peak_enrich
+    file = str(tmp_path / "peaks.xls")
+    write_lines(file, ["# made by MACS3\n", "\n"] + make_peak_lines(1))
+    index_comparisons = compare(peak_enrich_annotations, annot_index, file, "index")
+    assert compare(peak_enrich_annotations, annot_index, file, "sweep") == index_comparisons
+    # The inner annotation overlaps both of the nested peaks
+    inner = [line[2].split("\t")[1:3] for line in index_comparisons if "GENE_inner" in line[0]]
+    assert ["6000", "8000"] in inner and ["6100", "6200"] in inner
+    # The long annotation overlaps every peak on chr2L, and chrY has no annotations
+    chr2l_peaks = [line for line in make_peak_lines(1) if line.startswith("chr2L")]
+    assert len([line for line in index_comparisons if "GENE_long" in line[0]]) == len(chr2l_peaks)
+    assert not any(line[2].startswith("chrY") for line in index_comparisons)
+
+
+def test_sweep_keeps_the_file_order_of_unsorted_peaks(tmp_path, peak_enrich):
+    peak_enrich_annotations, annot_index = peak_enrich
+    lines = make_peak_lines(2)
+    random.seed(4)
+    random.shuffle(lines)
+    file = str(tmp_path / "peaks.xls")
+    write_lines(file, lines)
+    sweep_comparisons = compare(peak_enrich_annotations, annot_index, file, "sweep")
+    index_comparisons = compare(peak_enrich_annotations, annot_index, file, "index")
+    # The chromosomes are swept one at a time, but the overlaps on each chromosome are in the
+    # order of the file, so the first peak found for each annotation is the same
+    for chrom in ["chr2L", "chrX"]:
+        assert ([line for line in sweep_comparisons if line[2].startswith(f"{chrom}\t")] ==
+                [line for line in index_comparisons if line[2].startswith(f"{chrom}\t")])
+    assert sorted(sweep_comparisons) == sorted(index_comparisons)
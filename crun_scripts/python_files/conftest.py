@@ -0,0 +1,62 @@
+"""
+==============================================================================================================
+Python 3.8.5
+
+conftest.py
+==============================================================================================================
+
+Shared setup for the tests of the python files. The tests of each folder are in its tests folder
+(like shared_tools/tests). The shared_tools folder is added to the path, so the tests can import the
+shared modules like the other python files do, and the load_script fixture imports one of the command
+line python files. The files only call main() when they are run, so importing them does not run them.
+
+"""
+
+##############################################################################################################
+#
+#         Importables
+
+import os          # Used for finding the python_files folder
+import sys         # Used for adding the shared_tools folder to the path
+import importlib.util   # Used for importing a python file from its path
+import pytest      # Used for making the load_script fixture
+
+#
+#
+##############################################################################################################
+#
+#         Pre-defined variables
+
+# The python_files folder, which holds the shared_tools folder and the command line python files
+python_files = os.path.dirname(os.path.abspath(__file__))
+
+# Add the shared_tools folder to the path, like the other python files do
+sys.path.append(os.path.join(python_files, "shared_tools"))
+
+#
+#
+##############################################################################################################
+#
+#         Fixtures
+
+@pytest.fixture
+def load_script():
+    """
+    Return a function that takes the path of a python file (relative to the python_files
+    folder) and returns the file imported as a module.
+    """
+    def load(path):
+        # Get the full path to the python file
+        path = os.path.join(python_files, path)
+        # Import the python file as a module named after the file
+        spec = importlib.util.spec_from_file_location(os.path.basename(path)[:-3], path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        # and return the module
+        return module
+    # Return the loading function
+    return load
+
+#
+#
+##############################################################################################################
@@ -22,6 +22,14 @@ import sys       # Used for obtaining system inputs (sys.argv) as a list.
 import os        # Used for operating system (os) level maniputlations (moving files, stuff like that)
 import glob      # Used to iterate through files in directory (as list, glob, or generator, iglob)
 import math      # Math has the logarithm function
+import time      # Used for timing the filtering of each folder
+from concurrent.futures import ProcessPoolExecutor, as_completed   # Used to filter folders in parallel
+import numpy as np   # Used for selecting the lines that pass the cutoff
+
+# The shared_tools folder holds the peak file loader used by several python files
+sys.path.append(f"{os.path.dirname(os.path.abspath(__file__))}/../shared_tools")
+import load_peak_files
+import script_options
 
 #
 #
@@ -33,7 +41,7 @@ import math      # Math has the logarithm function
 # and an xls file to describe the data. The default in this program is to work on the xls
 # files, since they have a fold enrichment data column (and that's useful)
 #
-# If you want to add an extension type, add it here. Then go to the function filter_all_lines()
+# If you want to add an extension type, add it here. Then go to the function filter_all_thresholds()
 # and add the appropriate filtering parameters.
 allowed_extensions = ["narrowPeak", "xls"]
 
@@ -43,252 +51,267 @@ allowed_extensions = ["narrowPeak", "xls"]
 #
 #           Functions
 
-def filter_line(line,
-                value_column,
-                delimiter,
-                qvalue = 0.01,
-                pvalue = None):
+def get_log_cutoff(qvalue = 0.01,
+                   pvalue = None):
     """
-    Given a line (from a file), the value_column integer (NOT CS counting) where the data of
-    interest is held, the delimiter to split the line on, (optional) a q-value-default is 0.01-,
-    (optional) a p value-default is None-, return:
-
-    None:
-        -If the line begins with a # character (line is a comment, not data)
-        -If the line is a newline character (\n, line is not data)
-        -If the line is a header line, not containing data
-        -If the value of the line (as a float) is less than the log transformed p/q value
-
-    (variable) newline
-        -If the value of the line (as a float) is greater than the log transformed p/q value
-         This will be reformatted back to what it was originally.
+    Given (optional) a q-value-default is 0.01- and (optional) a p value-default is None-,
+    return the negative log (base 10) of the p value if it is given, or of the q value
+    otherwise. This is the cutoff that the -log base 10 values in the files are compared to.
     """
-    # If the line is a comment or just a newline character
-    if line[0] == "#" or line == "\n":
-        # Return None, this is not a data line
-        return None
-    # If nothing is returned, then split the line on the delimiter
-    line = line.split(delimiter)
-    # Assuming the column is in Math counting, turn it into computer counting.
-    col = int(value_column - 1)
-    # If you see the strings "pvalue" or "qvalue", this line is a header
-    if "pvalue" in line[col] or "qvalue" in line[col]:
-        # Return None, this is not a data line
-        return None
-    # If the variable pvalue is set to something other than 1,
-    if pvalue != None:
-        # Try to float the p value. Just to check if it is a floating point number
-        try:
-            float(pvalue)
-        # If this fails, raise a value error and stop the program
-        except:
-            raise ValueError(f"{pvalue} is not a floating point number")
-        # Otherwise, take the negative log of the p value (default is base 10)
-        else:
-            log_trans = -math.log(pvalue, 10)
-    # If pvalue == None, then log transform the q value
-    else:
-        # Try to float the q value. Just to check if it is a floating point number
+    # If the variable pvalue is set to something other than None, use it. Otherwise use qvalue
+    value = pvalue if pvalue != None else qvalue
+    # Try to float the value. Just to check if it is a floating point number
+    try:
+        value = float(value)
+    # If this fails, raise a value error and stop the program
+    except:
+        raise ValueError(f"{value} is not a floating point number")
+    # Otherwise, take the negative log of the value (default is base 10)
+    return -math.log(value, 10)
+
+def get_threshold_name(kind,
+                       value):
+    """
+    Given the kind of threshold (q or p) and the value of the threshold, return the
+    name used for the files filtered on that threshold, e.g. ("q", 0.01) -> "q_0_01"
+    """
+    # Replace the period in the value with an underscore, so the name has only one period
+    return f"{kind}_{str(value).replace('.', '_')}"
+
+def get_threshold_list(values,
+                       kind):
+    """
+    Given a comma separated string of values (like "0.01,0.05") and the kind of
+    threshold (q or p), return a list of (kind, value) tuples. Raise a ValueError
+    if any of the values is not a floating point number.
+    """
+    # Initialize the list of thresholds
+    thresholds = []
+    # Loop over the values in the string, split on the commas
+    for value in values.split(','):
+        # If the value is empty (like "0.01," or ""), skip it
+        if value == "":
+            continue
+        # Try to float the value
         try:
-            float(qvalue)
-        # IF this fails, raise a value error and stop the program
+            value = float(value)
+        # If this fails, raise a value error and exit
         except:
-            raise ValueError(f"{qvalue} is not a floating point number")
-        # Otherwise, take the negative log of the q value (default is base 10)
-        else:
-            log_trans = -math.log(qvalue, 10)
-    # If the corrsponding data value is greater than the log transformed cutoff
-    if float(line[col]) >= log_trans:
-        # Then take the line! Initialize newline variable
-        newline = f"{line[0]}"
-        # Remove the element used for initialization
-        del line[0]
-        # Loop over the remaining elements of the line list
-        for column in line:
-            # Update the newline using string formatting and the given dfelimiter
-            newline = f"{newline}{delimiter}{column}"
-        return newline
-    # If the corresponding data value is less than the log transformed cutoff,
-    else:
-        # Then return None, this line is below the specified cutoff
-        return None
-
-
-def filter_all_lines(file,
-                     delimiter,
-                     qvalue = 0.01,
-                     pvalue = None,
-                     ext = "narrowPeak"):
+            raise ValueError(f"{value} ({kind}value) should be a floating point number.")
+        # Add the threshold to the list
+        thresholds.append((kind, value))
+    # Return the list of thresholds
+    return thresholds
+
+def filter_all_thresholds(file,
+                          delimiter,
+                          outfiles,
+                          ext = "narrowPeak"):
     """
-    Given a file, the delimiter for the lines in the file, (optional) q value-default is 0.01-,
-    (optional) p value-default is None-, (optional) extension-default is narrowPeak-,
-
-    return:
-        -list of lines that are the result of filtering by q/p value
-
-
-    NOTE: If you add a file type to this program, please add an elif statement to this function.
-    Please make sure that pvlaue or qvalue are valid columns in your file as well :)
-
+    Given a file, the delimiter for the lines in the file, a list of (kind, value, outfile)
+    tuples (kind is q or p), and (optional) extension-default is narrowPeak-, write the lines
+    that pass each threshold to the outfile of that threshold, and return a dictionary with
+    the number of data lines read (rows_in) and the number of lines written to each outfile.
+
+    The file is read once using load_peak_files.iter_peak_chunks(), and every threshold is
+    compared to the p (or q) value column of each chunk, so a sweep over N thresholds
+    costs one pass over the file instead of N. Only one chunk of the file is in memory
+    at a time, and lines that pass are written unchanged. Comments, headers and blank
+    lines are never written.
+
+    NOTE: If you add a file type to this program, please add it to peak_file_layouts in
+    shared_tools/load_peak_files.py, with pValue and qValue columns.
     """
-    # Open and read the file, call it f
-    with open(file, 'r') as f:
-        # Start to check the extension and the values.
-        #
-        # If the extension is narrowPeak and the pvalue is None
-        if ext == "narrowPeak" and pvalue == None:
-            # Then use the filter_line() function inside of a list comprehension
-            # to get the list of new lines.
-            # For info about the narrowPeak file format, go to the USCS GenomeBrowser site
-            newlines = [filter_line(line,
-                                    9,
-                                    delimiter,
-                                    qvalue = qvalue,
-                                    pvalue = pvalue) for line in f if line != "\n"]
-            # Once the newlines are found, filter out the lines that have information
-            # (i.e., those lines that are not None)
-            newlines = [l for l in newlines if l != None]
-        # Or if the extension is narrowPeak but the pvalue has been changed
-        elif ext == "narrowPeak" and pvalue != None:
-            # Then use the filter_line() function inside of a list comprehension
-            # to get the list of new lines.
-            # For info about the narrowPeak file format, go to the USCS GenomeBrowser site
-            newlines = [filter_line(line,
-                                    8,
-                                    delimiter,
-                                    qvalue = qvalue,
-                                    pvalue = pvalue) for line in f if line != "\n"]
-            # Once the newlines are found, filter out the lines that have information
-            # (i.e., those lines that are not None)
-            newlines = [l for l in newlines if l != None]
-        # Or if the file type is xls and the pvalue has not been changed
-        elif ext == "xls" and pvalue == None:
-            # Then use the filter_line() function inside of a list comprehension
-            # to get the list of new lines.
-            # For info about the narrowPeak file format, go to the USCS GenomeBrowser site
-            newlines = [filter_line(line,
-                                    9,
-                                    delimiter,
-                                    qvalue = qvalue,
-                                    pvalue = pvalue) for line in f if line[0] != "#" or line != "\n"]
-            # Once the newlines are found, filter out the lines that have information
-            # (i.e., those lines that are not None)
-            newlines = [l for l in newlines if l != None]
-            # Depricated: An old version of this file didn't filter the header of xls files. This one does
-            #newlines = newlines[1:]
-        # Or if the file type is xls and the pvalue has been changed
-        elif ext == "xls" and pvalue != None:
-            newlines = [filter_line(line,
-                                    7,
-                                    qvalue = qvalue,
-                                    pvalue = pvalue) for line in f if line[0] != "#" or line != "\n"]
-            # Once the newlines are found, filter out the lines that have information
-            # (i.e., those lines that are not None)
-            newlines = [l for l in newlines if l != None]
-            # Depricated: An old version of this file didn't filter the header of xls files. This one does
-            #newlines = newlines[1:]
-        # If none of these work, then raise a value error
-        else:
-            raise ValueError(f"{ext} and {pvalue} together are invalid.")
-        # After getting all of the lines, close the file
-        f.close()
-    # and return the list of new lines.
-    return newlines
+    # If the extension is not one of the allowed extensions
+    if ext not in allowed_extensions:
+        # Then raise a value error
+        raise ValueError(f"{ext} is not one of the allowed extensions ({', '.join(allowed_extensions)})")
+    # Get the column and the -log base 10 cutoff for each of the thresholds, using get_log_cutoff()
+    cutoffs = [("pValue", get_log_cutoff(pvalue = value)) if kind == "p" else ("qValue", get_log_cutoff(qvalue = value))
+               for kind, value, outfile in outfiles]
+    # Initialize the counts dictionary, with the number of lines read and written to each file
+    counts = {"rows_in" : 0}
+    counts.update({outfile : 0 for kind, value, outfile in outfiles})
+    # Open all of the output files
+    handles = [open(outfile, 'w') for kind, value, outfile in outfiles]
+    # Make sure the output files get closed, even if the file cannot be read
+    try:
+        # Loop over the chunks of the file using iter_peak_chunks()
+        for columns in load_peak_files.iter_peak_chunks(file,
+                                                        delimiter = delimiter,
+                                                        file_format = load_peak_files.peak_extensions[ext],
+                                                        column_names = [column for column, log_trans in cutoffs]):
+            # Update the number of lines read
+            counts["rows_in"] += len(columns["lines"])
+            # Loop over the thresholds and their output files
+            for (value_column, log_trans), handle, (kind, value, outfile) in zip(cutoffs, handles, outfiles):
+                # Get the positions of the lines whose value is greater than the log transformed cutoff
+                passed = np.flatnonzero(columns[value_column] >= log_trans)
+                # and write those lines, with their newline characters
+                handle.writelines([f"{columns['lines'][i]}\n" for i in passed])
+                # Update the number of lines written to this file
+                counts[outfile] += len(passed)
+    finally:
+        # Close all of the output files
+        for handle in handles:
+            handle.close()
+    # Return the counts dictionary
+    return counts
 
 def filter_macs3_outputs(macs3_dir,
                          desired_extensions,
                          delimiter,
                          qvalue = 0.01,
-                         pvalue = None):
+                         pvalue = None,
+                         thresholds = None):
     """
     Given a directory path to a macs3_out folder, the extensions for files you wish to filter,
-    a delimiter that ALL files are split on, and the optional q/pvalues shown in all other functions,
-    filter the files with the desired extensions and write them to a new folder. Move all other files
-    to a folder named "unmodified_outfiles"
+    a delimiter that ALL files are split on, the optional q/pvalues shown in all other functions,
+    and (optional) a list of extra (kind, value) thresholds (kind is q or p), move all of the
+    files to a folder named "unmodified_outfiles" and write the files with the desired extensions,
+    filtered on the q/pvalue, to a folder named "modified_peakfiles".
+
+    Files filtered on the extra thresholds are written to a folder named "threshold_sweep", as
+    q_0_05_filtered_peaks.xls and so on. They are kept out of modified_peakfiles because the
+    other programs use every peak file in that folder. Each file is only read once.
+
+    This can be run more than once on the same folder: the folders are only made if they do
+    not exist, the files already in unmodified_outfiles are filtered again, and the filtered
+    files from an earlier run (which may have used other thresholds) are removed first.
     """
-    # Use the operating system module to make the unmodified and modified directories
-    os.mkdir(f"{macs3_dir}/unmodified_outfiles")
-    os.mkdir(f"{macs3_dir}/modified_peakfiles")
+    # If the q value was filtered on, then write the new file as q_filtered
+    if qvalue != None and pvalue == None:
+        primary = ("q", qvalue, f"{get_threshold_name('q', qvalue)}_filtered_peaks")
+    # If the p value was filtered on, then write the new file as p_filtered
+    elif qvalue == None and pvalue != None:
+        primary = ("p", pvalue, "p_filtered_peaks")
+    # If both or neither were given, then we do not know what to filter on
+    else:
+        raise ValueError(f"Either a q value or a p value should be given (q = {qvalue}, p = {pvalue})")
+    # If no extra thresholds were given, then there are none
+    if thresholds == None:
+        thresholds = []
+    # Use the operating system module to make the unmodified and modified directories,
+    # if they do not already exist
+    os.makedirs(f"{macs3_dir}/unmodified_outfiles", exist_ok = True)
+    os.makedirs(f"{macs3_dir}/modified_peakfiles", exist_ok = True)
+    # If there are extra thresholds, then make the directory for their files
+    if thresholds != []:
+        os.makedirs(f"{macs3_dir}/threshold_sweep", exist_ok = True)
+    # Remove the filtered files from an earlier run, so peaks filtered on an old threshold
+    # are not used along with the new ones (the other programs use every file in modified_peakfiles)
+    for folder in ["modified_peakfiles", "threshold_sweep"]:
+        for old_file in glob.glob(f"{macs3_dir}/{folder}/*_filtered_peaks.*"):
+            os.remove(old_file)
     # Use iglob (generator, not a list) to loop over the files in the directory
     for file in glob.iglob(f"{macs3_dir}/*"):
-        # If the "file" found is one of the output folders,
-        if f"{file}" == f"{macs3_dir}/unmodified_outfiles" or f"{file}" == f"{macs3_dir}/modified_peakfiles":
+        # If the "file" found is a folder (like the output folders),
+        if os.path.isdir(file):
             # Then continue to the next iteration of the loop
             continue
-        # If the file is not one of the output folders, then split the file string on the period
-        # character and take the last element of the list as the extension
+        # Otherwise, move the file to the unmodified directory using os.rename()
+        os.rename(f"{file}", f"{macs3_dir}/unmodified_outfiles/{os.path.basename(file)}")
+    # Loop over the files in the unmodified directory. This includes the files moved
+    # by an earlier run on this folder
+    for file in sorted(glob.glob(f"{macs3_dir}/unmodified_outfiles/*")):
+        # Split the file string on the period character and take the last element as the extension
         file_extension = file.split(".")[-1]
-        # Get the file name by first splitting the file string on the period, taking the 0th element,
-        # then splitting that string on the '/' character, and taking the last element. Effectively,
-        # "path/to/file.narrowPeak" -> ["path/to/file", "narrowPeak"] -> "path/to/file"
-        # -> ["path", "to", "file"] -> "file"
-        # but in one line
-        file_name = file.split('.')[0].split('/')[-1]
-        # If the file extension gathered above is in the list of ones to filter
-        if file_extension in desired_extensions:
-            # Then use the filter_all_lines() function to get the new lines
-            new_lines = filter_all_lines(file,
-                                         delimiter,
-                                         qvalue = qvalue,
-                                         pvalue = pvalue,
-                                         ext = file_extension)
-            # If the q value was filtered on, then write the new file as q_filtered
-            if qvalue != None and pvalue == None:
-                # Get the q value string by turning qvalue into a string, splitting on . and
-                # using string formatting to concatenate them
-                q = f"{str(qvalue).split('.')[0]}_{str(qvalue).split('.')[1]}"
-                # Open a file in the output directory, writing, as f
-                with open(f"{macs3_dir}/modified_peakfiles/q_{q}_filtered_peaks.{file_extension}", 'w') as f:
-                    # Use the writelines method to write all lines to the file
-                    f.writelines(new_lines)
-                    # Close the file
-                    f.close()
-            # If the p value was filtered on, then write the new file as p_filtered
-            elif qvalue == None and pvalue != None:
-                # Get the p value string by turning pvalue into a string, splitting on . and
-                # using string formatting to concatenate them
-                p = f"{str(pvalue).split('.')[0]}_{str(pvalue).split('.')[1]}"
-                # Open a file in the output directory, writing, as f
-                with open(f"{macs3_dir}/modified_peakfiles/p_filtered_peaks.{file_extension}", 'w') as f:
-                    # Use the writelines method to write all lines to the file
-                    f.writelines(new_lines)
-                    # Close the file
-                    f.close()
-            # Once the new file is written, move the unmodified file using os.rename()
-            os.rename(f"{file}", f"{macs3_dir}/unmodified_outfiles/{file_name}.{file_extension}")
-        # If the file extension is not in the desired_extension list
-        else:
-            # Then simply move the file to the unmodified directory, it is not of interest to us
-            os.rename(f"{file}", f"{macs3_dir}/unmodified_outfiles/{file_name}.{file_extension}")
+        # If the file extension is not in the desired_extension list, then it is not of interest to us
+        if file_extension not in desired_extensions:
+            continue
+        # The filtered file for the q/pvalue is in the modified directory
+        outfiles = [(primary[0], primary[1], f"{macs3_dir}/modified_peakfiles/{primary[2]}.{file_extension}")]
+        # and the filtered files for the extra thresholds are in the threshold_sweep directory
+        for kind, value in thresholds:
+            outfiles.append((kind, value, f"{macs3_dir}/threshold_sweep/{get_threshold_name(kind, value)}_filtered_peaks.{file_extension}"))
+        # Use filter_all_thresholds() to write all of the filtered files in one pass
+        counts = filter_all_thresholds(file,
+                                       delimiter,
+                                       outfiles,
+                                       ext = file_extension)
+        # Tell the user how many rows were read and written for each threshold
+        for kind, value, outfile in outfiles:
+            print(f"{file}: {counts['rows_in']} rows in, {counts[outfile]} rows out ({kind} = {value})")
+
+def filter_timed_folder(macs3_dir,
+                        desired_extensions,
+                        delimiter,
+                        qvalue = 0.01,
+                        pvalue = None,
+                        thresholds = None):
+    """
+    Given the same arguments as filter_macs3_outputs(), filter the macs3 folder and
+    return a 2-tuple of the folder and the number of seconds it took to filter.
+    """
+    # Get the time before filtering
+    start_time = time.time()
+    # Use the filter_macs3_outputs() function to filter the directory
+    filter_macs3_outputs(macs3_dir,
+                         desired_extensions,
+                         delimiter,
+                         qvalue = qvalue,
+                         pvalue = pvalue,
+                         thresholds = thresholds)
+    # Return the folder and the time it took
+    return macs3_dir, time.time() - start_time
 
 def filter_all_files(directory,
                      desired_extensions,
                      delimiter,
                      qvalue = 0.01,
-                     pvalue = None):
+                     pvalue = None,
+                     thresholds = None,
+                     workers = 1):
     """
     Given a file directory, a list of desired extensions, a delimiter for ALL files,
-    and the optional p/qvalues defined in other functions, filter all of the macs3
-    output files in the directory.
+    the optional p/qvalues and extra thresholds defined in other functions, and
+    (optional) the number of worker processes, filter all of the macs3 output files
+    in the directory and tell the user how long each folder took.
+
+    Each macs3 folder is filtered on its own, so if workers is more than 1 the folders
+    are filtered at the same time in a process pool.
 
     Assumes the macs3 output files are in a folder that has the "macs3" substring
     in the file name.
     """
+    # Initialize the list of macs3 folders
+    macs3_dirs = []
     # Loop over the folders in the directory using the generator iglob
     for folder in glob.iglob(f"{directory}/*"):
         # Loop over the subfolders in each folder using iglob
         for subfold in glob.iglob(f"{folder}/*"):
             # If macs3 is a substring of the subfolder name
             if "macs3" in subfold.split('/')[-1].lower():
-                # Use the filter_macs3_outputs() function to filter that directory
-                filter_macs3_outputs(subfold,
-                                     allowed_extensions,
-                                     delimiter,
-                                     qvalue = qvalue,
-                                     pvalue = pvalue)
-                # Continue once this is done. Assumes this is the only macs3 folder in this
-                # specific subdirectory
-                continue
+                # Add the subfolder to the list of folders to filter
+                macs3_dirs.append(subfold)
+    # If only one worker is requested
+    if workers <= 1:
+        # Then filter the folders one at a time
+        for macs3_dir in macs3_dirs:
+            macs3_dir, elapsed = filter_timed_folder(macs3_dir,
+                                                     desired_extensions,
+                                                     delimiter,
+                                                     qvalue = qvalue,
+                                                     pvalue = pvalue,
+                                                     thresholds = thresholds)
+            # and tell the user how long the folder took
+            print(f"{macs3_dir}: filtered in {elapsed:.2f} seconds")
+        return
+    # Otherwise, make a process pool with the requested number of workers
+    with ProcessPoolExecutor(max_workers = workers) as pool:
+        # Submit each folder to the pool
+        futures = [pool.submit(filter_timed_folder,
+                               macs3_dir,
+                               desired_extensions,
+                               delimiter,
+                               qvalue = qvalue,
+                               pvalue = pvalue,
+                               thresholds = thresholds) for macs3_dir in macs3_dirs]
+        # As each folder finishes, tell the user how long it took. The result
+        # also raises any error from the worker
+        for future in as_completed(futures):
+            macs3_dir, elapsed = future.result()
+            print(f"{macs3_dir}: filtered in {elapsed:.2f} seconds")
 
 #
 #
@@ -347,6 +370,14 @@ def check_sysargs(args):
     args[3]   : pvalue; float, None or default (if using qvalue, default is p = None)
     args[4]   : delimiter; default is '\t'
 
+    OPTIONS (removed from the arguments by script_options.get_option() before checking)
+
+    --qvalues : comma separated q values to also filter on, e.g. 0.05,0.1
+    --pvalues : comma separated p values to also filter on, e.g. 0.001,0.0001
+    --workers : number of macs3 folders to filter at the same time; default is 1
+
+    The files filtered on these are written to threshold_sweep in each macs3 folder.
+
     ===================================================================================
     """
     # First, assert that the number of arguments given is less than or equal to 5.
@@ -399,7 +430,7 @@ def check_sysargs(args):
         # If this fails
         except:
             # Then check to see if the pvalue was set to None
-            if pvalue.lower() == 'none':
+            if args[3].lower() == 'none':
                 # If it was, then set the pvalue to the None object
                 pvalue = None
             # Otherwise,
@@ -449,7 +480,7 @@ def check_sysargs(args):
         # If this fails
         except:
             # Then check to see if the pvalue was set to None
-            if pvalue.lower() == 'none':
+            if args[3].lower() == 'none':
                 pvalue = None
             # Otherwise,
             else:
@@ -500,15 +531,23 @@ def main():
     tell the user they're done.
     """
     args = sys.argv
+    # Get the extra q and p value thresholds from the optional --qvalues and --pvalues arguments
+    thresholds = get_threshold_list(script_options.get_option(args, "--qvalues", ""), "q")
+    thresholds += get_threshold_list(script_options.get_option(args, "--pvalues", ""), "p")
+    # Get the number of worker processes from the optional --workers argument
+    workers = int(script_options.get_option(args, "--workers", "1"))
     directory, qvalue, pvalue, delimiter = check_sysargs(args)
     filter_all_files(directory,
                      allowed_extensions,
                      delimiter,
                      qvalue = qvalue,
-                     pvalue = pvalue)
+                     pvalue = pvalue,
+                     thresholds = thresholds,
+                     workers = workers)
     print("done")
 
-main()
+if __name__ == "__main__":
+    main()
 
 #
 #
@@ -17,6 +17,19 @@ The file format is:
 Since this program is tested using the NCBI FASTA genome files, the chrom will be an
 NCBI identifier for that sequence, and the number will be the count.
 
+The FASTA files may be gzipped (ending in .<extension>.gz), and are then read
+without decompressing them to the disk (using pigz if it is installed). The
+optional argument --workers <n> counts n files at the same time.
+
+For each FASTA file that is not gzipped, a .fai index (like samtools faidx makes)
+is written next to it.
+
+Next to the .genome file, this program writes genome_metadata.npz (see
+shared_tools/genome_metadata.py), which holds the chromosome names and lengths
+and the checksums of the FASTA files, so the other python files do not need to
+read the .genome file again until the FASTA files change. The checksums are
+found while the files are counted, so each FASTA file is only read once.
+
 """
 ###########################################################################################
 #
@@ -24,6 +37,20 @@ NCBI identifier for that sequence, and the number will be the count.
 
 import glob    # Used to iterate over the files in a directory
 import sys     # Used to get command line inputs (system arguments)
+import os      # Used for finding the shared_tools folder
+import hashlib # Used for the md5 checksums of the FASTA files
+import mmap    # Used to memory map the FASTA files, so they are read as bytes without copying
+import gzip    # Used to read gzipped FASTA files if pigz is not installed
+import shutil  # Used to check whether pigz is installed
+import subprocess    # Used to decompress gzipped FASTA files with pigz
+from concurrent.futures import ProcessPoolExecutor   # Used to count FASTA files in parallel
+import numpy as np   # Used to count the newline characters in the FASTA files in bulk
+
+# The shared_tools folder holds the genome metadata used by several python files
+sys.path.append(f"{os.path.dirname(os.path.abspath(__file__))}/../shared_tools")
+import genome_metadata
+import file_tools
+import script_options
 
 #
 #
@@ -72,14 +99,15 @@ def check_sysargs(args):
             directory += f"{p}/"
 
     # Once the directory string is built, check to make sure each
-    # fasta file can be opened. Loop over files in the directory
-    for file in glob.iglob(f"{directory}*.fasta"):
+    # fasta file (with the given extension, gzipped or not) can be opened.
+    # Loop over the files found with get_fasta_files()
+    for file in get_fasta_files(directory, args[3]):
         # Attempt to open the file
         try:
-            with open(file, 'r') as f:
+            with open(file, 'rb') as f:
                 f.close()
         # If this fails, raise a ValueError
-        except ValueError:
+        except (OSError, ValueError):
             # Tell the user the file is invalid
             print(f"{file} is not a valid file.")
             # and system exit (equivalent of a keyboard interrupt
@@ -88,109 +116,422 @@ def check_sysargs(args):
     # If the files can be opened, then return the directory string.
     return directory, args[3]
 
-def count_nucleotides_fasta(file):
+def find_fasta_records(fasta_map,
+                       start = 0):
+    """
+    given a memory mapped FASTA file (or any bytes-like object with find()) and
+    (optional) the byte offset to start at, yield a 3-tuple for each record (a >
+    header line and the sequence after it):
 
+    (header line as a string ending in a newline, start of the sequence, end of the sequence)
+
+    The start and end are byte offsets, so the sequence is fasta_map[start:end].
+    Only the header lines are looked at, the sequence lines are skipped over by
+    searching for the next newline followed by a > character.
+    """
+    # Get the size of the file
+    size = len(fasta_map)
+    # If the file begins with a header, start there
+    if start < size and fasta_map[start:start + 1] == b">":
+        header_start = start
+    # Otherwise find the first header, which is a > character after a newline
+    else:
+        header_start = fasta_map.find(b"\n>", start)
+        # and move past the newline
+        if header_start != -1:
+            header_start += 1
+    # Loop over the headers in the file
+    while header_start != -1:
+        # Find the end of the header line. If there is none, the header is the last line
+        header_end = fasta_map.find(b"\n", header_start)
+        seq_start = size if header_end == -1 else header_end + 1
+        # Find the next header, which is a > character after a newline
+        next_header = fasta_map.find(b"\n>", seq_start - 1) if seq_start < size else -1
+        # The sequence ends at the next header, or the end of the file
+        seq_end = size if next_header == -1 else next_header + 1
+        # Decode the header, with a newline like a line read from a text file
+        header = fasta_map[header_start:seq_start].decode().rstrip("\r\n") + "\n"
+        # Yield the header and the location of the sequence
+        yield header, seq_start, seq_end
+        # Move to the next header
+        header_start = -1 if next_header == -1 else next_header + 1
+
+def count_sequence_bases(fasta_map,
+                         start,
+                         end,
+                         block_size = 1 << 22):
+    """
+    given a memory mapped FASTA file, the start and end of a sequence (from
+    find_fasta_records()), and (optional) the number of bytes to count at a time,
+    return the number of bases in the sequence: the number of bytes that are not
+    newline characters (\n or the \r of Windows line endings).
+
+    The bytes are viewed as a NumPy array (without copying them) and the newlines
+    are counted a block at a time, so the sequence lines are never looped over in
+    python. The \r characters are only counted if there are any.
     """
-    given a fasta file, return a string in the following format:
+    # View the memory mapped file as an array of bytes
+    fasta_bytes = np.frombuffer(fasta_map, dtype = np.uint8)
+    # Check once whether the sequence has any Windows line endings
+    windows = fasta_map.find(b"\r", start, end) != -1
+    # Initialize the number of newline characters and the block of bytes
+    newlines = 0
+    block = None
+    # Loop over the sequence in blocks
+    for block_start in range(start, end, block_size):
+        # Get the block of bytes
+        block = fasta_bytes[block_start:min(block_start + block_size, end)]
+        # Count the newline characters in the block (10 is \n and 13 is \r)
+        newlines += np.count_nonzero(block == 10)
+        if windows:
+            newlines += np.count_nonzero(block == 13)
+    # Remove the array view, so the memory map can be closed
+    del fasta_bytes, block
+    # The number of bases is the number of bytes that are not newline characters
+    return (end - start) - newlines
+
+def index_sequence(fasta_map,
+                   start,
+                   end,
+                   block_size = 1 << 22):
+    """
+    given a memory mapped FASTA file, the start and end of a sequence (from
+    find_fasta_records()), and (optional) the number of bytes to look at a time,
+    return a 3-tuple of
 
-    <chromosome>\t<nucleotide_count>\n
+    (number of bases, bases per line, bytes per line)
 
-    Assumes that the first line of the fasta file has the following format:
+    The bases per line and bytes per line are None if the lines of the sequence
+    are not all the same length (other than the last line, which may be shorter),
+    since then the sequence cannot be indexed like samtools faidx does.
 
-    >[chromosome_identifier] [description of the chromosome]
+    Like count_sequence_bases(), the bytes are viewed as a NumPy array and looked
+    at a block at a time. The positions of the newlines in each block are compared
+    to where they would be if every line had the length of the first line.
+    """
+    # An empty sequence has no lines, so samtools gives it line lengths of 0
+    if start == end:
+        return 0, 0, 0
+    # View the memory mapped file as an array of bytes
+    fasta_bytes = np.frombuffer(fasta_map, dtype = np.uint8)
+    # Check once whether the sequence has any Windows line endings
+    windows = fasta_map.find(b"\r", start, end) != -1
+    # The bytes per line is the length of the first line, with its newline
+    first_newline = fasta_map.find(b"\n", start, end)
+    line_width = (end - start) + 1 if first_newline == -1 else first_newline - start + 1
+    # The bases per line is the bytes per line without the newline characters
+    line_bases = line_width - 1 - (1 if first_newline > start and fasta_map[first_newline - 1:first_newline] == b"\r" else 0)
+    # Initialize the number of newline characters, the number of newlines that are not
+    # where they should be, and the positions of the last newline and last misplaced newline
+    newlines = 0
+    carriage_returns = 0
+    misplaced = 0
+    last_newline = -1
+    last_misplaced = -1
+    last_misplaced_expected = -1
+    block = None
+    # Loop over the sequence in blocks
+    for block_start in range(start, end, block_size):
+        # Get the block of bytes
+        block = fasta_bytes[block_start:min(block_start + block_size, end)]
+        # Get the positions of the newlines (10 is \n) in the file
+        positions = np.flatnonzero(block == 10) + block_start
+        # The newline of line k (counting from 1) should be at start + k * line_width - 1
+        expected = start + (np.arange(newlines, newlines + len(positions)) + 1) * line_width - 1
+        wrong = positions[positions != expected]
+        wrong_expected = expected[positions != expected]
+        # Update the counts and the positions
+        newlines += len(positions)
+        misplaced += len(wrong)
+        if len(positions) > 0:
+            last_newline = positions[-1]
+        if len(wrong) > 0:
+            last_misplaced = wrong[-1]
+            last_misplaced_expected = wrong_expected[-1]
+        # Count the \r characters (13 is \r), if there are any
+        if windows:
+            carriage_returns += np.count_nonzero(block == 13)
+    # Remove the array view, so the memory map can be closed
+    del fasta_bytes, block
+    # The number of bases is the number of bytes that are not newline characters
+    bases = (end - start) - newlines - carriage_returns
+    # The lines are the same length if no newline is misplaced (and the unfinished last
+    # line is not too long), or only the last one is, because the last line is shorter
+    if misplaced == 0:
+        same_lengths = (end - 1 - last_newline) <= line_width - 1 or first_newline == -1
+    else:
+        same_lengths = (misplaced == 1 and last_misplaced == last_newline
+                        and last_misplaced < last_misplaced_expected and last_newline == end - 1)
+    # Return the number of bases, and the line lengths if they are the same
+    if same_lengths:
+        return bases, line_bases, line_width
+    return bases, None, None
+
+def is_chromosome_header(header):
+    """
+    given a FASTA header line, return True if it is the header of a chromosome
+    that should be counted, and False otherwise.
+    """
+    # Check to see if the header includes the following substrings:
+    # "chromosome" and not "sequence" means that you've found the entire chromosome
+    # "complete genome" means that you've found a mitochondrial genome (at least for drosophila)
+    return "chromosome" in header and "sequence" not in header or "complete genome" in header
+
+def make_chromosome_lines(records):
+    """
+    given a list of (header, nucleotide_count) for the chromosome headers of a
+    FASTA file, in order, return a list of lines in the following format:
+
+    <chromosome>\t<nucleotide_count>\n
+
+    and the organism initials (from the first chromosome header).
     """
     # Initialize the list to hold the lines
     lines = []
+    # Initialize a string for the last seen chromosome identifier
+    current_chrom_id = ""
+    # Inititalize a variable to hold the organism initials
+    org_initials = ""
+    # Loop over the chromosome headers and counts
+    for header, count in records:
+        # Split the header on the spaces
+        header = header.split(' ')
+        # If this is the first chromosome sequence you've found
+        if current_chrom_id == "":
+            # The organism initials are the first characters of the first and second strings in the list
+            org_initials = f"{header[1][0].lower()}{header[2][0].lower()}"
+        # The chromosome ID is the zeroeth element of the list without the > character
+        current_chrom_id = f"{header[0][1:]}"
+        # Add the line formatted as in the docstring
+        lines.append(f"{current_chrom_id}\t{count}\n")
+    # If no chromosomes were found, add the empty line (like the last chrom and count with no chromosomes)
+    if lines == []:
+        lines.append(f"{current_chrom_id}\t0\n")
+    # Return the lines and the organism initials
+    return lines, org_initials
+
+def open_gzip_fasta(file,
+                    threads = 1):
+    """
+    given a gzipped (or bgzipped) FASTA file and (optional) the number of threads to
+    use, return a 2-tuple of a stream of the decompressed bytes and the decompressing
+    process (None if the file is decompressed in python).
+
+    If pigz is installed, it decompresses the file in another process using the given
+    number of threads. Otherwise the gzip module is used.
+    """
+    # If pigz is installed
+    if shutil.which("pigz") != None:
+        # Then start pigz, writing the decompressed file to a pipe
+        process = subprocess.Popen(["pigz", "-dc", "-p", str(threads), file],
+                                   stdout = subprocess.PIPE)
+        # and return the pipe and the process
+        return process.stdout, process
+    # Otherwise, open the file using the gzip module
+    return gzip.open(file, 'rb'), None
+
+def count_fasta_stream(stream,
+                       checksum = None,
+                       block_size = 1 << 24):
+    """
+    given a stream of the bytes of a FASTA file (like a decompressed gzip file),
+    (optional) a hashlib checksum to add the bytes of the stream to, and (optional)
+    the number of bytes to read at a time, return a list of
+    (header, nucleotide_count) for the chromosome headers in the stream, in order.
+
+    The stream is read in blocks that end at a newline, so every header line is in one
+    block. Each block is searched with find_fasta_records() and counted with
+    count_sequence_bases(), like a memory mapped file. The start of a block (before its
+    first header) belongs to the last record of the block before it.
+    """
+    # Initialize the list of records, whether the last record is a chromosome, and the
+    # part of the last block after its last newline
+    records = []
+    counting = False
+    leftover = b""
+    # Loop until the stream is finished
+    while True:
+        # Read the next block from the stream, after what was left over from the last block
+        chunk = stream.read(block_size)
+        block = leftover + chunk
+        # Add the bytes that were read to the checksum, if there is one
+        if checksum != None:
+            checksum.update(chunk)
+        # If the stream is not finished
+        if chunk:
+            # Then cut the block after its last newline, and leave the rest for the next block
+            cut = block.rfind(b"\n") + 1
+            block, leftover = block[:cut], block[cut:]
+        # Find where the first header of the block begins
+        first = block.find(b"\n>")
+        first = len(block) if first == -1 else first + 1
+        if block[:1] == b">":
+            first = 0
+        # If the last record is a chromosome, count the sequence before the first header
+        if counting:
+            records[-1][1] += count_sequence_bases(block, 0, first)
+        # Loop over the records that begin in the block
+        for header, seq_start, seq_end in find_fasta_records(block, first):
+            # Check whether the record is a chromosome
+            counting = is_chromosome_header(header)
+            # If it is, then count the bases of the sequence in this block
+            if counting:
+                records.append([header, count_sequence_bases(block, seq_start, seq_end)])
+        # If the stream is finished, then stop
+        if not chunk:
+            break
+    # Return the list of records
+    return [(header, count) for header, count in records]
+
+def write_fai_index(fai_lines,
+                    fai_file):
+    """
+    given the lines of a .fai index and the path to the index file, write the index.
+    It is written with file_tools.atomic_write(), so a partly written index is never read.
+    """
+    # Open the index file and write the lines
+    with file_tools.atomic_write(fai_file) as f:
+        f.writelines(fai_lines)
+
+def count_nucleotides_fasta(file,
+                            threads = 1,
+                            write_index = True):
+
+    """
+    given a fasta file (which may be gzipped, ending in .gz), (optional) the number
+    of threads used to decompress it, and (optional) whether to write a .fai index,
+    return a 3-tuple of the lines in the following format:
+
+    <chromosome>\t<nucleotide_count>\n
+
+    the organism initials, and the md5 checksum of the file (of the decompressed
+    FASTA file, if it is gzipped) as a hexadecimal string.
+
+    Assumes that the first line of the fasta file has the following format:
+
+    >[chromosome_identifier] [description of the chromosome]
 
-    # Open the file and read it. Assumes file has been
+    The file is memory mapped and read as bytes. find_fasta_records() finds the
+    header lines, and count_sequence_bases() counts the bases of the chromosome
+    sequences in bulk, so the sequence lines are never decoded or looped over.
+    Gzipped files are decompressed as a stream and counted with count_fasta_stream(),
+    so they never need to be decompressed to the disk.
+
+    For files that are not gzipped, a samtools faidx style index (<file>.fai, with
+    the name, length, offset, bases per line and bytes per line of every sequence)
+    is written from the same pass, so sequences can be fetched later without reading
+    the whole file. Gzipped files cannot be read at an offset, so they are not indexed.
+
+    The checksum is found from the same pass, so the file is only read once.
+    """
+    # Initialize the md5 checksum of the file
+    checksum = hashlib.md5()
+    # If the file is gzipped
+    if file.endswith(".gz"):
+        # Then open the decompressed stream
+        stream, process = open_gzip_fasta(file, threads = threads)
+        # and count the chromosomes in it, adding the decompressed bytes to the checksum
+        records = count_fasta_stream(stream, checksum = checksum)
+        # Close the stream when done
+        stream.close()
+        # If pigz was used, make sure it finished without an error
+        if process != None and process.wait() != 0:
+            raise ValueError(f"{file} could not be decompressed.")
+        # Return the lines, the organism initials and the checksum
+        return (*make_chromosome_lines(records), checksum.hexdigest())
+    # Initialize the list of chromosome headers and counts, the lines of the .fai index,
+    # and whether every sequence can be indexed
+    records = []
+    fai_lines = []
+    indexable = True
+    # Open the file and read it as bytes. Assumes file has been
     # pre determined as a valid file.
-    with open(file, 'r') as f:
-        # Initialize a string for the last seen chromosome identifier
-        current_chrom_id = ""
-        # Inititalize a variable to hold the organism initials
-        org_initials = ""
-        # Initialize the count!
-        count = 0
-        # Set the variable go to False, used to tell the function to count later on
-        go = False
-        # Loop over the lines in the file
-        for line in f:
-            # If the line begins with a > character, then you've hit a new annotated region
-            if line[0] == ">":
-                # Check to see if the annotated region line includes the following substrings:
-                # "chromosome" and not "sequence" means that you've found the entire chromosome
-                # "complete genome" means that you've found a mitochondrial genome (at least for drosophila)
-                if "chromosome" in line and "sequence" not in line or "complete genome" in line:
-                    # Then check to see if this is the first chromosome sequence you've found
-                    if len(lines) == 0 and current_chrom_id == "" and count == 0:
-                        # If it is, then set go to True
-                        go = True
-                        # Split the line on the spaces
-                        line = line.split(' ')
-                        # The chromosome ID is the zeroeth element of the list without the > character
-                        current_chrom_id = f"{line[0][1:]}"
-                        # The organism initials are the first characters of the first and second strings in the list
-                        org_initials = f"{line[1][0].lower()}{line[2][0].lower()}"
-                    # Or if the number of lines is zero but we have seen a chromosome already
-                    elif len(lines) == 0 and current_chrom_id != "":
-                        # Then we should tell the program to continue counting (new chromosome)
-                        go = True
-                        # Add the count from the old chromosome to the list of lines formatted as in the docstring
-                        lines.append(f"{current_chrom_id}\t{count}\n")
-                        # Split this new line on spaces
-                        line = line.split(' ')
-                        # The chromosome ID is the zeroeth element of the line without the leading > character
-                        current_chrom_id = f"{line[0][1:]}"
-                        # And reset the count to zero to continue the counting of this next chromosome
-                        count = 0
-                    # Or if there are already lines found
-                    elif len(lines) > 0:
-                        # Then we should tell the program to continue counting (new chromosome)
-                        go = True
-                        # Add the count from the old chromosome to the list of lines formatted as in the docstring
-                        lines.append(f"{current_chrom_id}\t{count}\n")
-                        # Split this new line on spaces
-                        line = line.split(' ')
-                        # The chromosome ID is the zeroeth element of the line without the leading > character
-                        current_chrom_id = f"{line[0][1:]}"
-                        # And reset the count to zero to continue the counting of this next chromosome
-                        count = 0
-                # If we are not at a chromosome or the mitochondrial genome sequence, then we don't want to count
-                else:
-                    # So set the go variable to False
-                    go = False
-            # Or if the line does not start with > and the go variable is True
-            elif go == True:
-                # Then count the characters in the line, minus 1 for the newline character
-                count += len(line)-1
-        # At the end of the loop, add the last chrom and count to the liens list
-        lines.append(f"{current_chrom_id}\t{count}\n")
+    with open(file, 'rb') as f:
+        # Empty files cannot be memory mapped, and have no chromosomes
+        if os.fstat(f.fileno()).st_size == 0:
+            return (*make_chromosome_lines(records), checksum.hexdigest())
+        # Memory map the file, so the operating system reads it as it is needed
+        with mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ) as fasta_map:
+            # Add the memory mapped bytes to the checksum, without copying them
+            checksum.update(fasta_map)
+            # Loop over the records (headers and sequences) in the file
+            for header, seq_start, seq_end in find_fasta_records(fasta_map):
+                # Count the bases in the sequence and get the line lengths
+                bases, line_bases, line_width = index_sequence(fasta_map, seq_start, seq_end)
+                # Add the line for the .fai index: name (up to the first space), number of bases,
+                # offset of the first base, bases per line and bytes per line
+                fai_lines.append(f"{header[1:].split()[0] if header[1:].split() else ''}\t{bases}\t{seq_start}\t{line_bases}\t{line_width}\n")
+                # If the line lengths are not all the same, then the file cannot be indexed
+                if line_bases == None:
+                    indexable = False
+                # If the header is a chromosome, then keep the count
+                if is_chromosome_header(header):
+                    records.append((header, bases))
+            # Close the memory map when done
+            fasta_map.close()
         # Close the file when done
         f.close()
+    # If an index was asked for
+    if write_index:
+        # Then write the .fai index next to the file, if every sequence could be indexed
+        if indexable:
+            write_fai_index(fai_lines, f"{file}.fai")
+        # Otherwise tell the user. This goes to stderr, since the shell scripts keep stdout
+        else:
+            print(f"{file} has lines of different lengths, so no .fai index was written.", file = sys.stderr)
+    # Return the tab separated chromosome count lines, the organism initials and the checksum
+    return (*make_chromosome_lines(records), checksum.hexdigest())
 
-    # Return the tab separated chromosome count string
-    return lines, org_initials
+def get_fasta_files(fasta_dir,
+                    extension):
+    """
+    given a directory that contains chromosome FASTA files and the FASTA
+    file extension, return a list of the FASTA files in the directory,
+    followed by the gzipped FASTA files (ending in .<extension>.gz).
+    """
+    # Get the FASTA files and the gzipped FASTA files
+    return glob.glob(f"{fasta_dir}/*.{extension}") + glob.glob(f"{fasta_dir}/*.{extension}.gz")
 
-def get_count_lines(fasta_dir, extension):
+def get_count_lines(fasta_dir,
+                    extension,
+                    workers = 1):
 
     """
-    given a directory that contains chromosome FASTA files,
-    return a list of lines to write to a .genome file.
+    given a directory that contains chromosome FASTA files (which may be gzipped),
+    the FASTA file extension, and (optional) the number of worker processes,
+    return a 3-tuple of the list of lines to write to a .genome file, the organism
+    initials, and a dictionary with key = FASTA file, value = md5 checksum, in the
+    order the files were counted (the order of the lines).
+
+    If workers is more than 1, the files are counted at the same time in a process
+    pool. The lines are in the same order either way.
 
     Assumes that the fasta_dir has format path/to/folder/
     """
-
-    # Initialize the lines variable
-    lines= []
-    # Use generator iglob to iterate over the files in the given directory
-    for file in glob.iglob(f"{fasta_dir}/*.{extension}"):
-        # Use the count_nucleotides_fasta() function to count the chromosomes/nucleotides.
-        # This returns a list of strings and a organism ID
-        new_lines, org_initials = count_nucleotides_fasta(file)
+    # Get the list of FASTA files
+    files = get_fasta_files(fasta_dir, extension)
+    # Split the processors between the workers, for decompressing gzipped files
+    threads = max(1, (os.cpu_count() or 1) // max(workers, 1))
+    # If more than one worker is requested
+    if workers > 1:
+        # Then count the files at the same time using a process pool
+        with ProcessPoolExecutor(max_workers = workers) as pool:
+            results = list(pool.map(count_nucleotides_fasta, files, [threads] * len(files)))
+    # Otherwise, count the files one at a time
+    else:
+        results = [count_nucleotides_fasta(file, threads = threads) for file in files]
+    # Initialize the lines variable, the organism ID and the checksums dictionary
+    lines = []
+    org_initials = ""
+    checksums = {}
+    # Loop over the files, and the lines, organism ID and checksum of each file
+    for file, (new_lines, org_initials, checksum) in zip(files, results):
         # Add the lines found to the lines list
         lines += new_lines
-    # Return the lines list and the orgnaims ID
-    return lines, org_initials
+        # and keep the checksum of the file
+        checksums[file] = checksum
+    # Return the lines list, the orgnaims ID and the checksums
+    return lines, org_initials, checksums
 
 #
 #
@@ -203,21 +544,37 @@ def main():
     # Get the system argument
     args = sys.argv
 
+    # Get the number of worker processes from the optional --workers argument
+    workers = int(script_options.get_option(args, "--workers", "1"))
+
     # Check that they are valid, assign directory string to directory
     directory, extension = check_sysargs(args)
 
     # Get the lines list using get_count_lines()
-    lines, org_initials = get_count_lines(directory, extension)
+    lines, org_initials, checksums = get_count_lines(directory, extension, workers = workers)
 
     # Write the length.genome file to the given directory
-    with open(f"{directory}length.genome", 'w') as g:
+    genome_file = f"{directory}length.genome"
+    with open(genome_file, 'w') as g:
         g.writelines(lines)
         g.close()
+    # Get the chromosome names and lengths from the lines
+    chrom_names = [line.split('\t')[0] for line in lines]
+    chrom_lengths = [int(line.split('\t')[1]) for line in lines]
+    # and save the genome metadata, made from the FASTA files (with the checksums
+    # found while counting them), to the given directory
+    metadata = genome_metadata.make_genome_metadata(chrom_names,
+                                                    chrom_lengths,
+                                                    list(checksums.keys()),
+                                                    genome_file,
+                                                    checksums = list(checksums.values()))
+    genome_metadata.save_genome_metadata(metadata, genome_metadata.get_metadata_file(directory))
     # Print the organims initials. If you run a bash script, this can be captured by
     # id=$(python3 count_genome_chars.py "directory/to/fasta/files")
     print(f"{org_initials}")
 
-main()
+if __name__ == "__main__":
+    main()
 
 #
 #
@@ -0,0 +1,178 @@
+"""
+Tests for index_sequence() in make_genomefile/count_genome_chars.py. The counts and line lengths
+are compared to splitting the sequence into lines, which is how the bases were counted before the
+sequences were looked at as bytes, and to the samtools faidx rule for which sequences can be indexed:
+every line has the same length, other than the last line, which may be shorter.
+"""
+
+import os
+import gzip
+import hashlib
+import random
+import pytest
+
+import genome_metadata
+
+
+def split_sequence(sequence):
+    """
+    Given the bytes of a sequence (after its header line), return the 3-tuple
+
+    (number of bases, bases per line, bytes per line)
+
+    by splitting the sequence into lines. The line lengths are None if the sequence cannot
+    be indexed.
+    """
+    # An empty sequence has no lines, so samtools gives it line lengths of 0
+    if sequence == b"":
+        return 0, 0, 0
+    # The bases are the bytes that are not newline characters
+    bases = len(sequence.replace(b"\n", b"").replace(b"\r", b""))
+    # The lines that end in a newline, and the rest of the sequence after the last newline
+    lines = sequence.split(b"\n")
+    finished, rest = lines[:-1], lines[-1]
+    # The bytes per line is the length of the first line with its newline
+    line_width = len(lines[0]) + 1
+    line_bases = len(lines[0].rstrip(b"\r"))
+    # Every line but the last must be as long as the first, and the last must not be longer
+    if rest == b"":
+        same_lengths = (all(len(line) + 1 == line_width for line in finished[:-1])
+                        and len(finished[-1]) + 1 <= line_width)
+    else:
+        same_lengths = (all(len(line) + 1 == line_width for line in finished)
+                        and len(rest) + 1 <= line_width)
+    if same_lengths:
+        return bases, line_bases, line_width
+    return bases, None, None
+
+
+def make_sequence(seed, newline):
+    """
+    Given a seed and the newline to use (b"\n" or b"\r\n"), return the bytes of a random
+    sequence. Most sequences have lines of the same length, and some are changed so they
+    cannot be indexed (a line that is longer or shorter, a blank line, or no newline at the end).
+    """
+    random.seed(seed)
+    width = random.randint(1, 12)
+    n_lines = random.randint(0, 8)
+    lines = [bytes(random.choices(b"ACGTN", k = width)) for _ in range(n_lines)]
+    # The last line may be shorter
+    if lines != [] and random.random() < 0.5:
+        lines[-1] = lines[-1][:random.randint(1, width)]
+    # Change some of the sequences
+    change = random.choice(["none", "none", "longer", "shorter", "blank", "unfinished"])
+    if lines != [] and change == "longer":
+        lines[random.randrange(len(lines))] += b"A"
+    elif lines != [] and change == "shorter":
+        i = random.randrange(len(lines))
+        lines[i] = lines[i][:-1]
+    elif change == "blank":
+        lines.insert(random.randint(0, len(lines)), b"")
+    sequence = b"".join([line + newline for line in lines])
+    # Leave the newline off of the last line
+    if change == "unfinished" and sequence != b"":
+        sequence = sequence[:-len(newline)]
+    return sequence
+
+
+@pytest.mark.parametrize("newline", [b"\n", b"\r\n"])
+@pytest.mark.parametrize("block_size", [1, 3, 7, 1 << 22])
+def test_index_sequence_matches_split_lines(load_script, newline, block_size):
+    count_genome_chars = load_script("make_genomefile/count_genome_chars.py")
+    for seed in range(300):
+        sequence = make_sequence(seed, newline)
+        # Put the sequence after a header, so it starts at an offset in the file
+        fasta = b">NC_1 Drosophila melanogaster chromosome 2L" + newline + sequence
+        start, end = len(fasta) - len(sequence), len(fasta)
+        expected = split_sequence(sequence)
+        assert count_genome_chars.index_sequence(fasta, start, end, block_size = block_size) == expected, sequence
+        assert count_genome_chars.count_sequence_bases(fasta, start, end, block_size = block_size) == expected[0]
+
+
+def test_records_of_a_fasta_file_match_split_lines(load_script):
+    count_genome_chars = load_script("make_genomefile/count_genome_chars.py")
+    # Every sequence but the last ends in a newline, so the next header starts a line
+    sequences = [make_sequence(seed, b"\n") for seed in range(50)]
+    sequences = [sequence if sequence.endswith(b"\n") or sequence == b"" else sequence + b"\n"
+                 for sequence in sequences[:-1]] + sequences[-1:]
+    fasta = b"".join([f">NC_{i} Drosophila melanogaster chromosome {i}\n".encode() + sequence
+                      for i, sequence in enumerate(sequences)])
+    records = list(count_genome_chars.find_fasta_records(fasta))
+    # Every record should be found, with the sequence after its header
+    assert [fasta[start:end] for header, start, end in records] == sequences
+    for (header, start, end), sequence in zip(records, sequences):
+        assert count_genome_chars.index_sequence(fasta, start, end, block_size = 5) == split_sequence(sequence)
+
+
+@pytest.mark.parametrize("sequence, expected", [(b"ACGT\nACGT\nAC\n", (10, 4, 5)),
+                                                (b"ACGT\r\nACGT\r\nAC\r\n", (10, 4, 6)),
+                                                (b"ACGT\nACGT\nAC", (10, 4, 5)),
+                                                (b"ACGT", (4, 4, 5)),
+                                                (b"", (0, 0, 0)),
+                                                # A short line before the last line
+                                                (b"ACGT\nAC\nACGT\n", (10, None, None)),
+                                                # A last line that is longer
+                                                (b"ACGT\nACGTA\n", (9, None, None)),
+                                                # A blank line
+                                                (b"ACGT\n\nACGT\n", (8, None, None)),
+                                                # An unfinished last line that is longer
+                                                (b"ACGT\nACGT\nACGTAC", (14, None, None))])
+def test_index_sequence_edge_cases(load_script, sequence, expected):
+    count_genome_chars = load_script("make_genomefile/count_genome_chars.py")
+    fasta = b">NC_1 Drosophila melanogaster chromosome 2L\n" + sequence
+    start = len(fasta) - len(sequence)
+    assert count_genome_chars.index_sequence(fasta, start, len(fasta), block_size = 3) == expected
+
+
+def test_windows_fasta_file_is_counted_and_indexed(tmp_path, load_script):
+    count_genome_chars = load_script("make_genomefile/count_genome_chars.py")
+    fasta = (b">NC_1 Drosophila melanogaster chromosome 2L\r\nACGT\r\nAC\r\n"
+             b">NW_1 Drosophila melanogaster unplaced sequence\r\nAAA\r\n"
+             b">NC_2 Drosophila melanogaster chromosome X\r\nAAAA\r\n")
+    file = str(tmp_path / "genome.fasta")
+    with open(file, 'wb') as f:
+        f.write(fasta)
+        f.close()
+    # Only the chromosomes are counted, and the \r characters are not bases. The checksum
+    # is the md5 checksum of the whole file
+    checksum = hashlib.md5(fasta).hexdigest()
+    assert count_genome_chars.count_nucleotides_fasta(file) == (["NC_1\t6\n", "NC_2\t4\n"], "dm", checksum)
+    # Every sequence is in the .fai index, with the offset of its first base
+    with open(f"{file}.fai", 'r') as f:
+        assert f.read() == (f"NC_1\t6\t{fasta.index(b'ACGT')}\t4\t6\n"
+                            f"NW_1\t3\t{fasta.index(b'AAA')}\t3\t5\n"
+                            f"NC_2\t4\t{fasta.index(b'AAAA')}\t4\t6\n")
+        f.close()
+    # The gzipped file gives the same counts, and the checksum of the decompressed file
+    with gzip.open(f"{file}.gz", 'wb') as f:
+        f.write(fasta)
+        f.close()
+    assert count_genome_chars.count_nucleotides_fasta(f"{file}.gz") == (["NC_1\t6\n", "NC_2\t4\n"], "dm", checksum)
+
+
+
+def test_checksums_follow_the_counted_files(tmp_path, load_script):
+    count_genome_chars = load_script("make_genomefile/count_genome_chars.py")
+    texts = {"chr2L.fasta" : b">NC_1 Drosophila melanogaster chromosome 2L\nACGT\nAC\n",
+             "chrX.fasta" : b">NC_2 Drosophila melanogaster chromosome X\nAAAA\n"}
+    for name, text in texts.items():
+        with open(str(tmp_path / name), 'wb') as f:
+            f.write(text)
+            f.close()
+    lines, org_initials, checksums = count_genome_chars.get_count_lines(f"{tmp_path}/", "fasta")
+    # The checksums are in the order of the lines, and are the checksums of the whole files
+    names = {"chr2L.fasta" : "NC_1", "chrX.fasta" : "NC_2"}
+    assert [names[file.split("/")[-1]] for file in checksums] == [line.split("\t")[0] for line in lines]
+    assert list(checksums.values()) == [genome_metadata.get_file_checksum(file) for file in checksums]
+
+
+def test_check_sysargs_checks_the_given_extension(tmp_path, load_script):
+    count_genome_chars = load_script("make_genomefile/count_genome_chars.py")
+    with gzip.open(str(tmp_path / "chrX.fa.gz"), 'wb') as f:
+        f.write(b">NC_2 Drosophila melanogaster chromosome X\nAAAA\n")
+        f.close()
+    assert count_genome_chars.check_sysargs(["count_genome_chars.py", str(tmp_path), "false", "fa"]) == (f"{tmp_path}/", "fa")
+    # A FASTA file that cannot be opened stops the program
+    os.symlink(str(tmp_path / "missing.fa"), str(tmp_path / "chr2L.fa"))
+    with pytest.raises(SystemExit):
+        count_genome_chars.check_sysargs(["count_genome_chars.py", str(tmp_path), "false", "fa"])
@@ -0,0 +1,226 @@
+"""
+==============================================================================================================
+Python 3.8.5
+
+annotation_ids.py
+==============================================================================================================
+
+This python file is not meant to be run on its own. It holds the annotation identifier cleanup that
+the other python files (edit_annotation_file.py, make_annotation_files.py) share. To use it from one
+of those files, add the shared_tools folder to the path:
+
+    sys.path.append(f"{os.path.dirname(os.path.abspath(__file__))}/../shared_tools")
+    import annotation_ids
+
+** It is assumed here that the annotations come from an annotation file found on NCBI. This was
+designed using the annotation file for Drosophila melanogaster, so edits may be required for other
+organisms (depending on their identifier format)**
+
+There are a few organism identifiers that have been manually set in this file:
+
+Drosophila melanogaster    :    dmel
+Escherichia coli           :    ecol
+Homo sapiens               :    hsap
+Mus musculus               :    mmus
+Caenorhabditis elegans     :    cele
+
+If your organism is not represented, or if the organism identifier used in your annotation file
+is different, then simply edit the organism_identifiers list below.
+
+"""
+
+##############################################################################################################
+#
+#           Importables
+
+import re          # For matching the organism identifiers
+
+#
+#
+##############################################################################################################
+#
+#          Pre defined variables and things
+
+# These are the "organism identifiers", which are just the first letter of the genus and
+# the first three letters of the species. This program was designed around Drosophila
+# melanogaster, and there are annotations that have format 'gene-Dmel-CG43201'. The
+# organism identifier just lets the program know which portion of the string to take.
+organism_identifiers = ["dmel",
+                        "ecol",
+                        "hsap",
+                        "mmus",
+                        "cele"]
+
+# The organism identifiers as one regular expression, made once when this file is imported,
+# so each identifier is searched once no matter how many organisms are in the list. The .*
+# is greedy, so the match ends at the last organism identifier in the string. Case is
+# ignored, like comparing the lowercase strings.
+organism_pattern = re.compile(f".*(?:{'|'.join(re.escape(id) for id in organism_identifiers)})",
+                              re.IGNORECASE | re.DOTALL)
+
+#
+#
+##############################################################################################################
+#
+#        Functions: Checking identifiers of certain annotation types
+
+def strip_organism_identifier(identifier):
+    """
+    Given an identifier string, return the part of the identifier after the organism
+    identifier (and the character after it), uppercase, or the identifier unchanged
+    if it has no organism identifier.
+
+    <anything><organism_id>_<identifier>     ->   <identifier>                      (Flybase)
+    """
+    # Use organism_pattern to find the end of the last organism identifier in the string
+    match = organism_pattern.match(identifier)
+    # If no organism identifiers were found, then return the identifier
+    if match == None:
+        return identifier
+    # Otherwise, take the identifier after the organism identifier, starting from
+    # character 1, uppercase.
+    return identifier[match.end() + 1:].upper()
+
+def check_rna_id(identifier):
+    """
+    Given an annotation identifier string, return the identifier formatted
+    based on the qualities below.
+
+    For RNA, possible string types seen:
+
+    rna-|FlyBase|<identifier>-<sub_id>      ->   <identifier>-<sub_id>             (NCBI or Flybase)
+    rna-<some_id>_<some_number>.<integer>   ->   <some_id>_<some_number>.<integer> (NCBI identifiers)
+    rna-<organism_id>_<identifier>          ->   <identifier>                      (Flybase)
+    """
+    # Type 1 as shown in docstring
+    if "|" in identifier:
+        # If | is in the ID, then split on | and take the last element
+        return identifier.split('|')[-1]
+    # Type 2 as shown in docstring
+    # If rna- and N in identifier
+    elif "rna-" in identifier and "N" in identifier:
+        # Then simply remove the first four characters of the identifier
+        return identifier[4:]
+    # Otherwise, we consult the organism identifiers list
+    else:
+        return strip_organism_identifier(identifier)
+
+def check_cds_id(identifier):
+    """
+    Given an annotation identifier string, return the identifier cleaned up.
+
+    Possible identifier strings for coding sequences:
+
+    cds-<some_id>_<some_number>.<integer>   ->   <some_id>_<some_number>.<integer> (NCBI identifiers)
+    id-<organism_id>_<identifier>          ->    <identifier>                      (Flybase)
+    """
+    # Type 1: string has substring cds- and N in it
+    if "cds-" in identifier and "N" in identifier:
+        # In which case, just use the string without the first four characters
+        return identifier[4:]
+    # If the substring id_N is in the string
+    elif "id_N" in identifier:
+        # Then just use the string without the first three characters
+        return identifier[3:]
+    # Otherwise, leave the identifier alone
+    return identifier
+
+def check_exon_id(identifier):
+    """
+    Given an annotation identifier string, return the identifier cleaned up.
+
+    Possible annotation types for exon:
+
+    exon-|FlyBase|<identifier>-<sub_id>      ->   <identifier>-<sub_id>             (NCBI or Flybase)
+    exon-<some_id>_<some_number>.<integer>   ->   <some_id>_<some_number>.<integer> (NCBI identifiers)
+    exon-<organism_id>_<identifier>          ->   <identifier>                      (Flybase)
+    """
+    # Type 1 as shown in docstring
+    if "|" in identifier:
+        # If | is in the ID, then split on | and take the last element
+        return identifier.split('|')[-1]
+    # Or if the substrings exon- and N are in the ID
+    elif "exon-" in identifier and "N" in identifier:
+        # Then take the string without the first five characters
+        return identifier[5:]
+    # Or if the substring id-N is in the string
+    elif "id-N" in identifier:
+        # Then take the string without the first three characters
+        return identifier[3:]
+    # If these fail, then consult the organism identifiers list
+    else:
+        return strip_organism_identifier(identifier)
+
+def check_gene_id(identifier):
+    """
+    Given an annotation identifier string, return the identifier cleaned up.
+
+    Possible annotation types for gene:
+
+    gene-<some_id>_<some_number>.<integer>   ->   <some_id>_<some_number>.<integer> (NCBI identifiers)
+    id-<some_id>_<some_number>.<integer>   ->   <some_id>_<some_number>.<integer> (NCBI identifiers)
+    gene-<organism_id>_<identifier>          ->   <identifier>                      (Flybase)
+    """
+    # Type 1 as shown in docstring
+    # If the substrings gene- and N are in the identifier string
+    if "gene-" in identifier and "N" in identifier:
+        # Then take the string without the first five characters
+        return identifier[5:]
+    # Or if the substring id-N is in the string
+    elif "id-N" in identifier:
+        # Then take the string without the first three characters
+        return identifier[3:]
+    # If these fail, then consult the organism identifiers list
+    else:
+        return strip_organism_identifier(identifier)
+
+def check_other_id(identifier):
+    """
+    Given an annotation identifier string, return the identifier cleaned up.
+    This function makes no assumption about the type of annotation, so the
+    RNA, CDS, EXON and GENE checkers are tried in order, and the first one
+    that changes the identifier is used.
+    """
+    # Loop over the checkers for the known annotation types
+    for checker in (check_rna_id, check_cds_id, check_exon_id, check_gene_id):
+        # Try the checker on the identifier
+        new_identifier = checker(identifier)
+        # If the identifiers are not equal, then the checker did something
+        if new_identifier != identifier:
+            # So return that something
+            return new_identifier
+    # If none of these worked, the attempt the most basic annotation type: id-N
+    if "id-N" in identifier:
+        # Then take the string without the first three characters
+        return identifier[3:]
+    # If all of this fails, then just return the identifier and give up.
+    return identifier
+
+# Dictionary of the identifier checkers, used by get_type_checker(). The keys are the annotation
+# types found in the type or file names (checked in this order) and the values are the checker for
+# that type. Regions are not edited (None), and any other type uses check_other_id.
+id_checkers = {"rna" : check_rna_id,
+               "cds" : check_cds_id,
+               "exon" : check_exon_id,
+               "gene" : check_gene_id,
+               "region" : None}
+
+def get_type_checker(name):
+    """
+    Given an annotation type or a file name (like annotation_mRNA.bed), return the
+    identifier checker for the annotation type in the name (from id_checkers), or None
+    if annotations of that type should not be edited.
+    """
+    # Lower the name, so the types are found regardless of case
+    name = name.lower()
+    # Loop over the annotation types and their checkers
+    for annotation_type, checker in id_checkers.items():
+        # If the annotation type is in the name, then use its checker
+        if annotation_type in name:
+            return checker
+    # If none of these were found, then use check_other_id to just brute force the formatting
+    return check_other_id
+
+#
+#
+##############################################################################################################
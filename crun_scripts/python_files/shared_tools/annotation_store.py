@@ -0,0 +1,378 @@
+"""
+==============================================================================================================
+Python 3.8.5
+
+annotation_store.py
+==============================================================================================================
+
+This python file is not meant to be run on its own. It holds a binary copy of the annotation bed files
+(from make_annotation_files.py) that the other python files (make_annotation_files.py,
+peak_enrich_annotations.py) share, so the annotations are not read from text every run. To use it
+from one of those files, add the shared_tools folder to the path:
+
+    sys.path.append(f"{os.path.dirname(os.path.abspath(__file__))}/../shared_tools")
+    import annotation_store
+
+The store is a hidden folder (.annotation_store) in the annotation folder, with one .npy file per
+array, so each array can be memory mapped. The lines of each bed file are sorted by chromosome and
+start, and the bed files are one after the other:
+
+    file_names       :   the bed files in the annotation folder (names only)
+    file_signatures  :   the size and modification time of each bed file
+    file_stored      :   whether the lines of each file are in the store (they must have 7 columns)
+    chrom_names      :   chromosome names. The integer code of a chromosome is its position here
+    offsets          :   the lines of file i on chromosome j are lines offsets[i, j] to offsets[i, j+1]
+    longest          :   the longest line (end - start) of file i on chromosome j is longest[i, j]
+    starts           :   annotation starts (column 2)
+    ends             :   annotation ends (column 3)
+    id_bytes         :   the identifiers (column 4) of all lines, encoded and put end to end
+    id_offsets       :   the identifier of line i is id_bytes[id_offsets[i]:id_offsets[i+1]]
+    <column>_codes   :   for the score, strand and type columns (columns 5, 6 and 7), the code of
+    <column>_names       each line and the table of names the codes point to
+
+If a bed file changes, the store is made again the next time it is loaded. Loading the store only
+memory maps the arrays, so the time it takes does not depend on the number of lines.
+
+"""
+
+##############################################################################################################
+#
+#         Importables
+
+import os              # Used for checking the bed files and saving the store
+import glob            # Used for finding the bed files in the annotation folder
+import shutil          # Used for removing an old store
+import numpy as np     # Used for holding the store as arrays
+
+import file_tools      # Used to check whether the bed files changed
+
+#
+#
+##############################################################################################################
+#
+#         Pre-defined variables
+
+# The name of the store folder, inside of the annotation folder. It is hidden (it starts
+# with a period), so it is not picked up by globs looking for annotation files.
+store_name = ".annotation_store"
+
+# The number of columns in the annotation bed files: chrom, start, end, identifier, score,
+# strand, annotation type. Files with a different number of columns are not stored.
+bed_columns = 7
+
+# The columns (in computer scientist counting) that are kept as codes and a table of names,
+# since they only have a few different values.
+coded_columns = {4 : "score",
+                 5 : "strand",
+                 6 : "type"}
+
+# Stores that were already loaded, so they are only loaded once per run. The keys are
+# the annotation folders and the values are the store dictionaries.
+loaded_stores = {}
+
+#
+#
+##############################################################################################################
+#
+#         Functions
+
+def get_store_dir(annot_dir):
+    """
+    Given an annotation folder, return the path to the store folder inside of it.
+    """
+    # The store is a hidden folder in the annotation folder
+    return os.path.join(annot_dir, store_name)
+
+def get_annotation_files(annot_dir):
+    """
+    Given an annotation folder, return a sorted list of the annotation files in
+    it (every file that is not a text file, like fields.txt).
+    """
+    # Use glob to get the files in the folder, other than the text files
+    return sorted([file for file in glob.glob(f"{annot_dir}/*")
+                   if os.path.isfile(file) and not file.endswith(".txt")])
+
+def read_bed_columns(file,
+                     delimiter = '\t'):
+    """
+    Given a bed file and a delimiter, return a list of the columns of the file, where
+    each column is a list of strings (blank lines are skipped), or None if any of the
+    lines do not have bed_columns columns.
+
+    Like load_peak_files.make_peak_columns(), all of the lines are joined and split in
+    one call, and each column is a slice of the split values. The columns are only
+    slices of the lines if every line has the same number of values, so every line is
+    checked first.
+    """
+    # Open the file and read the whole thing at once, stripping each line
+    with open(file, 'r') as f:
+        lines = [line.strip() for line in f.read().split('\n')]
+        # and close the file
+        f.close()
+    # Remove the blank lines
+    lines = [line for line in lines if line != ""]
+    # If any of the lines do not have the expected columns, then the file cannot be stored
+    if any(line.count(delimiter) != bed_columns - 1 for line in lines):
+        return None
+    # Join all of the lines on the delimiter and split them once, giving every value in the lines
+    values = delimiter.join(lines).split(delimiter) if lines != [] else []
+    # Return the columns, taking every bed_columns value starting from each column
+    return [values[column::bed_columns] for column in range(bed_columns)]
+
+def build_annotation_store(annot_dir,
+                           delimiter = '\t'):
+    """
+    Given an annotation folder and a delimiter, return the store dictionary
+    described at the top of this file, made from the bed files in the folder.
+    """
+    # Get the annotation files in the folder
+    files = get_annotation_files(annot_dir)
+    # Get the signature of each file before it is read
+    signatures = [file_tools.get_file_signature(file) for file in files]
+    # Read the columns of each file (None if the file cannot be stored)
+    file_columns = [read_bed_columns(file, delimiter = delimiter) for file in files]
+    # Initialize the chromosome codes and the code tables of the coded columns
+    chrom_codes = {}
+    column_codes = {column : {} for column in coded_columns}
+    # Initialize the lists of sorted arrays for each file
+    file_chroms = []
+    file_starts = []
+    file_ends = []
+    file_ids = []
+    file_coded = {column : [] for column in coded_columns}
+    # Loop over the columns of each file
+    for columns in file_columns:
+        # If the file cannot be stored, then it has no lines in the store
+        if columns == None:
+            columns = [[] for column in range(bed_columns)]
+        # Get the chromosome codes, starts and ends of the file as arrays. Chromosomes
+        # get the next code the first time each name is seen.
+        chroms = np.array([chrom_codes.setdefault(chrom, len(chrom_codes)) for chrom in columns[0]], dtype = np.int64)
+        starts = np.array(columns[1], dtype = str).astype(np.int64)
+        ends = np.array(columns[2], dtype = str).astype(np.int64)
+        # Sort the lines by chromosome, then by start. lexsort is stable, so lines with
+        # the same start keep the order they had in the file
+        order = np.lexsort((starts, chroms))
+        # Add the sorted columns to the lists
+        file_chroms.append(chroms[order])
+        file_starts.append(starts[order])
+        file_ends.append(ends[order])
+        file_ids.append([columns[3][i] for i in order.tolist()])
+        # Loop over the coded columns
+        for column, codes in column_codes.items():
+            # and add the sorted codes of the column
+            file_coded[column].append(np.array([codes.setdefault(value, len(codes)) for value in columns[column]],
+                                               dtype = np.int64)[order])
+    # Initialize the offsets and the longest lines of each file and chromosome
+    offsets = np.zeros((len(files), len(chrom_codes) + 1), dtype = np.int64)
+    longest = np.zeros((len(files), len(chrom_codes)), dtype = np.int64)
+    # Initialize the first line of the current file
+    first = 0
+    # Loop over the sorted chromosome codes of each file
+    for i, chroms in enumerate(file_chroms):
+        # The lines of each chromosome start where the chromosome codes change
+        offsets[i] = first + np.searchsorted(chroms, np.arange(len(chrom_codes) + 1), side = "left")
+        # If the file has any lines
+        if len(chroms) > 0:
+            # Then get the longest line on each chromosome, using the lengths of the lines
+            np.maximum.at(longest[i], chroms, file_ends[i] - file_starts[i])
+        # Move the first line to the next file
+        first += len(chroms)
+    # Encode the identifiers and put them end to end
+    encoded_ids = [identifier.encode() for ids in file_ids for identifier in ids]
+    id_offsets = np.zeros(len(encoded_ids) + 1, dtype = np.int64)
+    id_offsets[1:] = np.cumsum([len(identifier) for identifier in encoded_ids])
+    # Make the store dictionary
+    store = {"file_names" : np.array([os.path.basename(file) for file in files], dtype = str),
+             "file_signatures" : np.array(signatures, dtype = np.int64).reshape(len(files), 2),
+             "file_stored" : np.array([columns != None for columns in file_columns], dtype = bool),
+             "chrom_names" : np.array(list(chrom_codes.keys()), dtype = str),
+             "offsets" : offsets,
+             "longest" : longest,
+             "starts" : np.concatenate(file_starts) if files != [] else np.zeros(0, dtype = np.int64),
+             "ends" : np.concatenate(file_ends) if files != [] else np.zeros(0, dtype = np.int64),
+             "id_bytes" : np.frombuffer(b"".join(encoded_ids), dtype = np.uint8),
+             "id_offsets" : id_offsets}
+    # Add the codes and the table of names for each coded column
+    for column, name in coded_columns.items():
+        store[f"{name}_codes"] = np.concatenate(file_coded[column]) if files != [] else np.zeros(0, dtype = np.int64)
+        store[f"{name}_names"] = np.array(list(column_codes[column].keys()), dtype = str)
+    # Return the store dictionary
+    return store
+
+def save_annotation_store(store,
+                          annot_dir):
+    """
+    Given a store dictionary and the annotation folder, save the store. The arrays are
+    written to a temporary folder first, which then replaces the store folder, so a partly
+    written store is never read. If the store cannot be written (for example, the folder
+    is read only), it is not saved and will be made again next time.
+    """
+    # Get the path to the store folder
+    store_dir = get_store_dir(annot_dir)
+    # The temporary folders have the process id in them, so two processes do not write to the same folder
+    temp_dir = f"{store_dir}.{os.getpid()}.tmp"
+    old_dir = f"{store_dir}.{os.getpid()}.old"
+    # Try to write the store
+    try:
+        # Make the temporary folder
+        os.makedirs(temp_dir, exist_ok = True)
+        # Save each array to its own .npy file, so it can be memory mapped
+        for key, value in store.items():
+            if key not in ("file_codes", "column_names"):
+                np.save(os.path.join(temp_dir, f"{key}.npy"), value, allow_pickle = False)
+        # If there is an old store, then move it out of the way
+        if os.path.exists(store_dir):
+            os.replace(store_dir, old_dir)
+        # Move the temporary folder to the store folder
+        os.replace(temp_dir, store_dir)
+    # If the store cannot be written, then move on
+    except OSError:
+        pass
+    # Remove the temporary and old folders, if they are still there
+    for folder in (temp_dir, old_dir):
+        if os.path.exists(folder):
+            shutil.rmtree(folder, ignore_errors = True)
+
+def read_annotation_store(annot_dir):
+    """
+    Given an annotation folder, return the store dictionary with the arrays memory
+    mapped (read only), or None if the store does not exist or cannot be read.
+    """
+    # Get the path to the store folder
+    store_dir = get_store_dir(annot_dir)
+    # If the store folder does not exist, then there is no store
+    if not os.path.isdir(store_dir):
+        return None
+    # Initialize the store dictionary
+    store = {}
+    # Try to read the store
+    try:
+        # Loop over the array files in the store folder
+        for file in glob.glob(f"{store_dir}/*.npy"):
+            # The key is the name of the file without .npy
+            key = os.path.basename(file)[:-4]
+            # Memory map the array, so only the parts that are used are read
+            store[key] = np.load(file, mmap_mode = 'r', allow_pickle = False)
+    # If the store cannot be read, then there is no store
+    except (OSError, ValueError):
+        return None
+    # If any of the arrays are missing, then there is no store
+    if any(f"{key}.npy" not in os.listdir(store_dir) for key in ["file_names", "offsets", "longest", "id_offsets", "type_names"]):
+        return None
+    # Return the store dictionary
+    return store
+
+def is_store_current(store,
+                     annot_dir):
+    """
+    Given a store dictionary and the annotation folder, return True if the store
+    has the same annotation files as the folder, and none of them have changed.
+    """
+    # Get the annotation files in the folder
+    files = get_annotation_files(annot_dir)
+    # If the files are not the same as the stored files, then the store is out of date
+    if [os.path.basename(file) for file in files] != store["file_names"].tolist():
+        return False
+    # Loop over the files and their signatures
+    for file, signature in zip(files, store["file_signatures"]):
+        # If the file has changed, then the store is out of date
+        if not np.array_equal(file_tools.get_file_signature(file), signature):
+            return False
+    # If none of the files changed, then the store is current
+    return True
+
+def load_annotation_store(annot_dir,
+                          delimiter = '\t'):
+    """
+    Given an annotation folder and a delimiter, return the store dictionary for the
+    folder, with a file_codes dictionary added (key = file name, value = integer code)
+    and a column_names dictionary (key = coded column, value = list of its names).
+
+    The store folder is used if none of the bed files have changed. Otherwise, the store
+    is made with build_annotation_store() and saved with save_annotation_store(). Stores
+    are kept in loaded_stores, so each folder is only loaded once per run.
+    """
+    # If the store was already loaded in this run, then use it
+    if annot_dir in loaded_stores:
+        return loaded_stores[annot_dir]
+    # Try to read the store
+    store = read_annotation_store(annot_dir)
+    # If there is no store, or the bed files have changed
+    if store == None or not is_store_current(store, annot_dir):
+        # Then make the store, save it, and memory map the saved arrays
+        store = build_annotation_store(annot_dir, delimiter = delimiter)
+        save_annotation_store(store, annot_dir)
+        # If the store was saved, then use the memory mapped arrays
+        saved_store = read_annotation_store(annot_dir)
+        if saved_store != None:
+            store = saved_store
+    # Get the code of each file (its position in file_names)
+    store["file_codes"] = {str(name) : code for code, name in enumerate(store["file_names"])}
+    # Get the names of each coded column as a list, so lines do not look them up in the arrays
+    store["column_names"] = {column : store[f"{name}_names"].tolist() for column, name in coded_columns.items()}
+    # Keep the store for the rest of the run
+    loaded_stores[annot_dir] = store
+    # and return it
+    return store
+
+def get_stored_row(store,
+                   row):
+    """
+    Given a store dictionary and a line number in the store, return the line as a
+    list of strings (split line), like the line in the bed file.
+    """
+    # Get the identifier of the line from the identifier bytes
+    identifier = store["id_bytes"][store["id_offsets"][row]:store["id_offsets"][row + 1]].tobytes().decode()
+    # Initialize the split line with the chromosome (found later), start, end and identifier
+    split_line = ["", str(store["starts"][row]), str(store["ends"][row]), identifier]
+    # Add the coded columns, turning the codes back into names with the lists from load_annotation_store()
+    for column, name in coded_columns.items():
+        split_line.append(store["column_names"][column][store[f"{name}_codes"][row]])
+    # Return the split line
+    return split_line
+
+class StoredLines:
+    """
+    The lines of one file and chromosome in a store, formatted one at a time when
+    they are used, so loading a store does not format every line. Each line is kept
+    once it is formatted, since a line can overlap many peaks. Used like a list:
+
+        lines = StoredLines(store, chrom, lo, hi, format_row)
+        lines[i]      ->  format_row(split line of store line lo + i)
+        len(lines)    ->  hi - lo
+    """
+    def __init__(self,
+                 store,
+                 chrom,
+                 lo,
+                 hi,
+                 format_row):
+        # Keep the store, the chromosome, the lines, and the formatting function
+        self.store = store
+        self.chrom = chrom
+        self.lo = lo
+        self.hi = hi
+        self.format_row = format_row
+        # Initialize the dictionary of formatted lines
+        self.formatted = {}
+
+    def __len__(self):
+        # The number of lines
+        return self.hi - self.lo
+
+    def __getitem__(self,
+                    i):
+        # If the line was already formatted, then return it
+        if i in self.formatted:
+            return self.formatted[i]
+        # Otherwise, get the split line of the store line, and fill in the chromosome
+        split_line = get_stored_row(self.store, self.lo + i)
+        split_line[0] = self.chrom
+        # Format the line, keep it, and return it
+        self.formatted[i] = self.format_row(split_line)
+        return self.formatted[i]
+
+#
+#
+##############################################################################################################
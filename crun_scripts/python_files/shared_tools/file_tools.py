@@ -0,0 +1,97 @@
+"""
+==============================================================================================================
+Python 3.8.5
+
+file_tools.py
+==============================================================================================================
+
+This python file is not meant to be run on its own. It holds the file handling that the caches and
+the rewritten files of the other python files share. To use it from one of those files, add the
+shared_tools folder to the path:
+
+    sys.path.append(f"{os.path.dirname(os.path.abspath(__file__))}/../shared_tools")
+    import file_tools
+
+get_file_signature() gives the size and modification time of a file. The caches (peak_max_index.py,
+annotation_store.py, genome_metadata.py) keep the signatures of the files they were made from, and
+are made again when a signature changes.
+
+atomic_write() opens a hidden temporary file next to a file, and moves it onto the file once it
+is written, so the file is always either the old version or the new version:
+
+    with file_tools.atomic_write(file) as f:
+        f.writelines(lines)
+
+"""
+
+##############################################################################################################
+#
+#         Importables
+
+import os              # Used for getting the file signatures and replacing the files
+import shutil          # Used for keeping the permissions of rewritten files
+import contextlib      # Used for making atomic_write() a with statement
+import numpy as np     # Used for holding the file signatures
+
+#
+#
+##############################################################################################################
+#
+#         Functions
+
+def get_file_signature(file):
+    """
+    Given a file, return an array with the size and the modification time (in nanoseconds)
+    of the file. If either changes, anything made from the file has to be made again.
+    """
+    # Use os.stat to get the information about the file
+    info = os.stat(file)
+    # and return the size and modification time
+    return np.array([info.st_size, info.st_mtime_ns], dtype = np.int64)
+
+def get_temp_file(file):
+    """
+    Given a file, return the path to its temporary file. The temporary file is in the
+    same folder (so os.replace() does not cross file systems), is hidden (so it is not
+    globbed as one of the files in the folder), and has the process id in it (so two
+    processes do not write to the same temporary file).
+    """
+    # Split the file into its directory and its name
+    directory, name = os.path.split(file)
+    # and return the hidden temporary file
+    return os.path.join(directory, f".{name}.{os.getpid()}.tmp")
+
+@contextlib.contextmanager
+def atomic_write(file,
+                 mode = 'w',
+                 keep_mode = False):
+    """
+    Given a file, (optional) the mode to open it with ('w' or 'wb'), and (optional) whether
+    to keep the permissions of the file, open the temporary file of the file (from
+    get_temp_file()) for a with statement. When the with statement finishes, the temporary
+    file replaces the file in one step (os.replace). If anything goes wrong, the temporary
+    file is removed, the file is left as it was, and the error is raised.
+    """
+    # Get the temporary file
+    temp_file = get_temp_file(file)
+    # Try to write the temporary file and replace the file
+    try:
+        # Open the temporary file and give it to the with statement
+        with open(temp_file, mode) as f:
+            yield f
+            # Close the file once it is written
+            f.close()
+        # If asked, give the temporary file the same permissions as the file
+        if keep_mode and os.path.exists(file):
+            shutil.copymode(file, temp_file)
+        # Replace the file with the temporary file
+        os.replace(temp_file, file)
+    # Whether or not that worked
+    finally:
+        # Remove the temporary file if it is still there
+        if os.path.exists(temp_file):
+            os.remove(temp_file)
+
+#
+#
+##############################################################################################################
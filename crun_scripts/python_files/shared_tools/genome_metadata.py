@@ -0,0 +1,322 @@
+"""
+==============================================================================================================
+Python 3.8.5
+
+genome_metadata.py
+==============================================================================================================
+
+This python file is not meant to be run on its own. It holds the genome metadata that the other python
+files (count_genome_chars.py, find_plot_regions.py) share, so the chromosome names and lengths are only
+worked out once. To use it from one of those files, add the shared_tools folder to the path:
+
+    sys.path.append(f"{os.path.dirname(os.path.abspath(__file__))}/../shared_tools")
+    import genome_metadata
+
+The metadata is saved as genome_metadata.npz in the same folder as the .genome file, and holds:
+
+    chrom_names        :   chromosome names, in the order of the .genome file
+    chrom_lengths      :   number of nucleotides in each chromosome
+    chrom_codes        :   the integer code of each chromosome, which is its position in chrom_names.
+                           The peak files can be loaded with these codes (see load_peak_files.py),
+                           so chromosomes are compared as integers instead of names
+    genome_file        :   the .genome file the metadata is for, relative to the folder of the metadata
+    genome_signature   :   the size and modification time of the .genome file
+    source_files       :   the files the metadata was made from (FASTA files or a .genome file),
+                           relative to the folder of the metadata
+    source_signatures  :   the size and modification time of each source file
+    source_checksums   :   the md5 checksum of each source file (of the decompressed FASTA file, for
+                           gzipped FASTA files). count_genome_chars.py finds these while it counts the
+                           FASTA files, and get_file_checksum() is only used for .genome files
+
+count_genome_chars.py writes the metadata from the FASTA files when it writes length.genome. The
+metadata is only used for the .genome file it was made for, and only if neither that .genome file nor
+the source files have changed. Otherwise load_genome_metadata() reads the .genome file it was given,
+so the chromosomes are always in the order of that file. If the metadata was made from FASTA files
+that have not changed, and the .genome file has the same chromosomes and lengths (like
+length_sort.genome, which is length.genome sorted), the new metadata keeps the FASTA files as its
+sources. If the FASTA files have changed, the user is told, and the metadata is not replaced, so it
+keeps pointing at the FASTA files until count_genome_chars.py is run again.
+
+"""
+
+##############################################################################################################
+#
+#         Importables
+
+import os              # Used for checking the source files and saving the metadata
+import hashlib         # Used for the checksums of the source files
+import numpy as np     # Used for holding the metadata as arrays
+
+import file_tools      # Used to check whether the source files changed, and to save the metadata
+
+#
+#
+##############################################################################################################
+#
+#         Pre-defined variables
+
+# The name of the metadata file, in the same folder as the .genome file
+metadata_name = "genome_metadata.npz"
+
+# The arrays that every metadata file holds (see the top of this file)
+metadata_keys = ["chrom_names",
+                 "chrom_lengths",
+                 "chrom_codes",
+                 "genome_file",
+                 "genome_signature",
+                 "source_files",
+                 "source_signatures",
+                 "source_checksums"]
+
+# Metadata that was already loaded, so it is only loaded once per run. The keys are
+# the .genome files and the values are the metadata dictionaries.
+loaded_metadata = {}
+
+#
+#
+##############################################################################################################
+#
+#         Functions
+
+def get_metadata_file(genome_file):
+    """
+    Given a .genome file (or a folder path ending in /), return the path to the metadata file.
+    """
+    # The metadata file is in the same folder as the .genome file
+    return os.path.join(os.path.dirname(genome_file), metadata_name)
+
+def get_file_checksum(file,
+                      block_size = 1 << 20):
+    """
+    Given a file and (optional) the number of bytes to read at a time, return the
+    md5 checksum of the file as a hexadecimal string.
+    """
+    # Initialize the md5 checksum
+    checksum = hashlib.md5()
+    # Open the file, reading bytes, call it f
+    with open(file, 'rb') as f:
+        # Read the file one block at a time, and add each block to the checksum
+        for block in iter(lambda: f.read(block_size), b""):
+            checksum.update(block)
+        # Close the file
+        f.close()
+    # Return the checksum as a string
+    return checksum.hexdigest()
+
+def make_genome_metadata(chrom_names,
+                         chrom_lengths,
+                         source_files,
+                         genome_file,
+                         checksums = None):
+    """
+    Given a list of chromosome names, a list of chromosome lengths, a list of the files
+    they came from, the .genome file the metadata is for, and (optional) the md5 checksums
+    of the source files (found with get_file_checksum() if not given), return the metadata
+    dictionary described at the top of this file.
+    """
+    # If the checksums were not given
+    if checksums == None:
+        # Then get the checksum of each source file
+        checksums = [get_file_checksum(file) for file in source_files]
+    # Return the metadata dictionary. The source files are kept by name, since they are
+    # in the same folder as the metadata
+    return {"chrom_names" : np.array(chrom_names, dtype = str),
+            "chrom_lengths" : np.array(chrom_lengths, dtype = np.int64),
+            "chrom_codes" : np.arange(len(chrom_names), dtype = np.int64),
+            "genome_file" : np.array(os.path.basename(genome_file), dtype = str),
+            "genome_signature" : file_tools.get_file_signature(genome_file),
+            "source_files" : np.array([os.path.basename(file) for file in source_files], dtype = str),
+            "source_signatures" : np.array([file_tools.get_file_signature(file) for file in source_files],
+                                           dtype = np.int64).reshape(len(source_files), 2),
+            "source_checksums" : np.array(checksums, dtype = str)}
+
+def save_genome_metadata(metadata,
+                         metadata_file):
+    """
+    Given a metadata dictionary and the path to the metadata file, save the metadata.
+    The metadata is written to a temporary file first and then moved into place, so a
+    partly written file is never read. If the metadata cannot be written (for example,
+    the folder is read only), it is not saved and will be made again next time.
+    """
+    # Try to write the metadata
+    try:
+        # Open the metadata file with file_tools.atomic_write(), writing bytes, and save the arrays to it
+        with file_tools.atomic_write(metadata_file, 'wb') as f:
+            np.savez(f, **metadata)
+    # If the metadata cannot be written, then move on
+    except OSError:
+        pass
+
+def read_genome_metadata(metadata_file):
+    """
+    Given the path to a metadata file, return the metadata dictionary, or None if the
+    metadata file does not exist, cannot be read, or is missing any of metadata_keys
+    (it was made by an older version of these files).
+    """
+    # If the metadata file does not exist, then there is no metadata
+    if not os.path.exists(metadata_file):
+        return None
+    # Try to read the metadata file
+    try:
+        with np.load(metadata_file, allow_pickle = False) as data:
+            # Turn the npz file into a dictionary of arrays
+            metadata = {key : data[key] for key in data.files}
+    # If the metadata file cannot be read, then there is no metadata
+    except (OSError, ValueError, KeyError):
+        return None
+    # If any of the arrays are missing, then there is no metadata
+    if any(key not in metadata for key in metadata_keys):
+        return None
+    # Return the metadata dictionary
+    return metadata
+
+def is_metadata_current(metadata,
+                        directory):
+    """
+    Given a metadata dictionary and the folder it is in, return True if all of the
+    source files still exist and have not changed, and False otherwise.
+    """
+    # Loop over the source files and their signatures
+    for file, signature in zip(metadata["source_files"], metadata["source_signatures"]):
+        # Get the path to the source file
+        path = os.path.join(directory, str(file))
+        # If the file is gone or has changed, then the metadata is out of date
+        if not os.path.exists(path) or not np.array_equal(file_tools.get_file_signature(path), signature):
+            return False
+    # If all of the source files are the same, then the metadata is current
+    return True
+
+def is_metadata_for_genome_file(metadata,
+                                genome_file):
+    """
+    Given a metadata dictionary and a .genome file, return True if the metadata was made
+    for the .genome file and the .genome file has not changed since, and False otherwise.
+    """
+    # The metadata has to be for a .genome file with the same name
+    if str(metadata["genome_file"]) != os.path.basename(genome_file):
+        return False
+    # and the .genome file has to have the same size and modification time
+    return np.array_equal(file_tools.get_file_signature(genome_file), metadata["genome_signature"])
+
+def is_metadata_from_fasta(metadata):
+    """
+    Given a metadata dictionary, return True if it was made from FASTA files (by
+    count_genome_chars.py), and False if it was made from its .genome file.
+    """
+    # Metadata made from a .genome file has that .genome file as its only source
+    return str(metadata["genome_file"]) not in metadata["source_files"].tolist()
+
+def has_same_chromosomes(metadata,
+                         chrom_names,
+                         chrom_lengths):
+    """
+    Given a metadata dictionary, a list of chromosome names and a list of chromosome
+    lengths, return True if the metadata has the same chromosomes with the same lengths
+    (in any order), and False otherwise.
+    """
+    # Pair the names and lengths of the metadata and of the lists
+    stored = zip(metadata["chrom_names"].tolist(), metadata["chrom_lengths"].tolist())
+    given = zip(chrom_names, chrom_lengths)
+    # and compare them, ignoring the order
+    return sorted(stored) == sorted(given)
+
+def read_genome_file(genome_file,
+                     delimiter = '\t'):
+    """
+    Given a .genome file and a delimiter, return a list of the chromosome
+    names and a list of the chromosome lengths, in the order of the file.
+    """
+    # Initialize the lists of names and lengths
+    chrom_names = []
+    chrom_lengths = []
+    # Open the .genome file
+    with open(genome_file, 'r') as f:
+        # Loop over the lines in the file
+        for line in f:
+            # Strip the newline character and split on the delimiter
+            line = line.strip().split(delimiter)
+            # Skip any blank lines
+            if line == [""]:
+                continue
+            # Add the name and the length of the chromosome to the lists
+            chrom_names.append(line[0])
+            chrom_lengths.append(int(line[1]))
+        # Close the file
+        f.close()
+    # Return the lists of names and lengths
+    return chrom_names, chrom_lengths
+
+def load_genome_metadata(genome_file,
+                         delimiter = '\t'):
+    """
+    Given a .genome file and a delimiter, return the metadata dictionary.
+
+    The metadata file in the folder of the .genome file is used if it was made for this
+    .genome file, and neither the .genome file nor the source files have changed. Otherwise,
+    the metadata is made from the .genome file (in the order of the file) and saved, so the
+    next run can use it:
+
+    -> If the saved metadata was made from FASTA files that have not changed, and the .genome
+       file has the same chromosomes and lengths, the FASTA files are kept as the sources.
+    -> If the saved metadata was made from FASTA files that have changed, the user is told,
+       and the metadata is not saved over, so the FASTA files are still checked on the next
+       run (and the user is told each time until count_genome_chars.py is run again).
+    -> If the saved metadata was made from FASTA files and the .genome file has different
+       chromosomes, the metadata is not saved over either.
+
+    The metadata is kept in loaded_metadata, so each .genome file is only loaded once per run.
+    """
+    # If the metadata was already loaded in this run, then use it
+    if genome_file in loaded_metadata:
+        return loaded_metadata[genome_file]
+    # Get the path to the metadata file and the folder it is in
+    metadata_file = get_metadata_file(genome_file)
+    directory = os.path.dirname(metadata_file)
+    # Try to read the metadata file
+    saved = read_genome_metadata(metadata_file)
+    # Check whether the source files of the saved metadata have changed
+    current = saved != None and is_metadata_current(saved, directory)
+    # If the saved metadata is current and was made for this .genome file, then use it
+    if current and is_metadata_for_genome_file(saved, genome_file):
+        metadata = saved
+    # Otherwise, make the metadata from the .genome file
+    else:
+        # Check whether the saved metadata was made from FASTA files
+        from_fasta = saved != None and is_metadata_from_fasta(saved)
+        # If it was, and they have changed, tell the user that the .genome file may be out of date
+        if from_fasta and not current:
+            print(f"The FASTA files in {directory} have changed since the .genome file was made. "
+                  f"Please run count_genome_chars.py again.")
+        # Read the chromosome names and lengths, in the order of the .genome file
+        chrom_names, chrom_lengths = read_genome_file(genome_file, delimiter = delimiter)
+        # If the FASTA files have not changed and have the same chromosomes as the .genome file
+        if from_fasta and current and has_same_chromosomes(saved, chrom_names, chrom_lengths):
+            # Then keep the FASTA files (and their checksums) as the sources, and save the metadata
+            metadata = make_genome_metadata(chrom_names,
+                                            chrom_lengths,
+                                            [os.path.join(directory, str(file)) for file in saved["source_files"]],
+                                            genome_file,
+                                            checksums = saved["source_checksums"].tolist())
+            save_genome_metadata(metadata, metadata_file)
+        # Otherwise, the .genome file is the source
+        else:
+            metadata = make_genome_metadata(chrom_names, chrom_lengths, [genome_file], genome_file)
+            # Save it, unless that would replace the metadata made from the FASTA files
+            if not from_fasta:
+                save_genome_metadata(metadata, metadata_file)
+    # Keep the metadata for the rest of the run
+    loaded_metadata[genome_file] = metadata
+    # and return it
+    return metadata
+
+def get_chrom_lengths(metadata):
+    """
+    Given a metadata dictionary, return a dictionary with key = chromosome name,
+    value = number of nucleotides, in the order of the chromosome codes.
+    """
+    # Zip the names and lengths into a dictionary
+    return dict(zip(metadata["chrom_names"].tolist(), metadata["chrom_lengths"].tolist()))
+
+#
+#
+##############################################################################################################
@@ -0,0 +1,311 @@
+"""
+==============================================================================================================
+Python 3.8.5
+
+load_peak_files.py
+==============================================================================================================
+
+This python file is not meant to be run on its own. It holds a loader that the other python files
+(filter_macs3out_files.py, find_plot_regions.py, get_peak_maxs.py, peak_enrich_annotations.py) share
+for reading peak files. To use it from one of those files, add the shared_tools folder to the path:
+
+    sys.path.append(f"{os.path.dirname(os.path.abspath(__file__))}/../shared_tools")
+    import load_peak_files
+
+The supported file types are narrowPeak and xls files from MACS3, and bedgraph files. Instead of
+splitting each line of a file in Python, the whole file is read at once, split once, and turned into
+columns of NumPy arrays:
+
+    chrom          :   integer chromosome codes (index into chrom_names)
+    chrom_names    :   list of chromosome names, in the order they appear in the file, or in the
+                       order of the chrom_names given to the loader (like the chromosome names of
+                       shared_tools/genome_metadata.py, so the codes are the same for every file)
+    chromStart     :   int64 region starts
+    chromEnd       :   int64 region ends
+    ...            :   the other columns of the file type (see peak_file_layouts)
+    lines          :   the data lines of the file, without the newline character
+
+Comment lines (#), track/browser lines, blank lines, and the xls header line are skipped, and the
+line endings (\n or \r\n) are removed from the lines. Only the columns that are asked for (with
+column_names) are converted, so the other columns of a file cost nothing but the split.
+
+For files that are too large to load at once, iter_peak_chunks() yields the same columns
+for chunks of lines, so only one chunk is held in memory at a time.
+
+"""
+
+##############################################################################################################
+#
+#         Importables
+
+import numpy as np     # Used for holding the columns of the peak files as arrays
+
+#
+#
+##############################################################################################################
+#
+#         Pre-defined variables
+
+# File extensions that the loader will recognize. The keys are file extensions and
+# the values are the file type (the keys of the peak_file_layouts dictionary).
+peak_extensions = {"narrowPeak" : "narrowPeak",
+                   "xls" : "xls",
+                   "bg" : "bedgraph",
+                   "bdg" : "bedgraph",
+                   "bedgraph" : "bedgraph"}
+
+# Dictionary containing the columns (in computer scientist counting) of each file type.
+# The values are (column name, type), where the type is used to convert the column
+# from strings. If you add a file type here, add its extensions to peak_extensions.
+peak_file_layouts = {"narrowPeak" : {0 : ("chrom", str),                # For info about the narrowPeak
+                                     1 : ("chromStart", np.int64),      # format, go to the UCSC
+                                     2 : ("chromEnd", np.int64),        # GenomeBrowser site
+                                     3 : ("name", str),
+                                     4 : ("score", np.int64),
+                                     5 : ("strand", str),
+                                     6 : ("signalValue", np.float64),
+                                     7 : ("pValue", np.float64),
+                                     8 : ("qValue", np.float64),
+                                     9 : ("peak", np.int64)},
+                     "xls" : {0 : ("chrom", str),                       # MACS3 xls output. The p and q
+                              1 : ("chromStart", np.int64),             # values are -log base 10, like
+                              2 : ("chromEnd", np.int64),               # in the narrowPeak files
+                              3 : ("length", np.int64),
+                              4 : ("abs_summit", np.int64),
+                              5 : ("pileup", np.float64),
+                              6 : ("pValue", np.float64),
+                              7 : ("fold_enrichment", np.float64),
+                              8 : ("qValue", np.float64),
+                              9 : ("name", str)},
+                     "bedgraph" : {0 : ("chrom", str),
+                                   1 : ("chromStart", np.int64),
+                                   2 : ("chromEnd", np.int64),
+                                   3 : ("value", np.float64)}}
+
+#
+#
+##############################################################################################################
+#
+#         Functions
+
+def identify_peak_format(file):
+    """
+    Given a file name, return the file type (a key of peak_file_layouts)
+    using the file extension. Raise a ValueError if the extension is not
+    one of the peak_extensions.
+    """
+    # Split the file on the period and take the last element as the extension
+    extension = file.split('.')[-1]
+    # If the extension is not a recognized peak file extension
+    if extension not in peak_extensions:
+        # Then raise a value error and exit
+        raise ValueError(f"{file} does not have a peak file extension ({', '.join(peak_extensions.keys())})")
+    # Otherwise, return the file type
+    return peak_extensions[extension]
+
+def is_data_line(line,
+                 delimiter):
+    """
+    Given a line and a delimiter, return True if the line holds data, and False
+    if it is a comment, a track/browser line, a blank line, or a header line
+    (the second column is not a number).
+    """
+    # Comment lines, blank lines and track/browser lines are not data
+    if line == "" or line[0] == "#" or line.startswith("track") or line.startswith("browser"):
+        return False
+    # Split the line on the delimiter
+    split_line = line.split(delimiter)
+    # The second column of a data line is the start, which is a number
+    return len(split_line) > 1 and split_line[1].strip().isdigit()
+
+def get_layout_columns(file_format,
+                       column_names = None):
+    """
+    Given a file type and (optional) a list of column names, return a dictionary with
+    key = column (in computer scientist counting), value = (column name, type) for the
+    columns of the file type that are converted, other than the chromosome. If no column
+    names are given, then every column is converted.
+    """
+    # Use dictionary comprehension to keep the columns that were asked for
+    return {column : (name, dtype) for column, (name, dtype) in peak_file_layouts[file_format].items()
+            if name != "chrom" and (column_names == None or name in column_names)}
+
+def empty_peak_columns(file_format,
+                       column_names = None,
+                       chrom_names = None):
+    """
+    Given a file type, (optional) a list of column names, and (optional) a list of
+    chromosome names, return the dictionary of columns for a file with no data lines.
+    """
+    # Initialize the columns dictionary with the chromosome codes and names
+    columns = {"chrom" : np.zeros(0, dtype = np.int64),
+               "chrom_names" : [] if chrom_names == None else list(chrom_names),
+               "lines" : []}
+    # Loop over the converted columns of the file type
+    for name, dtype in get_layout_columns(file_format, column_names = column_names).values():
+        # and make an empty array for each of them
+        columns[name] = np.zeros(0, dtype = dtype)
+    # Return the columns dictionary
+    return columns
+
+def make_peak_columns(lines,
+                      file,
+                      delimiter,
+                      file_format,
+                      column_names = None,
+                      chrom_names = None):
+    """
+    Given a list of data lines (without line endings), the file they came from (used
+    for error messages), a delimiter, the file type, (optional) a list of the column
+    names to convert (all of them if not given), and (optional) a list of chromosome
+    names whose positions are used as the chromosome codes, return the dictionary of
+    columns described in load_peak_file().
+
+    All of the lines are joined and split in one call, and each column is a slice of
+    the split values, which is converted in one call. The chromosome codes, names and
+    lines are always in the dictionary.
+    """
+    # Get the column layout for the file type
+    layout = peak_file_layouts[file_format]
+    # If there are no data lines
+    if lines == []:
+        # Then return the empty columns
+        return empty_peak_columns(file_format, column_names = column_names, chrom_names = chrom_names)
+    # Get the number of columns from the first data line
+    column_num = lines[0].count(delimiter) + 1
+    # Make sure that the file has all of the columns for the file type
+    if column_num <= max(layout.keys()):
+        raise ValueError(f"{file} has {column_num} columns, but {file_format} files have {max(layout.keys()) + 1}")
+    # If the lines do not all have the same number of columns, then the values cannot be
+    # sliced into columns, so raise a value error
+    if any(line.count(delimiter) != column_num - 1 for line in lines):
+        raise ValueError(f"The lines in {file} do not all have {column_num} columns")
+    # Join all of the lines on the delimiter and split them once, giving every value in the lines
+    values = delimiter.join(lines).split(delimiter)
+    # Initialize the chromosome codes. The given chromosome names (if any) get their position as
+    # their code, and other chromosomes get the next code the first time each name is seen
+    chrom_codes = {}
+    for chrom in ([] if chrom_names == None else chrom_names):
+        chrom_codes.setdefault(chrom, len(chrom_codes))
+    # Initialize the columns dictionary with the chromosome codes, names and lines
+    columns = {"chrom" : np.array([chrom_codes.setdefault(chrom, len(chrom_codes)) for chrom in values[0::column_num]],
+                                  dtype = np.int64),
+               "chrom_names" : list(chrom_codes.keys()),
+               "lines" : lines}
+    # Loop over the columns that are converted
+    for column, (name, dtype) in get_layout_columns(file_format, column_names = column_names).items():
+        # Convert the values of the column to the type of that column
+        columns[name] = np.array(values[column::column_num], dtype = dtype)
+    # Return the columns dictionary
+    return columns
+
+def load_peak_file(file,
+                   delimiter = '\t',
+                   file_format = None,
+                   column_names = None,
+                   chrom_names = None):
+    """
+    Given a peak file, a delimiter, (optional) the file type (found from the
+    extension if not given), (optional) a list of the column names to convert
+    (all of them if not given), and (optional) a list of chromosome names to
+    number the chromosomes with, return a dictionary of columns, where each key is
+    a column name from peak_file_layouts and each value is a NumPy array. The
+    dictionary also holds the chromosome codes (chrom), the chromosome names
+    (chrom_names) and the data lines of the file (lines).
+
+    The file is read in one call, the data lines are split in one call, and the
+    columns are converted from strings as whole arrays.
+    """
+    # If the file type is not given
+    if file_format == None:
+        # Then use identify_peak_format() to find it from the extension
+        file_format = identify_peak_format(file)
+    # Open the file and read the whole thing at once
+    with open(file, 'r') as f:
+        lines = f.read().split('\n')
+        # and close the file
+        f.close()
+    # Initialize the number of lines that come before the data
+    skip = 0
+    # Comments and headers are at the top of the file, so skip lines until the first data line
+    while skip < len(lines) and not is_data_line(lines[skip], delimiter):
+        skip += 1
+    # Remove the lines before the data and their line endings, and remove any blank lines (like the last one)
+    lines = [line.rstrip('\r') for line in lines[skip:]]
+    lines = [line for line in lines if line != ""]
+    # Use make_peak_columns() to turn the lines into columns
+    return make_peak_columns(lines, file, delimiter, file_format,
+                             column_names = column_names, chrom_names = chrom_names)
+
+def iter_peak_chunks(file,
+                     delimiter = '\t',
+                     file_format = None,
+                     column_names = None,
+                     chrom_names = None,
+                     chunk_lines = 100000):
+    """
+    Given a peak file, a delimiter, (optional) the file type (found from the extension
+    if not given), (optional) a list of the column names to convert, (optional) a list
+    of chromosome names to number the chromosomes with, and (optional) the number of
+    lines in each chunk, yield dictionaries of columns (like load_peak_file()) for
+    chunks of at most chunk_lines data lines.
+
+    Only one chunk is held in memory at a time, so this can be used on files that are
+    too large to load at once. Chromosome codes are only meaningful within a chunk,
+    unless chrom_names is given (then the given chromosomes have the same codes in
+    every chunk).
+    """
+    # If the file type is not given
+    if file_format == None:
+        # Then use identify_peak_format() to find it from the extension
+        file_format = identify_peak_format(file)
+    # Initialize the chunk of lines
+    chunk = []
+    # Initialize the variable that says whether the first data line has been found
+    found_data = False
+    # Open the file and read it, call it f
+    with open(file, 'r') as f:
+        # Loop over the lines in the file
+        for line in f:
+            # Remove the line ending
+            line = line.rstrip('\r\n')
+            # If the first data line has not been found yet
+            if not found_data:
+                # Then skip the comment and header lines at the top of the file
+                if not is_data_line(line, delimiter):
+                    continue
+                found_data = True
+            # Skip any blank lines
+            if line == "":
+                continue
+            # Add the line to the chunk
+            chunk.append(line)
+            # If the chunk is full
+            if len(chunk) == chunk_lines:
+                # Then yield the columns of the chunk and start a new chunk
+                yield make_peak_columns(chunk, file, delimiter, file_format,
+                                column_names = column_names, chrom_names = chrom_names)
+                chunk = []
+        # Close the file
+        f.close()
+    # If there are lines left over, yield the columns of the last chunk
+    if chunk != []:
+        yield make_peak_columns(chunk, file, delimiter, file_format,
+                                column_names = column_names, chrom_names = chrom_names)
+
+def get_chrom_rows(columns,
+                   chrom):
+    """
+    Given a dictionary of columns (from load_peak_file()) and a chromosome name,
+    return a boolean array that is True for the lines on that chromosome.
+    """
+    # If the chromosome is not in the file
+    if chrom not in columns["chrom_names"]:
+        # Then no lines are on the chromosome
+        return np.zeros(len(columns["chrom"]), dtype = bool)
+    # Otherwise, compare the chromosome codes to the code of the chromosome
+    return columns["chrom"] == columns["chrom_names"].index(chrom)
+
+#
+#
+##############################################################################################################
@@ -0,0 +1,330 @@
+"""
+==============================================================================================================
+Python 3.8.5
+
+peak_max_index.py
+==============================================================================================================
+
+This python file is not meant to be run on its own. It holds an index for finding the highest value
+in a region of a peak file (narrowPeak or bedgraph), used by get_peak_maxs.py. To use it from another
+python file, add the shared_tools folder to the path:
+
+    sys.path.append(f"{os.path.dirname(os.path.abspath(__file__))}/../shared_tools")
+    import peak_max_index
+
+The index holds the lines of the file sorted by chromosome and start, and a segment tree of the
+values, so the highest value of the lines inside of a region is found in O(log n) time:
+
+    chrom_names    :   chromosome names, in the order they appear in the file
+    chrom_offsets  :   the lines of chromosome i are lines chrom_offsets[i] to chrom_offsets[i+1]
+    chrom_longest  :   the longest line (end - start) on each chromosome
+    starts         :   region starts, sorted within each chromosome
+    ends           :   region ends
+    values         :   the values that the maximum is taken of
+    tree           :   segment tree of the values (tree[1] is the maximum of all values)
+    signature      :   the size and modification time of the file the index was made from
+    value_column   :   the name of the column the values came from
+
+The index is saved next to the peak file as a hidden file (.file.narrowPeak.max_index.npz),
+and is used again until the peak file changes.
+
+"""
+
+##############################################################################################################
+#
+#         Importables
+
+import os              # Used for checking the peak file and saving the index next to it
+import numpy as np     # Used for holding the index as arrays
+
+import load_peak_files # Used to read the peak files into columns
+import file_tools      # Used to check whether the peak file changed, and to save the index
+
+#
+#
+##############################################################################################################
+#
+#         Pre-defined variables
+
+# The suffix added to the peak file name to get the index file name
+index_suffix = ".max_index.npz"
+
+# Indexes that were already loaded, so they are only loaded once per run. The keys are
+# the peak files and the values are the index dictionaries.
+loaded_indexes = {}
+
+#
+#
+##############################################################################################################
+#
+#         Functions
+
+def get_index_file(file):
+    """
+    Given a peak file, return the path to its index file. The index file is hidden
+    (it starts with a period), so it is not picked up by globs looking for peak files.
+    """
+    # Split the file into its directory and its name
+    directory, name = os.path.split(file)
+    # The index file is in the same directory, with a period before the name and the suffix after
+    return os.path.join(directory, f".{name}{index_suffix}")
+
+def build_max_tree(values):
+    """
+    Given an array of values, return a segment tree of the maxima as an array. The
+    leaves (the values) start at the first power of 2 at least as large as the number
+    of values, and node i is the maximum of nodes 2i and 2i+1. Unused leaves are -inf.
+    """
+    # Find the number of leaves, the smallest power of 2 that fits all of the values
+    size = 1
+    while size < len(values):
+        size *= 2
+    # Make the tree, with every node set to -inf
+    tree = np.full(2 * size, -np.inf)
+    # Put the values in the leaves
+    tree[size:size + len(values)] = values
+    # Fill in the tree one level at a time, from the level above the leaves to the root
+    level = size // 2
+    while level >= 1:
+        # Each node in this level is the maximum of its two children
+        tree[level:2 * level] = np.maximum(tree[2 * level:4 * level:2], tree[2 * level + 1:4 * level:2])
+        level //= 2
+    # Return the tree
+    return tree
+
+def query_tree_max(tree,
+                   lo,
+                   hi):
+    """
+    Given a segment tree from build_max_tree() and a range of positions [lo, hi),
+    return the highest value in the range, or -inf if the range is empty.
+    """
+    # The leaves start halfway through the tree
+    size = len(tree) // 2
+    # Move the range to the leaves
+    lo += size
+    hi += size
+    # Initialize the highest value
+    highest = -np.inf
+    # Climb the tree until the two ends of the range meet
+    while lo < hi:
+        # If lo is a right child, then its parent covers values outside of the range
+        if lo & 1:
+            # so use the node itself and move to the right
+            highest = max(highest, tree[lo])
+            lo += 1
+        # If hi is a right child, then the node to its left is the last one in the range
+        if hi & 1:
+            hi -= 1
+            highest = max(highest, tree[hi])
+        # Move up to the parents
+        lo //= 2
+        hi //= 2
+    # Return the highest value
+    return highest
+
+def build_max_index(file,
+                    value_column,
+                    delimiter = '\t'):
+    """
+    Given a peak file, the name of the column to take the maximum of (from
+    load_peak_files.peak_file_layouts), and a delimiter, return the index
+    dictionary described at the top of this file.
+    """
+    # Get the signature of the file before it is read
+    signature = file_tools.get_file_signature(file)
+    # Use load_peak_files.load_peak_file() to get the columns of the file that are used
+    columns = load_peak_files.load_peak_file(file,
+                                             delimiter = delimiter,
+                                             column_names = ["chromStart", "chromEnd", value_column])
+    # Sort the lines by chromosome code (the order chromosomes appear in the file), then by start
+    order = np.lexsort((columns["chromStart"], columns["chrom"]))
+    chroms = columns["chrom"][order]
+    starts = columns["chromStart"][order]
+    ends = columns["chromEnd"][order]
+    values = columns[value_column][order].astype(np.float64)
+    # Find where the lines of each chromosome begin and end in the sorted lines
+    chrom_offsets = np.searchsorted(chroms, np.arange(len(columns["chrom_names"]) + 1), side = "left")
+    # Initialize the longest line on each chromosome
+    chrom_longest = np.zeros(len(columns["chrom_names"]), dtype = np.int64)
+    # If there are any lines
+    if len(chroms) > 0:
+        # Then get the longest line on each chromosome, using the lengths of the lines
+        np.maximum.at(chrom_longest, chroms, ends - starts)
+    # Return the index dictionary
+    return {"chrom_names" : np.array(columns["chrom_names"], dtype = str),
+            "chrom_offsets" : chrom_offsets,
+            "chrom_longest" : chrom_longest,
+            "starts" : starts,
+            "ends" : ends,
+            "values" : values,
+            "tree" : build_max_tree(values),
+            "signature" : signature,
+            "value_column" : np.array(value_column)}
+
+def save_max_index(index,
+                   index_file):
+    """
+    Given an index dictionary and the path to the index file, save the index. The index
+    is written to a temporary file first and then moved into place, so a partly written
+    index is never read. If the index cannot be written (for example, the directory is
+    read only), the index is not saved and will be made again next time.
+    """
+    # Try to write the index
+    try:
+        # Open the index file with file_tools.atomic_write(), writing bytes, and save the arrays to it
+        with file_tools.atomic_write(index_file, 'wb') as f:
+            np.savez(f, **index)
+    # If the index cannot be written, then move on
+    except OSError:
+        pass
+
+def read_max_index(index_file):
+    """
+    Given the path to an index file, return the index dictionary, or None if the
+    index file does not exist or cannot be read.
+    """
+    # If the index file does not exist, then there is no index
+    if not os.path.exists(index_file):
+        return None
+    # Try to read the index file
+    try:
+        with np.load(index_file, allow_pickle = False) as data:
+            # Turn the npz file into a dictionary of arrays
+            return {key : data[key] for key in data.files}
+    # If the index file cannot be read, then there is no index
+    except (OSError, ValueError):
+        return None
+
+def load_max_index(file,
+                   value_column,
+                   delimiter = '\t'):
+    """
+    Given a peak file, the name of the column to take the maximum of, and a delimiter,
+    return the index dictionary for the file.
+
+    The index is loaded from the index file if it was made from the same version of the
+    peak file and the same column. Otherwise, it is made with build_max_index() and saved
+    with save_max_index(). Indexes are kept in loaded_indexes, so each file is only loaded
+    once per run.
+    """
+    # If the index was already loaded in this run, then use it
+    if file in loaded_indexes and str(loaded_indexes[file]["value_column"]) == value_column:
+        return loaded_indexes[file]
+    # Get the path to the index file
+    index_file = get_index_file(file)
+    # Try to read the index file
+    index = read_max_index(index_file)
+    # If there is no index, or it was made from a different file or column
+    if (index == None
+            or not np.array_equal(index["signature"], file_tools.get_file_signature(file))
+            or str(index["value_column"]) != value_column):
+        # Then make the index and save it
+        index = build_max_index(file, value_column, delimiter = delimiter)
+        save_max_index(index, index_file)
+    # Get the position of each chromosome name, so chromosomes are found without searching
+    index["chrom_codes"] = {str(name) : code for code, name in enumerate(index["chrom_names"])}
+    # Keep the index for the rest of the run
+    loaded_indexes[file] = index
+    # and return it
+    return index
+
+def get_region_rows(index,
+                    chrom,
+                    start,
+                    end):
+    """
+    Given an index dictionary from load_max_index(), a chromosome, and the start and
+    end of a region, return a 3-tuple (lo, mid, hi) of positions in the index, or None
+    if the chromosome is not in the index.
+
+    The lines from lo to hi start inside of the region. The lines from lo to mid start
+    at least the longest line length before the end of the region, so they must also end
+    inside of it. The lines from mid to hi have to be checked one by one.
+    """
+    # If the chromosome is not in the file, then no lines are in the region
+    if chrom not in index["chrom_codes"]:
+        return None
+    # Get the code of the chromosome
+    code = index["chrom_codes"][chrom]
+    # Get the first and last lines of the chromosome
+    first = index["chrom_offsets"][code]
+    last = index["chrom_offsets"][code + 1]
+    # Get the starts of the lines on the chromosome
+    starts = index["starts"][first:last]
+    # Find the lines that start inside of the region
+    lo = first + np.searchsorted(starts, start, side = "left")
+    hi = first + np.searchsorted(starts, end, side = "right")
+    # Find the lines that start early enough that they have to end inside of the region
+    mid = first + np.searchsorted(starts, end - index["chrom_longest"][code], side = "right")
+    # and return the positions, with mid between lo and hi
+    return lo, min(max(mid, lo), hi), hi
+
+def query_region_max(index,
+                     chrom,
+                     start,
+                     end):
+    """
+    Given an index dictionary from load_max_index(), a chromosome, and the start and
+    end of a region, return the highest value of the lines that are inside of the region
+    (start <= line start and line end <= end), or None if no lines are inside of it.
+
+    The lines found by get_region_rows() that must end inside of the region get their
+    maximum from the segment tree. Only the few lines starting close to the end of the
+    region are checked one by one.
+    """
+    # Use get_region_rows() to find the lines starting in the region
+    rows = get_region_rows(index, chrom, start, end)
+    # If the chromosome is not in the file, then no lines are in the region
+    if rows == None:
+        return None
+    lo, mid, hi = rows
+    # Get the highest value of the lines that must end in the region from the segment tree
+    highest = query_tree_max(index["tree"], lo, mid) if mid > lo else None
+    # Check the rest of the lines one by one, keeping those that end inside of the region
+    tail = index["values"][mid:hi][index["ends"][mid:hi] <= end]
+    # If any of those lines are inside of the region
+    if len(tail) > 0:
+        # Then update the highest value
+        highest = tail.max() if highest == None else max(highest, tail.max())
+    # Return the highest value, as a python float, or None if no lines were in the region
+    return None if highest == None else float(highest)
+
+def query_region_values(index,
+                        chrom,
+                        start,
+                        end):
+    """
+    Given an index dictionary from load_max_index(), a chromosome, and the start and
+    end of a region, return an array of the values of the lines inside of the region.
+    """
+    # Use get_region_rows() to find the lines starting in the region
+    rows = get_region_rows(index, chrom, start, end)
+    # If the chromosome is not in the file, then no lines are in the region
+    if rows == None:
+        return np.zeros(0)
+    lo, mid, hi = rows
+    # Return the values of the lines starting in the region that also end in it
+    return index["values"][lo:hi][index["ends"][lo:hi] <= end]
+
+def select_percentile(values,
+                      percentile):
+    """
+    Given an array of values and a percentile (greater than 0, at most 100), return the
+    value at that percentile (the nearest rank), or None if there are no values.
+
+    np.partition puts the value of that rank in place in linear time, so the values are
+    never fully sorted. A percentile of 100 gives the highest value.
+    """
+    # If there are no values, then there is no percentile
+    if len(values) == 0:
+        return None
+    # Get the rank of the percentile, counting from zero
+    rank = int(np.ceil(percentile / 100 * len(values))) - 1
+    rank = min(max(rank, 0), len(values) - 1)
+    # Use np.partition to put the value of that rank in place, and return it
+    return float(np.partition(values, rank)[rank])
+
+#
+#
+##############################################################################################################
@@ -0,0 +1,53 @@
+"""
+==============================================================================================================
+Python 3.8.5
+
+script_options.py
+==============================================================================================================
+
+This python file is not meant to be run on its own. It holds the handling of the optional
+command line arguments (like --workers 4) that the other python files share. To use it from
+one of those files, add the shared_tools folder to the path:
+
+    sys.path.append(f"{os.path.dirname(os.path.abspath(__file__))}/../shared_tools")
+    import script_options
+
+The options are taken out of the system arguments before they are checked, so the required
+arguments keep the positions the shell scripts give them:
+
+    workers = int(script_options.get_option(args, "--workers", "1"))
+    directory = check_sysargs(args)
+
+"""
+
+##############################################################################################################
+#
+#         Functions
+
+def get_option(args,
+               option,
+               default):
+    """
+    Given the list of system arguments, an option (like --workers), and a default
+    value, return the value given after the option. The option and its value
+    are removed from the system arguments, so the remaining arguments can be
+    checked with check_sysargs(). If the option is not given, return the default.
+    """
+    # If the option is not in the system arguments
+    if option not in args:
+        # Then return the default value
+        return default
+    # Otherwise, find where the option is in the system arguments
+    position = args.index(option)
+    # Make sure that a value was given after the option
+    assert position + 1 < len(args), f"A value should be given after {option}"
+    # Get the value given after the option
+    value = args[position + 1]
+    # Remove the option and its value from the system arguments
+    del args[position:position + 2]
+    # and return the value
+    return value
+
+#
+#
+##############################################################################################################
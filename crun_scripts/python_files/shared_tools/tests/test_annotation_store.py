@@ -0,0 +1,139 @@
+"""
+Tests for shared_tools/annotation_store.py. The columns and lines from the store are compared to
+splitting each line of the bed files, which is how peak_enrich_annotations.py read them before the
+store.
+"""
+
+import random
+import numpy as np
+
+import annotation_store
+
+
+def write_lines(path, text):
+    """
+    Given a path and some text, write the text to the path.
+    """
+    with open(path, 'w') as f:
+        f.write(text)
+        f.close()
+
+
+def split_lines(path):
+    """
+    Given a bed file, return its non-blank lines split on tabs, the way the files were read before.
+    """
+    with open(path, 'r') as f:
+        lines = [line.strip().split("\t") for line in f if line.strip() != ""]
+        f.close()
+    return lines
+
+
+def make_bed_text(seed, annotation_type, n = 500):
+    """
+    Given a seed, an annotation type and a number of lines, return the text of an unsorted
+    seven column annotation bed file.
+    """
+    random.seed(seed)
+    lines = []
+    for i in range(n):
+        start = random.randint(0, 50000)
+        lines.append(f"{random.choice(['chr2L', 'chr2R', 'chrX'])}\t{start}\t{start + random.randint(1, 4000)}\t"
+                     f"{annotation_type.upper()}{i}\t0\t{random.choice('+-.')}\t{annotation_type}\n")
+    return "".join(lines)
+
+
+def test_read_bed_columns_matches_split_lines(tmp_path):
+    file = str(tmp_path / "annotation_gene.bed")
+    write_lines(file, make_bed_text(1, "gene") + "\n\n")
+    columns = annotation_store.read_bed_columns(file)
+    # The columns should be the columns of the split lines
+    assert columns == [list(column) for column in zip(*split_lines(file))]
+
+
+def test_read_bed_columns_refuses_ragged_lines(tmp_path):
+    file = str(tmp_path / "annotation_gene.bed")
+    # Lines of 7, 6 and 8 columns have the right number of values in total, but not on each line
+    write_lines(file, "c\t1\t2\tA\t0\t+\tgene\nc\t3\t4\tB\t0\t+\nc\t5\t6\tC\t0\t+\tgene\textra\n")
+    assert annotation_store.read_bed_columns(file) == None
+    # A file of six column lines is not stored either
+    write_lines(file, "c\t1\t2\tA\t0\t+\nc\t3\t4\tB\t0\t+\n")
+    assert annotation_store.read_bed_columns(file) == None
+
+
+def test_read_bed_columns_of_an_empty_file(tmp_path):
+    file = str(tmp_path / "annotation_gene.bed")
+    write_lines(file, "\n")
+    assert annotation_store.read_bed_columns(file) == [[] for column in range(annotation_store.bed_columns)]
+
+
+def test_store_lines_match_sorted_bed_lines(tmp_path):
+    annot_dir = str(tmp_path)
+    for seed, annotation_type in enumerate(["gene", "exon", "mRNA"]):
+        write_lines(f"{annot_dir}/annotation_{annotation_type}.bed", make_bed_text(seed, annotation_type))
+    # A file that cannot be stored, and the fields.txt file, which is not an annotation file
+    write_lines(f"{annot_dir}/annotation_other.bed", "chr2L\t1\t5\tID\t0\t+\n")
+    write_lines(f"{annot_dir}/fields.txt", "gene\nexon\nmRNA\n")
+    annotation_store.loaded_stores.clear()
+    store = annotation_store.load_annotation_store(annot_dir)
+    # The store should have been saved and memory mapped
+    assert isinstance(store["starts"], np.memmap)
+    assert store["file_stored"].tolist() == [True, True, True, False]
+    for code, name in enumerate(store["file_names"].tolist()):
+        if not store["file_stored"][code]:
+            continue
+        # The lines of the file, sorted by chromosome (in the order of the store) and start.
+        # The sort is stable, so lines with the same start keep the order of the file
+        chrom_codes = {chrom : i for i, chrom in enumerate(store["chrom_names"].tolist())}
+        expected = sorted(split_lines(f"{annot_dir}/{name}"), key = lambda line: (chrom_codes[line[0]], int(line[1])))
+        # Get the lines of the file from the store, one chromosome at a time
+        stored = []
+        for chrom_code, chrom in enumerate(store["chrom_names"].tolist()):
+            lo, hi = int(store["offsets"][code][chrom_code]), int(store["offsets"][code][chrom_code + 1])
+            for row in range(lo, hi):
+                line = annotation_store.get_stored_row(store, row)
+                line[0] = chrom
+                stored.append(line)
+            # The longest line on the chromosome should be saved in the store
+            lengths = [int(line[2]) - int(line[1]) for line in expected if line[0] == chrom]
+            assert int(store["longest"][code][chrom_code]) == max(lengths + [0])
+        assert stored == expected
+
+
+def test_store_is_made_again_when_a_file_changes(tmp_path):
+    annot_dir = str(tmp_path)
+    write_lines(f"{annot_dir}/annotation_gene.bed", "chr2L\t1\t5\tGENE1\t0\t+\tgene\n")
+    annotation_store.loaded_stores.clear()
+    store = annotation_store.load_annotation_store(annot_dir)
+    assert annotation_store.is_store_current(store, annot_dir)
+    # Add a line on a new chromosome to the file
+    write_lines(f"{annot_dir}/annotation_gene.bed", "chr2L\t1\t5\tGENE1\t0\t+\tgene\nchrZ\t2\t9\tGENE2\t0\t-\tgene\n")
+    assert not annotation_store.is_store_current(annotation_store.read_annotation_store(annot_dir), annot_dir)
+    annotation_store.loaded_stores.clear()
+    store = annotation_store.load_annotation_store(annot_dir)
+    assert store["chrom_names"].tolist() == ["chr2L", "chrZ"]
+    assert annotation_store.get_stored_row(store, 1)[1:] == ["2", "9", "GENE2", "0", "-", "gene"]
+
+
+def test_hand_written_bed_lines(tmp_path):
+    annot_dir = str(tmp_path)
+    # Windows line endings, a blank line, and annotations inside of a longer annotation
+    with open(f"{annot_dir}/annotation_gene.bed", 'w', newline = "") as f:
+        f.write("chr2L\t500\t600\tINNER\t0\t-\tgene\r\n"
+                "chr2L\t100\t5100\tOUTER\t0\t+\tgene\r\n"
+                "\r\n"
+                "chr2L\t100\t300\tSAME_START\t0\t+\tgene\r\n"
+                "chrX\t7\t9\tSHORT\t0\t.\tgene\r\n")
+        f.close()
+    annotation_store.loaded_stores.clear()
+    store = annotation_store.load_annotation_store(annot_dir)
+    assert store["chrom_names"].tolist() == ["chr2L", "chrX"]
+    # The lines are sorted by start, lines with the same start keep the order of the file,
+    # and the \r characters are not part of the last column
+    rows = [annotation_store.get_stored_row(store, row) for row in range(4)]
+    assert [row[1:] for row in rows] == [["100", "5100", "OUTER", "0", "+", "gene"],
+                                         ["100", "300", "SAME_START", "0", "+", "gene"],
+                                         ["500", "600", "INNER", "0", "-", "gene"],
+                                         ["7", "9", "SHORT", "0", ".", "gene"]]
+    # The longest annotation on each chromosome is kept, so nested annotations are still found
+    assert store["longest"][0].tolist() == [5000, 2]
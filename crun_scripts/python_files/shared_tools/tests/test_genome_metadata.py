@@ -0,0 +1,89 @@
+"""
+Tests for load_genome_metadata() in shared_tools/genome_metadata.py. The metadata should always
+have the chromosomes of the .genome file it is given, in the order of that file, whatever metadata
+was saved in the folder before.
+"""
+
+import genome_metadata
+
+
+def write_lines(path, text):
+    """
+    Given a path and some text, write the text to the path.
+    """
+    with open(path, 'w') as f:
+        f.write(text)
+        f.close()
+
+
+def save_fasta_metadata(directory):
+    """
+    Given a folder, write two FASTA files and length.genome to it, and save the metadata
+    the way count_genome_chars.py does. Return the path to length.genome.
+    """
+    write_lines(f"{directory}/chr2L.fasta", ">NC_1 Drosophila melanogaster chromosome 2L\nACGTAC\n")
+    write_lines(f"{directory}/chrX.fasta", ">NC_2 Drosophila melanogaster chromosome X\nACGT\n")
+    write_lines(f"{directory}/length.genome", "NC_2\t4\nNC_1\t6\n")
+    metadata = genome_metadata.make_genome_metadata(["NC_2", "NC_1"],
+                                                    [4, 6],
+                                                    [f"{directory}/chrX.fasta", f"{directory}/chr2L.fasta"],
+                                                    f"{directory}/length.genome")
+    genome_metadata.save_genome_metadata(metadata, genome_metadata.get_metadata_file(f"{directory}/"))
+    return f"{directory}/length.genome"
+
+
+def test_sorted_genome_file_keeps_the_fasta_sources(tmp_path):
+    directory = str(tmp_path)
+    save_fasta_metadata(directory)
+    # The pipeline sorts length.genome into length_sort.genome
+    write_lines(f"{directory}/length_sort.genome", "NC_1\t6\nNC_2\t4\n")
+    genome_metadata.loaded_metadata.clear()
+    metadata = genome_metadata.load_genome_metadata(f"{directory}/length_sort.genome")
+    # The chromosomes are in the order of length_sort.genome, not of the FASTA files
+    assert metadata["chrom_names"].tolist() == ["NC_1", "NC_2"]
+    assert metadata["chrom_codes"].tolist() == [0, 1]
+    assert genome_metadata.get_chrom_lengths(metadata) == {"NC_1" : 6, "NC_2" : 4}
+    # The FASTA files are still the sources, so they are checked on the next run
+    assert metadata["source_files"].tolist() == ["chrX.fasta", "chr2L.fasta"]
+    assert metadata["source_checksums"].tolist() == [genome_metadata.get_file_checksum(f"{directory}/chrX.fasta"),
+                                                     genome_metadata.get_file_checksum(f"{directory}/chr2L.fasta")]
+    # and the saved metadata is now for length_sort.genome
+    saved = genome_metadata.read_genome_metadata(genome_metadata.get_metadata_file(f"{directory}/length_sort.genome"))
+    assert str(saved["genome_file"]) == "length_sort.genome"
+    assert saved["chrom_names"].tolist() == ["NC_1", "NC_2"]
+
+
+def test_changed_genome_file_is_read_again(tmp_path):
+    directory = str(tmp_path)
+    genome_file = f"{directory}/sizes.genome"
+    write_lines(genome_file, "chr1\t100\nchr2\t50\n")
+    genome_metadata.loaded_metadata.clear()
+    assert genome_metadata.load_genome_metadata(genome_file)["chrom_names"].tolist() == ["chr1", "chr2"]
+    # Write the .genome file again with another chromosome (and a different size)
+    write_lines(genome_file, "chr2\t50\nchr1\t100\nchrM\t9\n")
+    genome_metadata.loaded_metadata.clear()
+    metadata = genome_metadata.load_genome_metadata(genome_file)
+    assert metadata["chrom_names"].tolist() == ["chr2", "chr1", "chrM"]
+    assert metadata["source_files"].tolist() == ["sizes.genome"]
+
+
+def test_other_genome_file_does_not_replace_the_fasta_metadata(tmp_path, capsys):
+    directory = str(tmp_path)
+    length_genome = save_fasta_metadata(directory)
+    metadata_file = genome_metadata.get_metadata_file(length_genome)
+    # A .genome file with only one of the chromosomes
+    write_lines(f"{directory}/subset.genome", "NC_1\t6\n")
+    genome_metadata.loaded_metadata.clear()
+    metadata = genome_metadata.load_genome_metadata(f"{directory}/subset.genome")
+    assert metadata["chrom_names"].tolist() == ["NC_1"]
+    assert metadata["source_files"].tolist() == ["subset.genome"]
+    # The metadata made from the FASTA files is still saved
+    assert str(genome_metadata.read_genome_metadata(metadata_file)["genome_file"]) == "length.genome"
+    # If a FASTA file changes, the user is told and the .genome file is read
+    write_lines(f"{directory}/chrX.fasta", ">NC_2 Drosophila melanogaster chromosome X\nACGTACGT\n")
+    genome_metadata.loaded_metadata.clear()
+    metadata = genome_metadata.load_genome_metadata(length_genome)
+    assert "Please run count_genome_chars.py again" in capsys.readouterr().out
+    assert metadata["chrom_names"].tolist() == ["NC_2", "NC_1"]
+    # and the metadata made from the FASTA files is not saved over
+    assert genome_metadata.read_genome_metadata(metadata_file)["source_files"].tolist() == ["chrX.fasta", "chr2L.fasta"]
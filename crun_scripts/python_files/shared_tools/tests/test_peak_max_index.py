@@ -0,0 +1,139 @@
+"""
+Tests for shared_tools/peak_max_index.py. The answers from the index are compared to the way
+get_peak_maxs.py found them before the index: keeping the lines of the file that are inside of
+the region (like the awk filter did), and sorting their values.
+"""
+
+import os
+import random
+import numpy as np
+import pytest
+
+import peak_max_index
+
+
+def write_bedgraph(path, rows):
+    """
+    Given a path and a list of (chrom, start, end, value) rows, write them as a bedgraph file.
+    """
+    with open(path, 'w') as f:
+        f.writelines([f"{chrom}\t{start}\t{end}\t{value}\n" for chrom, start, end, value in rows])
+        f.close()
+
+
+def make_rows(seed, n = 2000):
+    """
+    Given a seed and a number of rows, return random (chrom, start, end, value) rows, not sorted.
+    """
+    random.seed(seed)
+    rows = []
+    for _ in range(n):
+        start = random.randint(0, 100000)
+        rows.append((random.choice(["chr1", "chr2", "chrX"]),
+                     start,
+                     start + random.randint(1, 3000),
+                     round(random.uniform(-5, 100), 3)))
+    return rows
+
+
+def region_values(rows, chrom, start, end):
+    """
+    Given the rows and a region, return the sorted values (highest first) of the rows inside of
+    the region, like the awk filter and sort in the old get_highest_value().
+    """
+    return sorted([value for c, s, e, value in rows if c == chrom and start <= s and e <= end], reverse = True)
+
+
+def random_regions(seed, n = 300):
+    """
+    Given a seed and a number of regions, return random (chrom, start, end) regions, including
+    some on a chromosome that is not in the file.
+    """
+    random.seed(seed)
+    regions = []
+    for _ in range(n):
+        start = random.randint(0, 100000)
+        regions.append((random.choice(["chr1", "chr2", "chrX", "chr4"]), start, start + random.randint(0, 20000)))
+    return regions
+
+
+def test_max_tree_matches_slices():
+    # Every range of the tree should give the highest value of that slice
+    values = np.array([3.0, -1.0, 7.5, 2.0, 7.5, 0.0, 9.0])
+    tree = peak_max_index.build_max_tree(values)
+    for lo in range(len(values) + 1):
+        for hi in range(lo, len(values) + 1):
+            expected = values[lo:hi].max() if hi > lo else -np.inf
+            assert peak_max_index.query_tree_max(tree, lo, hi) == expected
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_region_max_matches_filter_and_sort(tmp_path, seed):
+    rows = make_rows(seed)
+    file = str(tmp_path / "peaks.bg")
+    write_bedgraph(file, rows)
+    peak_max_index.loaded_indexes.clear()
+    index = peak_max_index.load_max_index(file, "value")
+    for chrom, start, end in random_regions(seed):
+        values = region_values(rows, chrom, start, end)
+        expected = values[0] if values != [] else None
+        assert peak_max_index.query_region_max(index, chrom, start, end) == expected
+        assert sorted(peak_max_index.query_region_values(index, chrom, start, end).tolist(), reverse = True) == values
+
+
+def test_select_percentile_matches_sorted_rank():
+    random.seed(4)
+    values = [random.uniform(0, 10) for _ in range(501)]
+    for percentile in [0.1, 1, 25, 50, 99, 99.9, 100]:
+        # The nearest rank, counting from the smallest value
+        rank = min(max(int(np.ceil(percentile / 100 * len(values))) - 1, 0), len(values) - 1)
+        assert peak_max_index.select_percentile(np.array(values), percentile) == sorted(values)[rank]
+    assert peak_max_index.select_percentile(np.array(values), 100) == max(values)
+    assert peak_max_index.select_percentile(np.zeros(0), 50) == None
+
+
+def test_index_is_saved_and_rebuilt_when_the_file_changes(tmp_path):
+    file = str(tmp_path / "peaks.bg")
+    write_bedgraph(file, [("chr1", 0, 10, 1.5), ("chr1", 5, 20, 4.0)])
+    peak_max_index.loaded_indexes.clear()
+    index = peak_max_index.load_max_index(file, "value")
+    assert os.path.exists(peak_max_index.get_index_file(file))
+    assert peak_max_index.query_region_max(index, "chr1", 0, 20) == 4.0
+    # Change the file, so its size changes, and load the index again in a new run
+    write_bedgraph(file, [("chr1", 0, 10, 1.5), ("chr1", 5, 20, 4.0), ("chr1", 2, 8, 12.25)])
+    peak_max_index.loaded_indexes.clear()
+    index = peak_max_index.load_max_index(file, "value")
+    assert peak_max_index.query_region_max(index, "chr1", 0, 20) == 12.25
+
+
+def test_ragged_file_cannot_be_indexed(tmp_path):
+    file = str(tmp_path / "peaks.bg")
+    with open(file, 'w') as f:
+        f.write("chr1\t0\t10\t1.5\nchr1\t5\t20\t4.0\textra\nchr1\t2\t8\n")
+        f.close()
+    with pytest.raises(ValueError):
+        peak_max_index.build_max_index(file, "value")
+
+
+def test_hand_written_bedgraph_lines(tmp_path):
+    file = str(tmp_path / "peaks.bg")
+    # A track line, a comment, Windows line endings, and lines inside of other lines
+    with open(file, 'w', newline = "") as f:
+        f.write("track type=bedGraph name=sample\r\n"
+                "# made by hand\r\n"
+                "chr1\t0\t1000\t2.5\r\n"
+                "chr1\t100\t200\t9.0\r\n"
+                "chr1\t150\t160\t4.0\r\n"
+                "chr1\t900\t1200\t30.0\r\n"
+                "chr2\t0\t50\t7.0\r\n")
+        f.close()
+    peak_max_index.loaded_indexes.clear()
+    index = peak_max_index.load_max_index(file, "value")
+    # Only lines that are entirely inside of the region count
+    assert peak_max_index.query_region_max(index, "chr1", 0, 1000) == 9.0
+    assert peak_max_index.query_region_max(index, "chr1", 100, 200) == 9.0
+    assert peak_max_index.query_region_max(index, "chr1", 101, 200) == 4.0
+    assert peak_max_index.query_region_max(index, "chr1", 0, 1200) == 30.0
+    assert peak_max_index.query_region_max(index, "chr1", 151, 159) == None
+    assert peak_max_index.query_region_max(index, "chr2", 0, 50) == 7.0
+    assert sorted(peak_max_index.query_region_values(index, "chr1", 100, 1000).tolist()) == [4.0, 9.0]
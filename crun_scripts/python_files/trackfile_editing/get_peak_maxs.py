@@ -1,277 +1,499 @@
-"""
-Kenneth P. Callahan
-
-22 January 2021
-
-==========================================================================================================
-Python 3.8.5
-
-get_maxs.py
-==========================================================================================================
-
-REQURIES LINUX
-
-This is a small python script that will get the highest value from a bedgraph or narrowPeak file.
-The command line arguments are:
-
-args[0] : get_maxs.py
-args[1] : comma separated list of files
-args[2] : chrom:start-end
-
-This program prints the highest value found, which can be saved as a variable using the syntax
-
-highest_value=$(python3 get_maxs.py "file1.narrowPeak,file2.narrowPeak" chr1:0-19000)
-
-"""
-
-###########################################################
-#
-#         Imports
-
-import subprocess  # Used for executing shell scripts in python
-import sys         # Used for grabbing system inputs
-
-#
-#
-###########################################################
-#
-#        Pre-defined variables
-
-# File extensions that are allowed are the keys, and the
-# file type associated are the values. So far, I've only
-# used bedgraph and narrowPeak files, but bed files can
-# easily be added.
-extensions = {'bg' : 'bedgraph',
-              'bdg' : 'bedgraph',
-              'bedgraph' : 'bedgraph',
-              'narrowPeak' : 'narrowPeak'}
-
-# A dictionary containign dictionaries. Keys in the forms
-# dictionary are file types. The values are dictionaries
-# with information regarding that file type. This serves
-# two purposes: for awk filtering using $1, $2, $3 (check
-# out get_highest_value()) and knowing where the intensity
-# value (number of reads in the case of bedgraph files,
-# signal intensity in the case of narrowPeak files) is.
-#
-# If you add a format to this dictionary, just be sure to
-# use the following keys:
-#
-#   Key         |     Meaning
-#--------------------------------------------------------------------
-# chromosome    | this is the chromosome identifier in the file
-# region_start  | This is the beginning of a genomic region, in bases
-# region_end    | This is the end of a genomic region, in bases
-# value         | Whatever value you wish to find the maximum of
-#                 ( In my case, signal intensity / number of reads)
-#--------------------------------------------------------------------
-#
-# The functions defined below look for these keys specifically for
-# awk filtering and finding the column of the file with the value
-# you wish to find the maximum of.
-forms = {'narrowPeak': {'chromosome' : '1',
-                        'region_start' : '2',
-                        'region_end' : '3',
-                        'region_name' : '4',
-                        'region_score' : '5',
-                        'region_strand' : '6',
-                        'value' : '7',
-                        'p' : '8',
-                        'q' : '9',
-                        'peak' : '10'},
-         'bedgraph' :  {'chromosome' : '1',
-                        'region_start' : '2',
-                        'region_end' : '3',
-                        'value' : '4'} }
-
-#
-#
-##################################################################
-#
-#       Functions
-
-def check_sysargs(args):
-    """
-    Given a list of system arguments, check that they are accepatble arguments.
-    These arguments should be:
-
-    args[0] : get_maxs.py
-    args[1] : comma separated list of files
-    args[2] : chrom:start-end
-    """
-    # Assert that only three system arguments can be given.
-    assert len(args) == 3, "Only three system arguments should be given"
-
-    # Split the first argument on the comma, it should be a comma separated list of file strings
-    f_list = args[1].split(',')
-    # Loop over the files in the list
-    for f in f_list:
-        # Try to open the file, reading. If this fails, the program will exit
-        with open(f, 'r') as file:
-            # Close the file if this works
-            file.close()
-        # Check the file format using the identify_filetype_format() function
-        f_format = identify_filetype_format(f, extensions, forms)
-        # IF this returns Wrong Format
-        if f_format == "Wrong Format":
-            # Then tell the user that the files weren't in the correct format and exit
-            raise ValueError(f"The file {f} is not in the correct format.")
-    # The second argument should be a GenomeBrowser region, which has the format
-    # chromosome:Beginning-Ending. Use asser to make sure that the proper characters are there
-    assert ':' in args[2] and '-' in args[2], "The chromosome region should have the form chr:start-end"
-    # If the assert statment is True, then continue to format the regions.
-    # Split on the : character
-    chr_reg = args[2].split(':')
-    # Initialize chrom_list variable with the chromosome (zeroeth element of list after splitting)
-    chrom_list = [chr_reg[0]]
-    # Split the first element of chr_reg list on the - character
-    regs = chr_reg[1].split('-')
-    # and concatenate chrom_list with regs. Chrom list now has
-    # ["chromosome", "Beginning", "Ending"]
-    chrom_list += regs
-    # Return the list of files and the chrom_list
-    return f_list, chrom_list
-
-def identify_filetype_format(file,
-                             extension_dict,
-                             formatting_dict):
-    """
-    Given a file name (as a string), an extenstion dictionary (keys are extensions,
-    values are the name of the file type), and a foramtting dictionary (keys are
-    file types, values are dictionaries with keys as headers, value as column
-    number in mathematical counting), return a dictionary with keys as one of the
-    sorting areas (chrom, start, end, value) and values as the column those
-    areas appear in the given file type.
-    """
-    # These are the columns of any file that we care about. Value depends on the
-    # file type and which value is actually plotted.
-    sorting_areas = ["chromosome",
-                     "region_start",
-                     "region_end",
-                     "value"]
-    # Initialize the sorting format dictionary.
-    sorting_format = {}
-    # Split the file on the period and save the last element of the list as the extension.
-    # "path/to/file.narrowPeak" ->   ["path/to/file", "narrowPeak"]  ->  "narrowPeak"
-    extension = file.split('.')[-1]
-    # If the extension is in the given extension dictionary
-    if extension in extension_dict.keys():
-        # Save the file type to the variable ext
-        ext = extension_dict[extension]
-        # Loop over the sorting_areas list above
-        for area in sorting_areas:
-            # If the area is one of the keys of the formatting_dict
-            if area in formatting_dict[ext].keys():
-                # Then update the sorting_format dictionary with the area as a key
-                # and the corresponding value from formatting_dict[ext].
-                sorting_format[area] = formatting_dict[ext][area]
-        # Return the sorting_format dict and the extension
-        return sorting_format, extension
-    # If the extension is not one of the defined file types
-    else:
-        # Then return the string "Wrong Format"
-        return "Wrong Format"
-
-def update_highest_value(file,
-                         current_highest,
-                         sorting_format,
-                         delimiter):
-    """
-    Given a file, the current highest calue found, the sorting_format dictionary,
-    and a delimiter for the file, return either the new highest value if a value
-    in this file is greater than the previous highest value or the previous
-    highest value if there are no higher values in the given file.
-    """
-    # Computer scientists start counting at zero. Math people start counting at 1.
-    # We are math people, so we need to translate to computer people counting :)
-    value_col = (int(sorting_format['value']) - 1)
-    # Open the file, reading, call it f
-    with open(file, 'r') as f:
-        # Use list comprehension to get the values from the file. This line of code does:
-        # Loops over lines in the file, strips the line, splits the line on the delimiter,
-        # takes the element of the list in the value column, and turns that value into a float.
-        try:
-            values = [float(line.strip().split(delimiter)[value_col]) for line in f]
-        # If for some reason this list comprehension fails, then a value could not be floated
-        # Or that column of the file did not exist.
-        except:
-            raise ValueError(f"Some of the values in the value column were not floating point numbers :( ")
-        # If the number of values found are zero, then just return the previous highest value
-        if len(values) == 0:
-            return current_highest
-        # Use the sorted function to sort the values in reverse order (largest value is 0)
-        values = sorted(values, reverse = True)
-        # Close the file once all of this is completed.
-        f.close()
-    # If the current highest value is greater than the highest value found in the file
-    if current_highest > values[0]:
-        # then return the curent highest, as this file only has lower values
-        return current_highest
-    # Otherwise, the value in the file is greater than the current highest
-    else:
-        # So return that value
-        return values[0]
-
-
-def get_highest_value(file_list,
-                      chrom_list,
-                      delimiter,
-                      extensions_dict = extensions,
-                      formatting_dict = forms):
-    """
-    Given a list of files, the chromosome region list, and a delimiter for those files, return
-    the highest value from the files
-
-    Requires subprocess.call with shell = True to run some shell scripts
-    """
-    # Initialize the highest value
-    highest = 0
-    # Loop over the files in the file list
-    for file in file_list:
-        # Use identify_filetype_format() to get the sorting_format and the extension
-        sort_form, extension = identify_filetype_format(file, extensions_dict, formatting_dict)
-        # Use string formatting to get the conditions for awk filtering
-        p1 = f'''"{chrom_list[0]}" == ${sort_form['chromosome']}'''   # Chromosome of file is the same as chromosome of interest
-        p2 = f'''{chrom_list[1]} <= ${sort_form['region_start']}'''   # Region of file is between region start
-        p3 = f'''{chrom_list[2]} >= ${sort_form['region_end']}'''     # and region end given
-        # Combine the conditions in an awk filtering string using string formatting
-        filter_file = f""" awk '{{ if( {p1} && {p2} && {p3} ) {{ print }} }}' "{file}" > "temp.{extension}" """
-        # Use subprocess.call to filter the file
-        subprocess.call(filter_file, shell=True)
-        # Use the update_highest_value() functino to update the highest variabel
-        highest = update_highest_value(f"temp.{extension}",
-                                       highest,
-                                       sort_form,
-                                       delimiter)
-        # Use string formatting to create the removal string
-        removal = f"rm temp.{extension}"
-        # Pass the removal string into subprocess.call to delete the temporary file
-        subprocess.call(removal, shell=True)
-    # At the end, return the highest value
-    return highest
-
-#
-#
-######################################################################
-#
-#           main() function
-
-def main():
-    """
-    Get the system arguments
-    Check that they are valid
-    Use get_highest_value() to get the highest value from the files
-    print the highest value so it can be saved in a shell script.
-    """
-    args = sys.argv
-    file_list, chrom_list = check_sysargs(args)
-    highest_value = get_highest_value(file_list,
-                                      chrom_list,
-                                      '\t')
-    print(f"{highest_value}")
-
-
-main()
-#
-#
-######################################################################
+"""
+Kenneth P. Callahan
+
+22 January 2021
+
+==========================================================================================================
+Python 3.8.5
+
+get_maxs.py
+==========================================================================================================
+
+This is a small python script that will get the highest value from a bedgraph or narrowPeak file.
+The command line arguments are:
+
+args[0] : get_maxs.py
+args[1] : comma separated list of files
+args[2] : chrom:start-end
+
+This program prints the highest value found, which can be saved as a variable using the syntax
+
+highest_value=$(python3 get_maxs.py "file1.narrowPeak,file2.narrowPeak" chr1:0-19000)
+
+There is also a batch mode, which gets the highest values for every region in a regions file
+(like the one written by find_plot_regions.py) at once. The command line arguments are:
+
+args[0] : get_maxs.py
+args[1] : comma separated list of peak files
+args[2] : comma separated list of sorted (raw data) files
+args[3] : regions file, with lines chrom<tab>start<tab>end
+args[4] : output file
+
+The output file has the tab separated lines
+
+chrom   start   end   max_peaks   max_sorted
+
+for each region in the regions file, in the same order.
+
+In either mode, --percentile <p> (like --percentile 99.9) uses the value at that percentile
+of each file instead of the highest value, so one outlier does not set the maximum.
+
+The highest values are found using an index of each file (shared_tools/peak_max_index.py),
+which is saved next to the file as a hidden .max_index.npz file and used again until the
+file changes.
+
+"""
+
+###########################################################
+#
+#         Imports
+
+import sys         # Used for grabbing system inputs
+import os          # Used for finding the shared_tools folder
+import array       # Used for holding the values of a region compactly when a percentile is used
+import numpy as np # Used for turning those columns into arrays
+
+# The shared_tools folder holds the peak file loader and the peak max index
+sys.path.append(f"{os.path.dirname(os.path.abspath(__file__))}/../shared_tools")
+import load_peak_files
+import peak_max_index
+import script_options
+
+#
+#
+###########################################################
+#
+#        Pre-defined variables
+
+# File extensions that are allowed are the keys, and the
+# file type associated are the values. So far, I've only
+# used bedgraph and narrowPeak files, but bed files can
+# easily be added.
+extensions = {'bg' : 'bedgraph',
+              'bdg' : 'bedgraph',
+              'bedgraph' : 'bedgraph',
+              'narrowPeak' : 'narrowPeak'}
+
+# A dictionary containign dictionaries. Keys in the forms
+# dictionary are file types. The values are dictionaries
+# with information regarding that file type. This serves
+# two purposes: for awk filtering using $1, $2, $3 (check
+# out get_highest_value()) and knowing where the intensity
+# value (number of reads in the case of bedgraph files,
+# signal intensity in the case of narrowPeak files) is.
+#
+# If you add a format to this dictionary, just be sure to
+# use the following keys:
+#
+#   Key         |     Meaning
+#--------------------------------------------------------------------
+# chromosome    | this is the chromosome identifier in the file
+# region_start  | This is the beginning of a genomic region, in bases
+# region_end    | This is the end of a genomic region, in bases
+# value         | Whatever value you wish to find the maximum of
+#                 ( In my case, signal intensity / number of reads)
+#--------------------------------------------------------------------
+#
+# The functions defined below look for these keys specifically for
+# awk filtering and finding the column of the file with the value
+# you wish to find the maximum of.
+forms = {'narrowPeak': {'chromosome' : '1',
+                        'region_start' : '2',
+                        'region_end' : '3',
+                        'region_name' : '4',
+                        'region_score' : '5',
+                        'region_strand' : '6',
+                        'value' : '7',
+                        'p' : '8',
+                        'q' : '9',
+                        'peak' : '10'},
+         'bedgraph' :  {'chromosome' : '1',
+                        'region_start' : '2',
+                        'region_end' : '3',
+                        'value' : '4'} }
+
+# Files that could not be indexed by peak_max_index, so the index is only tried once per run
+unindexed_files = set()
+
+#
+#
+##################################################################
+#
+#       Functions
+
+def check_file_list(files):
+    """
+    Given a comma separated list of files, check that each file can be opened
+    and is one of the allowed file types, and return the list of files.
+    """
+    # Split the argument on the comma, it should be a comma separated list of file strings
+    f_list = files.split(',')
+    # Loop over the files in the list
+    for f in f_list:
+        # Try to open the file, reading. If this fails, the program will exit
+        with open(f, 'r') as file:
+            # Close the file if this works
+            file.close()
+        # Check the file format using the identify_filetype_format() function
+        f_format = identify_filetype_format(f, extensions, forms)
+        # IF this returns Wrong Format
+        if f_format == "Wrong Format":
+            # Then tell the user that the files weren't in the correct format and exit
+            raise ValueError(f"The file {f} is not in the correct format.")
+    # Return the list of files
+    return f_list
+
+def check_sysargs(args):
+    """
+    Given a list of system arguments, check that they are accepatble arguments.
+    These arguments should be:
+
+    args[0] : get_maxs.py
+    args[1] : comma separated list of files
+    args[2] : chrom:start-end
+    """
+    # Assert that only three system arguments can be given.
+    assert len(args) == 3, "Only three system arguments should be given"
+
+    # Use check_file_list() to check the comma separated list of files
+    f_list = check_file_list(args[1])
+    # The second argument should be a GenomeBrowser region, which has the format
+    # chromosome:Beginning-Ending. Use asser to make sure that the proper characters are there
+    assert ':' in args[2] and '-' in args[2], "The chromosome region should have the form chr:start-end"
+    # If the assert statment is True, then continue to format the regions.
+    # Split on the : character
+    chr_reg = args[2].split(':')
+    # Initialize chrom_list variable with the chromosome (zeroeth element of list after splitting)
+    chrom_list = [chr_reg[0]]
+    # Split the first element of chr_reg list on the - character
+    regs = chr_reg[1].split('-')
+    # and concatenate chrom_list with regs. Chrom list now has
+    # ["chromosome", "Beginning", "Ending"]
+    chrom_list += regs
+    # Return the list of files and the chrom_list
+    return f_list, chrom_list
+
+def check_batch_sysargs(args):
+    """
+    Given a list of system arguments, check that they are acceptable arguments
+    for the batch mode. These arguments should be:
+
+    args[0] : get_maxs.py
+    args[1] : comma separated list of peak files
+    args[2] : comma separated list of sorted files
+    args[3] : regions file
+    args[4] : output file
+    """
+    # Assert that five system arguments were given
+    assert len(args) == 5, "Five system arguments should be given for the batch mode"
+    # Use check_file_list() to check the peak files and the sorted files
+    peak_list = check_file_list(args[1])
+    sorted_list = check_file_list(args[2])
+    # Try to open the regions file, reading. If this fails, the program will exit
+    with open(args[3], 'r') as f:
+        # Close the file if this works
+        f.close()
+    # Return the lists of files, the regions file and the output file
+    return peak_list, sorted_list, args[3], args[4]
+
+def identify_filetype_format(file,
+                             extension_dict,
+                             formatting_dict):
+    """
+    Given a file name (as a string), an extenstion dictionary (keys are extensions,
+    values are the name of the file type), and a foramtting dictionary (keys are
+    file types, values are dictionaries with keys as headers, value as column
+    number in mathematical counting), return a dictionary with keys as one of the
+    sorting areas (chrom, start, end, value) and values as the column those
+    areas appear in the given file type.
+    """
+    # These are the columns of any file that we care about. Value depends on the
+    # file type and which value is actually plotted.
+    sorting_areas = ["chromosome",
+                     "region_start",
+                     "region_end",
+                     "value"]
+    # Initialize the sorting format dictionary.
+    sorting_format = {}
+    # Split the file on the period and save the last element of the list as the extension.
+    # "path/to/file.narrowPeak" ->   ["path/to/file", "narrowPeak"]  ->  "narrowPeak"
+    extension = file.split('.')[-1]
+    # If the extension is in the given extension dictionary
+    if extension in extension_dict.keys():
+        # Save the file type to the variable ext
+        ext = extension_dict[extension]
+        # Loop over the sorting_areas list above
+        for area in sorting_areas:
+            # If the area is one of the keys of the formatting_dict
+            if area in formatting_dict[ext].keys():
+                # Then update the sorting_format dictionary with the area as a key
+                # and the corresponding value from formatting_dict[ext].
+                sorting_format[area] = formatting_dict[ext][area]
+        # Return the sorting_format dict and the extension
+        return sorting_format, extension
+    # If the extension is not one of the defined file types
+    else:
+        # Then return the string "Wrong Format"
+        return "Wrong Format"
+
+def update_highest_value(file,
+                         current_highest,
+                         sorting_format,
+                         delimiter,
+                         chrom_list = None,
+                         percentile = None):
+    """
+    Given a file, the current highest calue found, the sorting_format dictionary,
+    a delimiter for the file, (optional) a chromosome region list, and (optional)
+    a percentile, return either the new highest value if a value in this file is
+    greater than the previous highest value or the previous highest value if there
+    are no higher values in the given file.
+
+    If a chromosome region list is given, only the lines inside of the region are used.
+    The file is read one line at a time and the highest value is kept as the lines are
+    read, so the values are never held in memory or sorted. If a percentile is given,
+    the value at that percentile is used instead of the highest value (so one outlier
+    does not set the maximum). Only the values inside of the region are kept for that,
+    and the percentile is found with peak_max_index.select_percentile(), which does not
+    sort them. Comment, track, browser and header lines are skipped.
+
+    This is used for files that cannot be indexed by peak_max_index.
+    """
+    # Computer scientists start counting at zero. Math people start counting at 1.
+    # We are math people, so we need to translate to computer people counting :)
+    value_col = (int(sorting_format['value']) - 1)
+    chrom_col = (int(sorting_format['chromosome']) - 1)
+    start_col = (int(sorting_format['region_start']) - 1)
+    end_col = (int(sorting_format['region_end']) - 1)
+    # Initialize the highest value in the file, and the values if a percentile is used
+    file_highest = None
+    values = array.array('d')
+    # Open the file, reading, call it f
+    with open(file, 'r') as f:
+        # Loop over the lines in the file
+        for line in f:
+            # Strip the line
+            line = line.strip()
+            # Skip the comment, track, browser, header and blank lines
+            if not load_peak_files.is_data_line(line, delimiter):
+                continue
+            # Split the line on the delimiter
+            line = line.split(delimiter)
+            # If a region was given, skip the lines on other chromosomes
+            if chrom_list != None and line[chrom_col] != chrom_list[0]:
+                continue
+            # Try to get the value from the line, and check that the line is in the region
+            try:
+                value = float(line[value_col])
+                if chrom_list != None and not (int(chrom_list[1]) <= int(line[start_col])
+                                               and int(chrom_list[2]) >= int(line[end_col])):
+                    continue
+            # If this fails, then a value could not be floated or that column of the file did not exist.
+            except (ValueError, IndexError):
+                raise ValueError(f"Some of the values in the value column were not floating point numbers :( ")
+            # If a percentile is used, keep the value
+            if percentile != None:
+                values.append(value)
+            # Otherwise, keep the value if it is the highest so far
+            elif file_highest == None or value > file_highest:
+                file_highest = value
+        # Close the file once all of this is completed.
+        f.close()
+    # If a percentile is used, get the value at the percentile
+    if percentile != None:
+        file_highest = peak_max_index.select_percentile(np.frombuffer(values, dtype = np.float64), percentile)
+    # If no values were found, or the current highest value is greater than the highest value found
+    if file_highest == None or current_highest > file_highest:
+        # then return the curent highest, as this file only has lower values
+        return current_highest
+    # Otherwise, the value in the file is greater than the current highest
+    else:
+        # So return that value
+        return file_highest
+
+def get_value_column(sorting_format,
+                     extension,
+                     extensions_dict = extensions):
+    """
+    Given the sorting_format dictionary and the extension from identify_filetype_format(),
+    and the extension dictionary, return the name of the value column used by
+    load_peak_files (e.g. signalValue for narrowPeak files, value for bedgraph files).
+    """
+    # Computer scientists start counting at zero. Math people start counting at 1.
+    # We are math people, so we need to translate to computer people counting :)
+    value_col = (int(sorting_format['value']) - 1)
+    # Get the column layout of the file type from load_peak_files
+    layout = load_peak_files.peak_file_layouts[extensions_dict[extension]]
+    # and return the name of the value column
+    return layout[value_col][0]
+
+def get_highest_value(file_list,
+                      chrom_list,
+                      delimiter,
+                      extensions_dict = extensions,
+                      formatting_dict = forms,
+                      percentile = None):
+    """
+    Given a list of files, the chromosome region list, a delimiter for those files, and
+    (optional) a percentile, return the highest value from the lines of the files that
+    are inside of the region. If no lines are inside of the region, or all of their
+    values are below zero, return 0.
+
+    If a percentile is given (like 99.9), the value at that percentile of each file is
+    used instead of the highest value of the file, so one outlier does not set the maximum.
+
+    Each file is queried with its index from peak_max_index.load_max_index(), so no lines
+    are filtered or sorted here. If a file cannot be indexed (its lines do not all have the
+    same number of columns), it is added to unindexed_files and update_highest_value()
+    reads it one line at a time instead.
+    """
+    # Initialize the highest value
+    highest = 0
+    # Loop over the files in the file list
+    for file in file_list:
+        # Use identify_filetype_format() to get the sorting_format and the extension
+        sort_form, extension = identify_filetype_format(file, extensions_dict, formatting_dict)
+        # If the file was not found to be unindexable earlier in this run
+        if file not in unindexed_files:
+            # Then try to use load_max_index() to get the index of the file, made or updated if needed
+            try:
+                index = peak_max_index.load_max_index(file,
+                                                      get_value_column(sort_form, extension, extensions_dict),
+                                                      delimiter = delimiter)
+            # If the file cannot be indexed, then do not try again for the other regions
+            except ValueError:
+                unindexed_files.add(file)
+        # If the file cannot be indexed
+        if file in unindexed_files:
+            # Then use update_highest_value() to get the highest value of the lines in the region
+            highest = update_highest_value(file,
+                                           highest,
+                                           sort_form,
+                                           delimiter,
+                                           chrom_list = chrom_list,
+                                           percentile = percentile)
+            continue
+        # If no percentile is used
+        if percentile == None:
+            # Then use query_region_max() to get the highest value in the region of the file
+            file_highest = peak_max_index.query_region_max(index,
+                                                           chrom_list[0],
+                                                           int(chrom_list[1]),
+                                                           int(chrom_list[2]))
+        # Otherwise, get the values in the region and use select_percentile() to get the percentile
+        else:
+            file_highest = peak_max_index.select_percentile(peak_max_index.query_region_values(index,
+                                                                                               chrom_list[0],
+                                                                                               int(chrom_list[1]),
+                                                                                               int(chrom_list[2])),
+                                                            percentile)
+        # If there were lines in the region and the highest is not greater than their highest
+        if file_highest != None and not highest > file_highest:
+            # Then update the highest value
+            highest = file_highest
+    # At the end, return the highest value
+    return highest
+
+def read_regions_file(regions_file,
+                      delimiter):
+    """
+    Given a regions file (lines of chrom, start, end) and the delimiter of the file,
+    return a list of the regions as chromosome region lists ["chrom", "start", "end"].
+    """
+    # Initialize the list of regions
+    regions = []
+    # Open the regions file, reading, call it f
+    with open(regions_file, 'r') as f:
+        # Loop over the lines in the file
+        for line in f:
+            # Strip the newline character and split the line on the delimiter
+            line = line.strip().split(delimiter)
+            # If the line is blank, then skip it
+            if line == [""]:
+                continue
+            # Add the chromosome, start and end to the list of regions
+            regions.append(line[:3])
+        # Close the file
+        f.close()
+    # Return the list of regions
+    return regions
+
+def get_region_maxs(peak_list,
+                    sorted_list,
+                    regions,
+                    delimiter,
+                    percentile = None):
+    """
+    Given a list of peak files, a list of sorted files, a list of regions from
+    read_regions_file(), a delimiter for the files, and (optional) a percentile
+    (see get_highest_value()), return a list of lines
+
+    chrom   start   end   max_peaks   max_sorted
+
+    with the highest values of the peak files and the sorted files in each region.
+
+    The index of each file is loaded once (peak_max_index keeps loaded indexes), so
+    each region only costs one index query per file.
+    """
+    # Initialize the list of lines
+    lines = []
+    # Loop over the regions
+    for chrom_list in regions:
+        # Use get_highest_value() to get the highest values of the peak and sorted files
+        max_peaks = get_highest_value(peak_list, chrom_list, delimiter, percentile = percentile)
+        max_sorted = get_highest_value(sorted_list, chrom_list, delimiter, percentile = percentile)
+        # and add the line for the region to the list of lines
+        lines.append(f"{chrom_list[0]}\t{chrom_list[1]}\t{chrom_list[2]}\t{max_peaks}\t{max_sorted}\n")
+    # Return the list of lines
+    return lines
+
+#
+#
+######################################################################
+#
+#           main() function
+
+def main():
+    """
+    Get the system arguments
+    Check that they are valid
+    Use get_highest_value() to get the highest value from the files
+    print the highest value so it can be saved in a shell script.
+
+    If five system arguments are given, use the batch mode instead, and write
+    the highest values of every region in the regions file to the output file.
+    """
+    args = sys.argv
+    # Get the percentile from the optional --percentile argument
+    percentile = script_options.get_option(args, "--percentile", None)
+    # If a percentile was given, make sure it is a number between 0 and 100
+    if percentile != None:
+        percentile = float(percentile)
+        assert 0 < percentile <= 100, f"The percentile should be between 0 and 100, not {percentile}"
+    # If five system arguments were given, then use the batch mode
+    if len(args) == 5:
+        peak_list, sorted_list, regions_file, outfile = check_batch_sysargs(args)
+        # Get the lines with the highest values of each region
+        lines = get_region_maxs(peak_list,
+                                sorted_list,
+                                read_regions_file(regions_file, '\t'),
+                                '\t',
+                                percentile = percentile)
+        # and write them to the output file
+        with open(outfile, 'w') as f:
+            f.writelines(lines)
+            f.close()
+        return
+    file_list, chrom_list = check_sysargs(args)
+    highest_value = get_highest_value(file_list,
+                                      chrom_list,
+                                      '\t',
+                                      percentile = percentile)
+    print(f"{highest_value}")
+
+
+if __name__ == "__main__":
+    main()
+#
+#
+######################################################################
@@ -0,0 +1,50 @@
+"""
+Tests for find_plot_regions.py. The peaks are kept by the chromosome codes of the genome, so the
+regions come out in the order of the .genome file, whatever order the peak files are in.
+"""
+
+import genome_metadata
+
+
+def write_lines(path, lines, newline = "\n"):
+    """
+    Given a path, a list of lines and a line ending, write the lines to the path.
+    """
+    with open(path, 'w', newline = "") as f:
+        f.writelines([f"{line}{newline}" for line in lines])
+        f.close()
+
+
+def test_regions_follow_the_genome_order(tmp_path, load_script):
+    find_plot_regions = load_script("trackfile_editing/find_plot_regions.py")
+    # chrX comes first in the genome, and both chromosomes have an overhang of 5000
+    genome = str(tmp_path / "length_sort.genome")
+    write_lines(genome, ["chrX\t50000", "chr1\t50000"])
+    # A windows bedgraph file with a track line, a peak inside of another peak,
+    # and a chromosome that is not in the genome
+    bedgraph = str(tmp_path / "sample.bg")
+    write_lines(bedgraph, ["track type=bedGraph name=sample",
+                           "chr1\t10000\t11000\t3",
+                           "chr1\t10200\t10300\t8",
+                           "chrZ\t1\t5\t2",
+                           "chrX\t40000\t48000\t1"], newline = "\r\n")
+    # An unsorted narrowPeak file
+    narrow_peak = str(tmp_path / "sample.narrowPeak")
+    write_lines(narrow_peak, ["chr1\t30000\t31000\tpeak_1\t10\t.\t2\t3\t4\t50",
+                              "chr1\t15000\t16000\tpeak_2\t10\t.\t2\t3\t4\t50"])
+    metadata = find_plot_regions.get_genome_metadata(genome, "\t")
+    chrom_names = metadata["chrom_names"].tolist()
+    assert chrom_names == ["chrX", "chr1"]
+    peaks = find_plot_regions.get_peaks([bedgraph, narrow_peak], "\t", chrom_names)
+    # The peaks are kept by chromosome code, sorted
+    assert peaks[bedgraph][1] == [(10000, 11000), (10200, 10300)]
+    assert peaks[narrow_peak] == {1 : [(15000, 16000), (30000, 31000)]}
+    end_distance = find_plot_regions.make_end_distances(genome_metadata.get_chrom_lengths(metadata))
+    regions = find_plot_regions.find_regions(peaks,
+                                             [end_distance[chrom] for chrom in chrom_names],
+                                             metadata["chrom_lengths"].tolist())
+    # chrZ is left out, the nested peak is inside of the first region, and the
+    # chrX region stops at the end of the chromosome
+    assert find_plot_regions.get_lines(regions, chrom_names) == ["chrX\t35000\t50000\n",
+                                                                 "chr1\t5000\t21000\n",
+                                                                 "chr1\t25000\t36000\n"]
@@ -0,0 +1,79 @@
+"""
+Tests for the highest values of get_peak_maxs.py. Files that cannot be indexed (their lines do not
+all have the same number of columns) are read one line at a time by update_highest_value(), and
+should give the same values as the index of the same lines.
+"""
+
+import pytest
+
+
+# The lines of a bedgraph file: a track line, and nested lines (one line inside of another)
+bedgraph_lines = ["track type=bedGraph name=sample\n",
+                  "chr1\t0\t1000\t2.5\n",
+                  "chr1\t100\t200\t9.0\n",
+                  "chr1\t150\t160\t4.0\n",
+                  "chr1\t900\t1200\t30.0\n",
+                  "chr2\t0\t50\t7.0\n"]
+
+
+def write_lines(path, lines):
+    """
+    Given a path and a list of lines, write the lines to the path.
+    """
+    with open(path, 'w') as f:
+        f.writelines(lines)
+        f.close()
+
+
+@pytest.fixture
+def peak_files(tmp_path, load_script):
+    """
+    Return get_peak_maxs.py as a module, a bedgraph file that can be indexed, and the
+    same bedgraph file with an extra column on one line, so it cannot be indexed.
+    """
+    get_peak_maxs = load_script("trackfile_editing/get_peak_maxs.py")
+    indexed = str(tmp_path / "indexed.bg")
+    ragged = str(tmp_path / "ragged.bg")
+    write_lines(indexed, bedgraph_lines)
+    write_lines(ragged, bedgraph_lines[:2] + ["chr1\t100\t200\t9.0\textra\n"] + bedgraph_lines[3:])
+    return get_peak_maxs, indexed, ragged
+
+
+@pytest.mark.parametrize("region, expected", [(["chr1", "0", "1000"], 9.0),
+                                              (["chr1", "100", "199"], 4.0),
+                                              (["chr1", "101", "155"], 0),
+                                              (["chr1", "140", "170"], 4.0),
+                                              (["chr1", "0", "1200"], 30.0),
+                                              (["chr2", "0", "50"], 7.0),
+                                              (["chr3", "0", "50"], 0)])
+def test_unindexed_file_matches_index(peak_files, region, expected):
+    get_peak_maxs, indexed, ragged = peak_files
+    assert get_peak_maxs.get_highest_value([indexed], region, '\t') == expected
+    assert get_peak_maxs.get_highest_value([ragged], region, '\t') == expected
+    # The ragged file was only tried once for the index
+    assert ragged in get_peak_maxs.unindexed_files and indexed not in get_peak_maxs.unindexed_files
+
+
+@pytest.mark.parametrize("percentile", [1, 50, 75, 100])
+def test_unindexed_percentile_matches_index(peak_files, percentile):
+    get_peak_maxs, indexed, ragged = peak_files
+    region = ["chr1", "0", "1200"]
+    assert (get_peak_maxs.get_highest_value([ragged], region, '\t', percentile = percentile)
+            == get_peak_maxs.get_highest_value([indexed], region, '\t', percentile = percentile))
+
+
+def test_whole_file_skips_track_and_header_lines(peak_files, tmp_path):
+    get_peak_maxs, indexed, ragged = peak_files
+    # A header line and a comment between the lines do not stop the file from being read
+    with_header = str(tmp_path / "header.bg")
+    write_lines(with_header, ["chrom\tstart\tend\tvalue\n", "# a comment\n"] + bedgraph_lines)
+    assert get_peak_maxs.update_highest_value(with_header, 0, get_peak_maxs.forms["bedgraph"], '\t') == 30.0
+    assert get_peak_maxs.update_highest_value(ragged, 50.0, get_peak_maxs.forms["bedgraph"], '\t') == 50.0
+
+
+def test_unreadable_value_raises(peak_files, tmp_path):
+    get_peak_maxs, indexed, ragged = peak_files
+    bad = str(tmp_path / "bad.bg")
+    write_lines(bad, bedgraph_lines + ["chr1\t10\t20\n"])
+    with pytest.raises(ValueError):
+        get_peak_maxs.update_highest_value(bad, 0, get_peak_maxs.forms["bedgraph"], '\t', chrom_list = ["chr1", "0", "1000"])
@@ -115,15 +115,11 @@ fi
 
 ext=$( check_file_extension "${directory}" )
 
+# Gzipped FASTA files are not decompressed: bowtie2-build reads them as they are,
+# and count_genome_chars.py counts them without writing them to the disk
 if [ "${ext}" == "mixed" ]
     then echo " Mixed file type were found in the given directory"
          exit
-elif [ "${ext}" == "gz" ]
-    then for f in "${directory}"/*."${ext}"
-         do
-             gunzip "${f}"
-         done
-         ext=$( check_file_extension "${directory}" )
 fi
 
 files=""
@@ -368,12 +368,27 @@ echo " "
 echo " "
 echo "===================END==================================== "
 
+# Initialize name for the file containing the maximum values of each region
+maxsfile="${file_dir}/tracks/plot_region_maxs.txt"
+
+echo "===================BEGIN================================== "
+echo " "
+echo " Getting the maximum values in all regions using"
+echo " "
+echo " python3 ${pathto}/get_peak_maxs.py ${peak_files} ${sorted_files} ${regionsfile} ${maxsfile}"
+echo " "
+# Get the maximum values for the peak files and the sorted files in every region
+# at once. The lines of this file are chrom, start, end, max_peaks, max_sorted
+python3 "${pathto}/get_peak_maxs.py" "${peak_files}" "${sorted_files}" "${regionsfile}" "${maxsfile}"
+echo " "
+echo "===================END==================================== "
+
 # Initialize the last chrom variable. This is used to
 # determine when a new folder needs to be created for
 # peak region plots.
 last_chrom="."
 
-# Loop over the lines in the plot_regions.txt file
+# Loop over the lines in the plot_region_maxs.txt file
 while IFS= read -r line
 do
     echo "===================BEGIN================================== "
@@ -396,13 +411,10 @@ do
     # Tell the user what the region to be plotted is.
     echo " $chromregion ."
     echo " "
-    echo " Getting the maximum values in those regions..."
-
-#    exit
 
-    # Get the maxiumum values for reads in the region
-    max_peaks=$(python3 "${pathto}/get_peak_maxs.py" "${peak_files}" "${chromregion}")
-    max_sorted=$(python3 "${pathto}/get_peak_maxs.py" "${sorted_files}" "${chromregion}")
+    # The maxiumum values for reads in the region are the 3rd and 4th elements of the array
+    max_peaks="${n_line[3]}"
+    max_sorted="${n_line[4]}"
     maxs="${max_peaks},${max_sorted}"
 
     echo " The maximum values in this region are:"
@@ -474,7 +486,7 @@ do
     echo " ${file_dir}/tracks/${chrom}/chromreg_${beginning}_${ending}.pdf"
     echo " "
     echo "===================END==================================== "
-done < "${regionsfile}"
+done < "${maxsfile}"
 
 
 
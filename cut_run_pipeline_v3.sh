@@ -51,6 +51,10 @@ check_file_extension () {
     for f in "$1"/*
     do
         file=($( get_array "$f" "." ))
+        # Gzipped FASTA files (<name>.<ext>.gz) are counted as <ext> files
+        if [[ ( "${file[-1]}" == "gz" ) && ( ${#file[@]} -gt 2 ) ]]
+            then file=("${file[@]:0:${#file[@]}-1}")
+        fi
         if [[ ( ${#extensions} -eq 0 ) && ( ${#file} -gt 1 ) ]]
             then extensions[0]="${file[-1]}"
                  arr_count=$(( $arr_count + 1 ))
@@ -154,6 +158,10 @@ echo " "
 date
 echo " "
 
+# The number of processes the python files may use (with their --workers option).
+# nproc counts the processors, and if it is not installed then only one is used.
+workers=$( nproc 2>/dev/null || echo 1 )
+
 stopper=0
 
 # While loop ensures that the only answers given are yes or no
@@ -213,11 +221,11 @@ if [ "${ind_ans,,}" == yes ]
          echo " <chormosome>    <length>"
          echo " and is sorted by the chromosome, using the commands"
          echo " "
-         echo " python3 $cutpath/scripts/python_files/make_genomefile/count_genome_chars.py $b_index"
+         echo " python3 $cutpath/crun_scripts/python_files/make_genomefile/count_genome_chars.py $b_index false ${ext} --workers ${workers}"
          echo " sort -k1,1 ${b_index}/length.genome>${b_index}/length_sort.genome"
          echo " rm ${b_index}/length.genome"
 
-         genome_size_text=$( python3 $cutpath/crun_scripts/python_files/make_genomefile/count_genome_chars.py "$b_index" "false" "${ext}" )
+         genome_size_text=$( python3 $cutpath/crun_scripts/python_files/make_genomefile/count_genome_chars.py "$b_index" "false" "${ext}" --workers "${workers}" )
          sort -k1,1 "${b_index}/length.genome">"${b_index}/length_sort.genome"
          rm "${b_index}/length.genome"
 
@@ -261,11 +269,11 @@ elif [ "${ind_ans,,}" == no ]
          echo " <chormosome>    <length>"
          echo " and is sorted by the chromosome, using the commands"
          echo " "
-         echo " python3 $cutpath/scripts/python_files/make_genomefile/count_genome_chars.py $b_index"
+         echo " python3 $cutpath/crun_scripts/python_files/make_genomefile/count_genome_chars.py $b_index false ${ext} --workers ${workers}"
          echo " sort -k1,1 ${b_index}/length.genome>${b_index}/length_sort.genome"
          echo " rm ${b_index}/length.genome"
 
-         genome_size_text=$( python3 $cutpath/crun_scripts/python_files/make_genomefile/count_genome_chars.py "$b_index" "false" "${ext}" )
+         genome_size_text=$( python3 $cutpath/crun_scripts/python_files/make_genomefile/count_genome_chars.py "$b_index" "false" "${ext}" --workers "${workers}" )
          sort -k1,1 "${b_index}/length.genome">"${b_index}/length_sort.genome"
          rm "${b_index}/length.genome"
 
@@ -421,17 +429,14 @@ if [ "${using_annotations}" == yes ]
                       echo " Your answer: $cutpath/$annot_dir"
                       echo " "
                       echo " Creating your annotation_types directory using:"
-                      echo " $cutpath/crun_scripts/shell_scripts/bedops_scripts/bps_make_filter_annotations.sh -d ${annot_dir}"
-                      echo " python3 $cutpath/crun_scripts/python_files/annotation_editing/edit_annotation_file.py ${annot_dir}"
+                      echo " python3 $cutpath/crun_scripts/python_files/annotation_editing/make_annotation_files.py ${annot_dir}"
 
                       annot_dir="${cutpath}/${annot_dir}"
 
-                      $cutpath/crun_scripts/shell_scripts/bedops_scripts/bps_make_filter_annotations.sh -d "${annot_dir}"
+                      python3 $cutpath/crun_scripts/python_files/annotation_editing/make_annotation_files.py "${annot_dir}"
 
                       annot_dir="${annot_dir}/annotation_types"
 
-                      python3 $cutpath/crun_scripts/python_files/annotation_editing/edit_annotation_file.py "${annot_dir}"
-
                       echo " "
                       echo " The annotation file has been parsed and formatted to .bed files."
                       echo " Those files will be located in the following directory:"
@@ -635,10 +640,10 @@ $cutpath/crun_scripts/shell_scripts/bedtools_scripts/bed_bigwig_conversion.sh -b
 # args[3] : p value. Default is None
 # args[4] : delimiter. Default is tab character (\t).
 # If you wish to use delimiter, you must also set q value and p value.
-python3 $cutpath/crun_scripts/python_files/macs3_narrowpeak_edits/filter_macs3out_files.py "${foldpath_fastqs}" "0.01"
+python3 $cutpath/crun_scripts/python_files/macs3_narrowpeak_edits/filter_macs3out_files.py "${foldpath_fastqs}" "0.01" --workers "${workers}"
 
 if [ "${using_annotations,,}" == yes ]
-    then python3 $cutpath/crun_scripts/python_files/annotation_editing/peak_enrich_annotations.py "${foldpath_fastqs}" "${annot_dir}"
+    then python3 $cutpath/crun_scripts/python_files/annotation_editing/peak_enrich_annotations.py "${foldpath_fastqs}" "${annot_dir}" --workers "${workers}"
 fi
 
 # Make the tracks folder. This is where the annotations/peaks/raw data will be put